@@ -1,3 +1,4 @@
+import uuid
 from fastapi import APIRouter, Depends
 from datetime import datetime
 from app.schemas.chat import ChatRequest, ChatResponse
@@ -6,15 +7,19 @@ from app.services.analyze_needs import get_analyze_needs_service, MockAnalyzeNee
 router = APIRouter()
 
 @router.post("/", response_model=ChatResponse)
+@router.post("/message", response_model=ChatResponse)
 async def handle_chat(
     request: ChatRequest,
     ai_service: MockAnalyzeNeedsService | AnalyzeNeedsService = Depends(get_analyze_needs_service)
 ):
     """Post a chat message and get a response from the AI."""
+    # A new conversation gets its own id; the client sends it back with the next message.
+    conversation_id = request.conversation_id or uuid.uuid4().hex
     
     ai_response = await ai_service.generate_chat_response(
         message=request.message,
-        context=request.user_context
+        context=request.user_context,
+        conversation_id=conversation_id,
     )
     
     if isinstance(ai_response, str):
@@ -22,7 +27,7 @@ async def handle_chat(
 
     return ChatResponse(
         message=ai_response["message"],
-        conversationId=request.conversation_id or "new_conversation",
+        conversationId=conversation_id,
         timestamp=datetime.now(),
         navigate_to=ai_response.get("navigateTo"),
     )
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
-from app.schemas.product import Product, ProductType
+from app.core.config import settings
+from app.core.http_cache import cached_json_response
+from app.core.sse import sse_response
+from app.schemas.product import Product, ProductFields, ProductType
 from app.services.products import ProductService
 from app.services.analyze_needs import AnalyzeNeedsService, get_analyze_needs_service
+from app.services import battle_jobs
+from app.services.battle_jobs import BattleJobStore, get_battle_job_store
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -64,6 +72,8 @@ class ProductBattleResponse(BaseModel):
     product2_name: str
     product2_description: List[str]
     video_url: Optional[str] = None
+    status: str = battle_jobs.COMPLETED
+    error: Optional[str] = None
 
 
 # --- Dependencies ---
@@ -93,7 +103,7 @@ async def analyze_needs(
         )
         return result
     except Exception as e:
-        print(f"Error in /analyze-needs endpoint: {e}")
+        logger.error(f"Error in /analyze-needs endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post(
@@ -116,47 +126,157 @@ async def get_summary(
             raise HTTPException(status_code=500, detail=result["error"])
         return result
     except Exception as e:
-        print(f"Error in /summary endpoint: {e}")
+        logger.error(f"Error in /summary endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post(
+    "/summary/stream",
+    summary="Stream the YouTube summary pipeline as Server-Sent Events"
+)
+async def stream_summary(
+    request: SummaryRequest,
+    service: AnalyzeNeedsService = Depends(get_analyze_needs_service)
+):
+    """
+    Streaming variant of /summary. Emits one SSE event per pipeline stage:
+    `keyword`, `videos`, one `video` per analyzed video as soon as it is done,
+    and finally `result` (a SummaryResponse) or `error`.
+    """
+    if not request.keyword:
+        raise HTTPException(status_code=400, detail="Keyword cannot be empty.")
+    return sse_response(service.stream_youtube_reviews_and_summarize(request.keyword, request.tags))
+
 @router.post(
     "/battle",
     response_model=ProductBattleResponse,
-    summary="Generate a product battle presentation"
+    status_code=202,
+    summary="Start a product battle presentation"
 )
 async def product_battle(
     request: ProductBattleRequest,
-    service: AnalyzeNeedsService = Depends(get_analyze_needs_service)
+    service: AnalyzeNeedsService = Depends(get_analyze_needs_service),
+    job_store: BattleJobStore = Depends(get_battle_job_store)
 ):
     """
     Generates a battle-style presentation between two products.
+    Returns the descriptions immediately with `status: rendering`; the battle video
+    renders in the background and can be fetched from `GET /battle/{battle_id}`.
+
+    The render runs on the instance that accepted the request, so on Cloud Run it
+    needs CPU outside of requests (`--no-cpu-throttling`), and the job store must
+    be shared (`BATTLE_JOB_STORE_BACKEND=gcs`) when more than one instance runs.
     """
     try:
-        result = await service.generate_product_battle(
-            request.product_name_1, request.product_name_2
+        return await service.start_product_battle(
+            request.product_name_1, request.product_name_2, job_store
         )
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
     except Exception as e:
-        print(f"Error in /battle endpoint: {e}")
+        logger.error(f"Error in /battle endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[Product])
-def get_products(service: ProductService = Depends(get_product_service)):
-    """Get a list of all products."""
-    return service.get_all_products()
+@router.get(
+    "/battle/{battle_id}",
+    response_model=ProductBattleResponse,
+    summary="Get a product battle and the status of its video"
+)
+async def get_product_battle(battle_id: str, job_store: BattleJobStore = Depends(get_battle_job_store)):
+    """Returns the battle, including `video_url` once its status is `completed`."""
+    job = await job_store.get(battle_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Battle not found")
+    return job
+
+@router.get(
+    "/battle/{battle_id}/events",
+    summary="Stream product battle status updates as Server-Sent Events"
+)
+async def stream_product_battle(battle_id: str, job_store: BattleJobStore = Depends(get_battle_job_store)):
+    """Emits a `battle` event with the current job on every update until the video is completed or failed."""
+    if not await job_store.get(battle_id):
+        raise HTTPException(status_code=404, detail="Battle not found")
+
+    async def events():
+        while True:
+            job = await job_store.get(battle_id)
+            if job is None:
+                yield "error", {"error": "Battle not found"}
+                return
+            yield "battle", ProductBattleResponse(**job).model_dump()
+            if job["status"] in battle_jobs.TERMINAL_STATUSES:
+                return
+            await job_store.wait_for_update(battle_id, timeout=settings.BATTLE_EVENTS_POLL_SECONDS)
+
+    return sse_response(events())
+
+@router.get(
+    "/",
+    # The body is pre-serialized (and projected by `fields`), so it is documented here rather than validated.
+    response_model=None,
+    responses={
+        200: {
+            "model": List[ProductFields],
+            "description": "A page of products, with only the requested fields when `fields` is given.",
+            "headers": {
+                "X-Next-Cursor": {
+                    "description": "Cursor of the next page; absent on the last page.",
+                    "schema": {"type": "string"},
+                },
+                "ETag": {"description": "Validator for If-None-Match.", "schema": {"type": "string"}},
+            },
+        },
+        304: {"description": "Not Modified: If-None-Match matches the current ETag."},
+        400: {"description": "Invalid cursor or unknown field in `fields`."},
+    },
+)
+def get_products(
+    request: Request,
+    category: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0),
+    max_rating: Optional[float] = Query(None, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated Product fields to return, e.g. id,name,price,imageUrl (default: all fields)",
+    ),
+    service: ProductService = Depends(get_product_service),
+):
+    """
+    Get a page of products, optionally filtered. All given tags must match.
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        serialized = service.list_products_response(
+            fields=requested, category=category, tags=tuple(tags), min_price=min_price, max_price=max_price,
+            min_rating=min_rating, max_rating=max_rating, cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return cached_json_response(request, serialized, settings.CATALOG_CACHE_MAX_AGE_SECONDS)
 
 @router.get("/types", response_model=List[ProductType])
-def get_product_types(service: ProductService = Depends(get_product_service)):
+def get_product_types(request: Request, service: ProductService = Depends(get_product_service)):
     """Get a list of all product types."""
-    return service.get_all_product_types()
+    return cached_json_response(request, service.get_product_types_response(), settings.CATALOG_CACHE_MAX_AGE_SECONDS)
+
+@router.get("/search", response_model=List[Product])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    service: ProductService = Depends(get_product_service),
+):
+    """Ranked full-text search over products (Japanese-aware n-gram index)."""
+    return service.search_products(q, limit)
 
 @router.get("/{product_id}", response_model=Product)
-def get_product_by_id(product_id: str, service: ProductService = Depends(get_product_service)):
+def get_product_by_id(product_id: str, request: Request, service: ProductService = Depends(get_product_service)):
     """Get a single product by its ID."""
-    product = service.get_product_by_id(product_id)
-    if not product:
+    serialized = service.get_product_response(product_id)
+    if serialized is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return cached_json_response(request, serialized, settings.CATALOG_CACHE_MAX_AGE_SECONDS)
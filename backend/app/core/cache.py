@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+
+storage = lazy_import("google.cloud.storage")
+
+
+def json_size(value: Any) -> int:
+    """Approximates the memory footprint of a JSON-like value by its encoded size."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL and a total size budget in bytes.
+
+    Entries are evicted least-recently-used first whenever the total size would
+    exceed `max_bytes`, and are dropped lazily once they are older than their TTL.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        sizeof: Callable[[Any], int] = json_size,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Stores a value. Returns False when the value alone exceeds the size budget."""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return False
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def normalize_key(text: str) -> str:
+    """Normalizes free text (NFKC, case, whitespace) so trivially different inputs share a cache key."""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def hash_key(*parts: Any) -> str:
+    """Builds a stable cache key from JSON-serializable parts."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """
+    Interface for key/value stores holding JSON-serializable values.
+
+    Async code uses the *_async variants, which run the call in a worker thread
+    when the backend waits on the network (`blocking`), so the event loop is not held.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value, ttl_seconds)
+        else:
+            self.set(key, value, ttl_seconds)
+
+    async def delete_async(self, key: str) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.delete, key)
+        else:
+            self.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Process-local backend on top of TTLCache.
+
+    Values are kept JSON-encoded, as in SQLiteCacheBackend, so every get returns
+    a fresh copy and callers may modify it without touching the cached entry.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self._cache = TTLCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    def get(self, key: str) -> Optional[Any]:
+        payload = self._cache.get(key)
+        return None if payload is None else json.loads(payload)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self._cache.set(key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk backend backed by a single SQLite table per namespace.
+
+    Survives restarts and can be shared by several worker processes on the same host.
+    Lookups are local and sub-millisecond, so async callers run them inline.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl_seconds: float):
+        self.path = path
+        self.table = re.sub(r"[^a-zA-Z0-9_]", "_", namespace)
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] <= time.time():
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + ttl),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class GCSCacheBackend(CacheBackend):
+    """
+    Backend storing one JSON object per key in a Cloud Storage bucket.
+
+    Unlike "memory" and "sqlite" it is shared by every instance of the service
+    (e.g. all Cloud Run instances), at the cost of a request per access. Expired
+    objects are ignored on read; a bucket lifecycle rule on the prefix deletes them.
+    """
+
+    blocking = True
+
+    def __init__(self, bucket_name: str, namespace: str, ttl_seconds: float):
+        self.prefix = f"{settings.CACHE_GCS_PREFIX}/{namespace}/"
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._client = storage.Client(project=settings.GCP_PROJECT_ID)
+        self._bucket = self._client.bucket(bucket_name)
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            payload = self._bucket.blob(self.prefix + key).download_as_bytes()
+        except Exception as e:
+            if getattr(e, "code", None) != 404:
+                raise
+            self.misses += 1
+            return None
+        entry = json.loads(payload)
+        if entry["expires_at"] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["value"]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        payload = json.dumps({"expires_at": time.time() + ttl, "value": value}, ensure_ascii=False)
+        self._bucket.blob(self.prefix + key).upload_from_string(payload, content_type="application/json")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._bucket.blob(self.prefix + key).delete()
+        except Exception as e:
+            if getattr(e, "code", None) != 404:
+                raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_cache_backend(kind: str, namespace: str, ttl_seconds: float, max_bytes: int) -> CacheBackend:
+    """Builds a cache backend by name ("memory", "sqlite" or "gcs")."""
+    if kind == "memory":
+        return MemoryCacheBackend(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(settings.CACHE_SQLITE_PATH, namespace=namespace, ttl_seconds=ttl_seconds)
+    if kind == "gcs":
+        return GCSCacheBackend(settings.GCS_BUCKET_NAME, namespace=namespace, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown cache backend: {kind}")
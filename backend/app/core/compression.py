@@ -0,0 +1,116 @@
+import gzip
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional; gzip is used without it
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks "br" or "gzip" from an Accept-Encoding header, honouring q-values; None for identity."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    candidates = [("br", accepted.get("br", wildcard)), ("gzip", accepted.get("gzip", wildcard))]
+    if brotli is None:
+        candidates = candidates[1:]
+    best, quality = max(candidates, key=lambda c: c[1])
+    return best if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and text responses of at least `minimum_size` bytes with brotli
+    or gzip, whichever the client prefers. Streaming responses (e.g. SSE, whose
+    events must reach the client as they are produced) are passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(self, encoding, send))
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+class _CompressingSender:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.send(message)
+            return
+
+        start, self.start_message = self.start_message, None
+        self.passthrough = True
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            # Streaming response: send as-is.
+            await self.send(start)
+            await self.send(message)
+            return
+
+        compressible, headers = self._inspect(start)
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) >= self.middleware.minimum_size:
+                body = self.middleware.compress(self.encoding, body)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The compressed bytes differ from the identity representation the strong ETag names.
+                    headers["ETag"] = f"W/{etag}"
+                message = {**message, "body": body}
+        await self.send(start)
+        await self.send(message)
+
+    @staticmethod
+    def _inspect(start: Message) -> Tuple[bool, MutableHeaders]:
+        headers = MutableHeaders(raw=start["headers"])
+        compressible = (
+            start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+        )
+        return compressible, headers
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,6 +19,89 @@ class Settings(BaseSettings):
     GCP_IAM_SERVICE_ACCOUNT_EMAIL: str | None = None
     IMAGE_GENERATOR_REASONING_ENGINE_ID: str | None = None
     VEO_MODEL_NAME: str | None = None
+    YOUTUBE_CLIENT_POOL_SIZE: int = 4
+    NEEDS_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+    NEEDS_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    SIGNED_URL_EXPIRATION_SECONDS: int = 60 * 60
+    SIGNED_URL_REFRESH_MARGIN_SECONDS: int = 5 * 60
+    # Cache backends: "memory", "sqlite" or "gcs" (objects under CACHE_GCS_PREFIX in GCS_BUCKET_NAME,
+    # shared by all instances); "memory" and "sqlite" are local to one instance
+    CACHE_SQLITE_PATH: str = ".cache/rakubato.sqlite3"
+    CACHE_GCS_PREFIX: str = "cache"
+    VIDEO_CACHE_BACKEND: str = "memory"
+    VIDEO_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    VIDEO_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    YOUTUBE_CACHE_BACKEND: str = "memory"
+    YOUTUBE_SEARCH_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+    YOUTUBE_VIEW_COUNT_CACHE_TTL_SECONDS: int = 60 * 60
+    YOUTUBE_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    YOUTUBE_DAILY_QUOTA: int = 10000
+    # Battle jobs are read by GET /battle/{id} on whichever instance serves it: use "gcs" with several instances
+    BATTLE_JOB_STORE_BACKEND: str = "memory"
+    BATTLE_JOB_TTL_SECONDS: int = 24 * 60 * 60
+    BATTLE_JOB_STORE_MAX_BYTES: int = 8 * 1024 * 1024
+    BATTLE_EVENTS_POLL_SECONDS: float = 15.0
+    # /chat history per conversationId; turns beyond the token budget are dropped oldest first
+    CHAT_CONVERSATION_STORE_BACKEND: str = "memory"
+    CHAT_CONVERSATION_TTL_SECONDS: int = 24 * 60 * 60
+    CHAT_CONVERSATION_STORE_MAX_BYTES: int = 8 * 1024 * 1024
+    CHAT_HISTORY_MAX_TOKENS: int = 4000
+    VEO_POLL_INITIAL_SECONDS: float = 2.0
+    VEO_POLL_MAX_SECONDS: float = 20.0
+    VEO_POLL_BACKOFF: float = 1.5
+    VEO_POLL_JITTER: float = 0.2
+    # Process-wide limits per external backend (JSON in the environment):
+    # rate = requests per second (0 = unlimited), burst = bucket size, concurrency = max calls in flight
+    RATE_LIMITS: Dict[str, Dict[str, float]] = {
+        "gemini": {"rate": 10, "burst": 20, "concurrency": 16},
+        "imagen": {"rate": 1, "burst": 3, "concurrency": 3},
+        "veo": {"rate": 0.2, "burst": 2, "concurrency": 4},
+        "youtube": {"rate": 5, "burst": 10, "concurrency": 8},
+        "gcs": {"rate": 0, "burst": 1, "concurrency": 16},
+        "default": {"rate": 0, "burst": 1, "concurrency": 8},
+    }
+    # Retries and circuit breaking, applied per backend
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY_SECONDS: float = 1.0
+    RETRY_MAX_DELAY_SECONDS: float = 16.0
+    RETRY_BUDGET_RATIO: float = 0.2
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 30.0
+    # Pre-serialized catalog responses (ETag + Cache-Control)
+    CATALOG_CACHE_MAX_AGE_SECONDS: int = 60
+    CATALOG_RESPONSE_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    # Response compression (brotli when installed and accepted, otherwise gzip)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # Span tracing: exporter is "none", "log" (one JSON line per span) or "otlp" (OTLP/HTTP JSON)
+    TRACING_EXPORTER: str = "none"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SERVER_TIMING: bool = True
+    # Model per task; each handle is created once per process by the model registry
+    CHAT_MODEL_NAME: str = "gemini-2.5-flash"
+    NEEDS_MODEL_NAME: str = "gemini-2.5-flash"
+    IMAGE_PROMPT_MODEL_NAME: str = "gemini-2.0-flash-lite-001"
+    IMAGE_MODEL_NAME: str = "imagen-4.0-fast-generate-001"
+    VIDEO_SUMMARY_MODEL_NAME: str = "gemini-2.0-flash"
+    RECOMMENDATION_MODEL_NAME: str = "gemini-2.5-flash-lite"
+    SUMMARY_KEYWORD_MODEL_NAME: str = "gemini-2.5-flash-lite"
+    BATTLE_MODEL_NAME: str = "gemini-2.5-flash"
+    # Build every model handle during the startup warm-up; optionally send one tiny request per Gemini model
+    MODEL_WARM_UP: bool = True
+    MODEL_WARM_UP_REQUESTS: bool = False
+    # Record every external call of AnalyzeNeedsService to CASSETTE_PATH ("record") or answer them
+    # from it offline ("replay"); replay with the Settings used for recording
+    CASSETTE_MODE: str = "off"
+    CASSETTE_PATH: str = ".cassettes/recording.jsonl.gz"
+    # Replayed calls take their recorded time multiplied by this; 0 answers immediately
+    CASSETTE_REPLAY_LATENCY_SCALE: float = 1.0
+    # Logging: records go through a bounded queue to a writer thread; format is "text" or "json"
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    LOG_QUEUE_SIZE: int = 10000
+    # Full model outputs and analysis results, logged at DEBUG (requires LOG_LEVEL=DEBUG)
+    LOG_PAYLOADS: bool = False
 
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -0,0 +1,44 @@
+import hashlib
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.responses import dumps
+
+
+class SerializedResponse(NamedTuple):
+    """A JSON body serialized once, with its strong ETag and any extra headers."""
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = {}
+
+
+def serialize_json(content: Any, headers: Optional[Dict[str, str]] = None) -> SerializedResponse:
+    body = dumps(content)
+    # Derived from the bytes, so every instance serving the same content agrees on the ETag.
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return SerializedResponse(body, etag, headers or {})
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cached_json_response(request: Request, serialized: SerializedResponse, max_age: int) -> Response:
+    """Returns the pre-serialized body, or 304 Not Modified if the client already has it."""
+    headers = {
+        "ETag": serialized.etag,
+        # Responses sit behind basic auth, so only the client may cache them.
+        "Cache-Control": f"private, max-age={max_age}",
+        **serialized.headers,
+    }
+    if etag_matches(request.headers.get("if-none-match"), serialized.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=serialized.body, media_type="application/json", headers=headers)
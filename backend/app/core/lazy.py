@@ -0,0 +1,68 @@
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+# Stand-ins served instead of the real module (see override_module).
+_overrides: Dict[str, Any] = {}
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access.
+
+    Keeps heavy SDKs (vertexai, google.genai, google.cloud.storage, ...) out of
+    `import app.main`, so the server can bind its port on a cold start before
+    they are loaded. Unlike importlib.util.LazyLoader it also works for
+    submodules whose parent package is itself expensive to import.
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        override = _overrides.get(self.__name)
+        if override is not None:
+            return getattr(override, attr)
+        # importlib caches in sys.modules and serializes concurrent imports of the same module.
+        return getattr(importlib.import_module(self.__name), attr)
+
+    def __repr__(self) -> str:
+        if self.__name in _overrides:
+            state = "overridden"
+        else:
+            state = "loaded" if self.__name in sys.modules else "not loaded"
+        return f"<lazy module {self.__name!r} ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    return LazyModule(name)
+
+
+def override_module(name: str, module: Any) -> Any:
+    """
+    Makes every lazy_import(name) proxy resolve to `module` instead of the real
+    module, e.g. to record or replay SDK calls. Passing None removes the
+    override. Returns the previous override (or None), so callers can restore it.
+    """
+    previous = _overrides.get(name)
+    if module is None:
+        _overrides.pop(name, None)
+    else:
+        _overrides[name] = module
+    return previous
+
+
+def resolve_module(name: str) -> Any:
+    """Returns what lazy_import(name) currently resolves to, importing the real module if needed."""
+    override = _overrides.get(name)
+    return override if override is not None else importlib.import_module(name)
+
+
+def loaded_module(name: str) -> Optional[ModuleType]:
+    """
+    Returns the module if something already imported it, without importing it.
+    Useful for isinstance checks against an SDK's exception types: if the SDK
+    was never imported, the exception cannot be one of them.
+    """
+    return sys.modules.get(name)
@@ -0,0 +1,133 @@
+import atexit
+import copy
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.responses import dumps
+
+# Every module logs through logging.getLogger(__name__), i.e. a child of this logger.
+APP_LOGGER = "app"
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a background listener thread. Formatting and writing to
+    stdout happen on that thread, and a full queue drops the record instead of
+    blocking the event loop.
+
+    Message arguments are formatted on the listener thread, so pass immutable
+    values (or pre-rendered strings) as `%` arguments and `fields`.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            # Tracebacks reference live frames; render them before the record leaves this thread.
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    """The plain `[prefix] message` lines the app has always written, plus any structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + dumps(fields, default=str).decode("utf-8")
+        payload = getattr(record, "payload_json", None)
+        if payload:
+            line += "\n" + payload
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, using the keys Cloud Logging recognizes (`severity`, `message`)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "severity": record.levelname,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        line = dumps(entry, default=str).decode("utf-8")
+        payload = getattr(record, "payload_json", None)
+        if payload:
+            # Already serialized by log_payload(); splice it in instead of encoding it twice.
+            line = line[:-1] + ',"payload":' + payload + "}"
+        return line
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    queue_size: Optional[int] = None,
+) -> None:
+    """Routes the app's loggers through a bounded queue to a stdout writer thread. Idempotent."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if (fmt or settings.LOG_FORMAT) == "json" else TextFormatter())
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size or settings.LOG_QUEUE_SIZE)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+    logger = logging.getLogger(APP_LOGGER)
+    logger.handlers = [_handler]
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
+    logger.propagate = False
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the writer thread."""
+    global _listener, _handler
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+    if _handler is not None:
+        logging.getLogger(APP_LOGGER).removeHandler(_handler)
+        _handler = None
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler else 0
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any) -> None:
+    """
+    Logs a full JSON payload (model output, analysis result, ...) at DEBUG level.
+    Off unless LOG_PAYLOADS is set, in which case it is serialized compactly
+    right away so later mutations of `payload` do not race the writer thread.
+    """
+    if not settings.LOG_PAYLOADS or not logger.isEnabledFor(logging.DEBUG):
+        return
+    logger.debug(message, extra={"payload_json": dumps(payload, default=str).decode("utf-8")})
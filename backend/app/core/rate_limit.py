@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from app.core.config import settings
+from app.core.tracing import set_span_attributes
+
+logger = logging.getLogger(__name__)
+
+
+class BackendLimiter:
+    """
+    Process-wide limiter for one external backend: a token bucket bounds the
+    request rate (`rate` per second with bursts of up to `burst`) and a semaphore
+    bounds the number of calls in flight (`concurrency`).
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, concurrency: int):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.concurrency = concurrency
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket_lock = asyncio.Lock()
+
+        # Metrics
+        self.waiting = 0
+        self.in_flight = 0
+        self.acquired_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def _take_token(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        set_span_attributes(rate_limit_wait_ms=round(waited * 1000, 1))
+        self.acquired_total += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        if waited >= 1.0:
+            logger.info(f"[レート制限] {self.name}: {waited:.1f}秒待機しました (待機中: {self.waiting}, 実行中: {self.in_flight})")
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "concurrency": self.concurrency,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "acquired_total": self.acquired_total,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+class RateLimiterRegistry:
+    """Holds one BackendLimiter per backend name, configured from Settings.RATE_LIMITS."""
+
+    def __init__(self, config: Dict[str, Dict[str, float]]):
+        self._config = config
+        self._limiters: Dict[str, BackendLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, backend: str) -> BackendLimiter:
+        limiter = self._limiters.get(backend)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(backend)
+                if limiter is None:
+                    conf = self._config.get(backend) or self._config.get("default", {})
+                    limiter = BackendLimiter(
+                        backend,
+                        rate=conf.get("rate", 0),
+                        burst=conf.get("burst", 1),
+                        concurrency=int(conf.get("concurrency", 8)),
+                    )
+                    self._limiters[backend] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+rate_limiters = RateLimiterRegistry(settings.RATE_LIMITS)
+
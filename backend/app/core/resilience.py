@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from app.core.config import settings
+from app.core.lazy import loaded_module
+from app.core.metrics import backend_call_duration, backend_call_errors, backend_call_retries
+from app.core.rate_limit import rate_limiters
+from app.core.tracing import current_span, span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status codes and markers of errors worth retrying (rate limiting and transient server failures).
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_MARKERS = ("429", "503", "RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "Too Many Requests")
+# Backends whose calls without an explicit model are labelled with the model named on the enclosing pipeline span.
+_MODEL_BACKENDS = {"gemini", "imagen", "veo"}
+
+
+class TransientError(Exception):
+    """Raised by a call to signal a retryable failure, e.g. an empty model response."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while its circuit breaker is open."""
+
+    def __init__(self, backend: str, retry_in: float):
+        super().__init__(f"{backend} is temporarily unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.backend = backend
+        self.retry_in = retry_in
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TransientError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    # Only consulted once a Google SDK has loaded google.api_core; checking must not import it.
+    google_exceptions = loaded_module("google.api_core.exceptions")
+    if google_exceptions is not None and isinstance(
+        exc,
+        (
+            google_exceptions.TooManyRequests,
+            google_exceptions.ResourceExhausted,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.InternalServerError,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.GatewayTimeout,
+        ),
+    ):
+        return True
+    # googleapiclient.errors.HttpError and google.genai errors expose the HTTP status in different attributes.
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int) and value in _RETRYABLE_STATUS_CODES:
+            return True
+    resp = getattr(exc, "resp", None)
+    if resp is not None and getattr(resp, "status", None) in _RETRYABLE_STATUS_CODES:
+        return True
+    message = str(exc)
+    return any(marker in message for marker in _RETRYABLE_MARKERS)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic so that retries cannot multiply
+    load during an outage: every call deposits `ratio` tokens, every retry spends one.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+        self.exhausted_total = 0
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted_total += 1
+            return False
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and rejects calls
+    for `reset_timeout` seconds. After that a limited number of probe calls are let
+    through (half-open); a successful probe closes the circuit, a failed one reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if the call must not reach the backend."""
+        with self._lock:
+            if self.state == self.OPEN:
+                elapsed = time.monotonic() - self._opened_at
+                if elapsed < self.reset_timeout:
+                    self.rejected_total += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+                self.state = self.HALF_OPEN
+                self._half_open_calls = 0
+                logger.info(f"[サーキットブレーカー] {self.name}: half-open (試行呼び出しを許可します)")
+            if self.state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self.rejected_total += 1
+                    raise CircuitOpenError(self.name, 0)
+                self._half_open_calls += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"[サーキットブレーカー] {self.name}: closed (復旧しました)")
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened_total += 1
+                    logger.warning(f"[サーキットブレーカー] {self.name}: open ({self._failures}回連続で失敗しました)")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """Frees a half-open probe slot when the probe ended without a transient failure verdict."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+
+class ResiliencePolicy:
+    """Retry with exponential backoff and full jitter, a retry budget and a circuit breaker for one backend."""
+
+    def __init__(
+        self,
+        backend: str,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        budget_ratio: float,
+        failure_threshold: int,
+        reset_timeout: float,
+    ):
+        self.backend = backend
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = RetryBudget(budget_ratio)
+        self.breaker = CircuitBreaker(backend, failure_threshold, reset_timeout)
+        self.calls_total = 0
+        self.retries_total = 0
+        self.failures_total = 0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def call(self, call: Callable[[], Awaitable[T]], model: str = "", retry: bool = True) -> T:
+        self.calls_total += 1
+        self.budget.deposit()
+        if not model and self.backend in _MODEL_BACKENDS:
+            parent = current_span()
+            model = str(parent.attributes.get("model") or "") if parent else ""
+        start = time.perf_counter()
+        try:
+            return await self._call(call, model, retry)
+        except Exception:
+            backend_call_errors.inc(backend=self.backend, model=model)
+            raise
+        finally:
+            backend_call_duration.observe(time.perf_counter() - start, backend=self.backend, model=model)
+
+    async def _call(self, call: Callable[[], Awaitable[T]], model: str, retry: bool) -> T:
+        attempt = 0
+        with span(self.backend, backend=self.backend, **({"model": model} if model else {})) as current:
+            while True:
+                current.set_attribute("retries", attempt)
+                self.breaker.before_call()
+                try:
+                    async with rate_limiters.get(self.backend).acquire():
+                        result = await call()
+                except Exception as e:
+                    if not is_retryable(e):
+                        # Not a sign of backend health (e.g. invalid request); do not trip the breaker.
+                        self.breaker.release_probe()
+                        self.failures_total += 1
+                        raise
+                    self.breaker.record_failure()
+                    attempt += 1
+                    if (
+                        not retry
+                        or attempt >= self.max_attempts
+                        or self.breaker.state == CircuitBreaker.OPEN
+                        or not self.budget.try_spend()
+                    ):
+                        self.failures_total += 1
+                        raise
+                    self.retries_total += 1
+                    backend_call_retries.inc(backend=self.backend, model=model)
+                    delay = self.backoff(attempt)
+                    logger.info(f"[リトライ] {self.backend}: {e} — {delay:.1f}秒後に再試行します ({attempt}/{self.max_attempts - 1})")
+                    await asyncio.sleep(delay)
+                except BaseException:
+                    # Cancelled (client gone, timeout, shutdown): no verdict, but the probe slot must be freed
+                    # or a half-open breaker would reject every later call.
+                    self.breaker.release_probe()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls_total": self.calls_total,
+            "retries_total": self.retries_total,
+            "failures_total": self.failures_total,
+            "retry_budget_exhausted_total": self.budget.exhausted_total,
+            "circuit_state": self.breaker.state,
+            "circuit_opened_total": self.breaker.opened_total,
+            "circuit_rejected_total": self.breaker.rejected_total,
+        }
+
+
+class ResilienceRegistry:
+    """Holds one ResiliencePolicy per backend, configured from Settings."""
+
+    def __init__(self):
+        self._policies: Dict[str, ResiliencePolicy] = {}
+        self._lock = threading.Lock()
+
+    def get(self, backend: str) -> ResiliencePolicy:
+        policy = self._policies.get(backend)
+        if policy is None:
+            with self._lock:
+                policy = self._policies.setdefault(
+                    backend,
+                    ResiliencePolicy(
+                        backend,
+                        max_attempts=settings.RETRY_MAX_ATTEMPTS,
+                        base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+                        max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+                        budget_ratio=settings.RETRY_BUDGET_RATIO,
+                        failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                        reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+                    ),
+                )
+        return policy
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: policy.stats() for name, policy in self._policies.items()}
+
+
+resilience = ResilienceRegistry()
+
+
+async def resilient_call(backend: str, call: Callable[[], Awaitable[T]], model: str = "", retry: bool = True) -> T:
+    """
+    Runs `call()` against `backend` with rate limiting, retries and circuit breaking.
+    `call` must create a fresh awaitable each time it is invoked. `model` labels the
+    call's metrics and span (AI backends); it defaults to the enclosing span's model.
+    Pass `retry=False` for calls that are not idempotent (e.g. starting a billed render):
+    a timeout does not tell whether the backend acted on the request.
+    """
+    return await resilience.get(backend).call(call, model, retry)
@@ -0,0 +1,23 @@
+import json
+from typing import Any, Callable, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def dumps(content: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serializes to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class of the app: renders with orjson instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
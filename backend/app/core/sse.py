@@ -0,0 +1,27 @@
+import json
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Formats a single Server-Sent Events message with a JSON payload."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_response(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """Wraps an async iterator of (event, data) pairs in a text/event-stream response."""
+    async def body():
+        async for event, data in events:
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering so each event reaches the client immediately.
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,299 @@
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class Span:
+    """One timed operation. Attributes are free-form (model name, video id, retry count, ...)."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "end_time", "_start", "duration_ms",
+                 "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.end_time = self.start_time + self.duration_ms / 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """The spans of one HTTP request (or of one background job started outside a request)."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or _new_id(16)
+        self.spans: List[Span] = []
+
+    def server_timing(self, max_entries: int = 20) -> str:
+        """Aggregates finished spans by name into a Server-Timing header value, slowest first."""
+        totals: Dict[str, List[float]] = {}
+        for s in list(self.spans):
+            if s.duration_ms is None or s.parent_id is None:
+                continue
+            entry = totals.setdefault(s.name, [0.0, 0])
+            entry[0] += s.duration_ms
+            entry[1] += 1
+        ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:max_entries]
+        return ", ".join(
+            f'{re.sub(r"[^A-Za-z0-9_.-]", "_", name)};dur={total:.1f};desc="x{count}"'
+            for name, (total, count) in ranked
+        )
+
+
+class span:
+    """
+    Context manager that records a span as a child of the current one:
+
+        with span("summary.video", video_id=video_id):
+            ...
+
+    Spans opened outside any request start a trace of their own. Do not keep a
+    span open across a `yield` in a generator; the consumer would inherit it.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Span:
+        trace = _current_trace.get()
+        parent = _current_span.get()
+        self._trace_token = None
+        if trace is None:
+            trace = Trace()
+            self._trace_token = _current_trace.set(trace)
+        self.span = Span(self.name, trace.trace_id, parent.span_id if parent else None, self.attributes)
+        trace.spans.append(self.span)
+        self._span_token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.span.end()
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._span_token)
+        if self._trace_token is not None:
+            _current_trace.reset(self._trace_token)
+        exporter.export(self.span)
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator that wraps an async function in a span."""
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Adds attributes to the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+# --- Exporters ---
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class LogSpanExporter(SpanExporter):
+    """Logs one line per finished span; the span is serialized on the log writer thread."""
+
+    def export(self, span: Span) -> None:
+        logger.info("[トレース]", extra={"fields": span.to_dict()})
+
+
+class OTLPSpanExporter(SpanExporter):
+    """
+    Sends spans to an OpenTelemetry collector over OTLP/HTTP (JSON encoding),
+    batched on a background thread so exporting never blocks a request.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "rakubato-backend",
+                 batch_size: int = 256, flush_interval: float = 2.0, max_queue: int = 10000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        import httpx
+
+        with httpx.Client(timeout=5.0) as client:
+            stopping = False
+            while not stopping:
+                batch: List[Span] = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                if batch:
+                    try:
+                        client.post(self.endpoint, json=self._payload(batch))
+                    except Exception as e:
+                        logger.warning(f"[トレース] OTLPエクスポートに失敗しました ({len(batch)}件): {e}")
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        def attribute(key: str, value: Any) -> Dict[str, Any]:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", self.service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "app.core.tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                        "name": s.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(int(s.start_time * 1e9)),
+                        "endTimeUnixNano": str(int((s.end_time or s.start_time) * 1e9)),
+                        "attributes": [attribute(k, v) for k, v in s.attributes.items()],
+                        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }]}
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+
+def create_span_exporter(kind: str) -> SpanExporter:
+    if kind == "log":
+        return LogSpanExporter()
+    if kind == "otlp":
+        return OTLPSpanExporter(settings.TRACING_OTLP_ENDPOINT)
+    if kind == "none":
+        return SpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+
+exporter: SpanExporter = create_span_exporter(settings.TRACING_EXPORTER)
+
+
+# --- Middleware ---
+
+class TracingMiddleware:
+    """Starts a trace per HTTP request and reports its spans in a Server-Timing header."""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        trace_token = _current_trace.set(trace)
+        root = span("http", method=scope["method"], path=scope["path"])
+        root.__enter__()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.span.set_attribute("status_code", message["status"])
+                if self.server_timing:
+                    timing = trace.server_timing()
+                    elapsed = (time.perf_counter() - root.span._start) * 1000
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers.append("Server-Timing", f"total;dur={elapsed:.1f}" + (f", {timing}" if timing else ""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except BaseException as e:
+            root.__exit__(type(e), e, None)
+            raise
+        else:
+            root.__exit__(None, None, None)
+        finally:
+            _current_trace.reset(trace_token)
@@ -1,17 +1,53 @@
+import asyncio
+import contextlib
 import os
 import secrets
+from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 from app.api.v1 import chat, products
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.log import setup_logging, shutdown_logging
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.rate_limit import rate_limiters
+from app.core.responses import FastJSONResponse
+from app.core import tracing
+from app.core.tracing import TracingMiddleware
+from app.services import analyze_needs
+from app.services.analyze_needs import close_analyze_needs_service, init_analyze_needs_service
+from app.services.battle_jobs import close_battle_job_store
+from app.services.metrics_collectors import register_collectors
+from app.services.youtube import quota_tracker
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # Create the AI service and its API clients once per process instead of per request.
+    # This runs in the background so that the port opens (and /health answers) while the
+    # Google SDKs are still being imported on a cold start.
+    app.state.analyze_needs_warm_up = asyncio.create_task(init_analyze_needs_service())
+    yield
+    with contextlib.suppress(Exception):
+        await app.state.analyze_needs_warm_up
+    await close_analyze_needs_service()
+    close_battle_job_store()
+    tracing.exporter.shutdown()
+    shutdown_logging()
+
 
 app = FastAPI(
     title="AI Product Search API",
     description="API for AI-powered product search and comparison.",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 security = HTTPBasic()
@@ -56,7 +92,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
 )
+app.add_middleware(MetricsMiddleware)
+# Outermost, so Server-Timing's total covers compression too.
+app.add_middleware(TracingMiddleware, server_timing=settings.TRACING_SERVER_TIMING)
 
 app.include_router(
     products.router, 
@@ -78,3 +124,20 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/youtube/quota", dependencies=[Depends(authenticate)])
+def youtube_quota():
+    """YouTube Data API quota units spent today, per API endpoint."""
+    return quota_tracker.usage()
+
+@app.get("/rate-limits", dependencies=[Depends(authenticate)])
+def rate_limit_stats():
+    """Queue depth, in-flight calls and wait times of the per-backend rate limiters."""
+    return rate_limiters.stats()
+
+register_collectors(registry, lambda: analyze_needs._service_instance)
+
+@app.get("/metrics", dependencies=[Depends(authenticate)], include_in_schema=False)
+def metrics():
+    """Request, backend-call, quota and cache metrics in the Prometheus text format."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -13,6 +13,19 @@ class Product(BaseModel):
     category: str
     tags: List[str]
 
+class ProductFields(BaseModel):
+    """A Product as listed by GET /products: every field without `fields=`, only the requested ones with it."""
+    id: Optional[str] = None
+    name: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = Field(None, alias="imageUrl")
+    description: Optional[str] = None
+    specifications: Optional[Dict[str, str]] = None
+    rating: Optional[float] = None
+    review_count: Optional[int] = Field(None, alias="reviewCount")
+    category: Optional[str] = None
+    tags: Optional[List[str]] = None
+
 class ProductType(BaseModel):
     id: str
     name: str
@@ -1,29 +1,47 @@
 import random
 import os
 import json
+import logging
 import re
 import asyncio
+import threading
+import copy
+import time
 import uuid
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable, TypeVar
 from datetime import datetime, timedelta, timezone
 
-import vertexai
-from vertexai.generative_models import GenerativeModel, Tool, FunctionDeclaration, Part
-from vertexai.preview.vision_models import ImageGenerationModel
-
-from google.cloud import storage
-from google.oauth2 import service_account
-from google.auth import default, impersonated_credentials
-from googleapiclient.discovery import build
-from google import genai
-from google.genai import types as genai_types
 from urllib.parse import urlparse
 
 from app.schemas.product import Product
+from app.core.cache import TTLCache, normalize_key
 from app.core.config import settings
-
-# Define the function declarations
-navigate_func = FunctionDeclaration(
+from app.core.lazy import lazy_import
+from app.core.log import log_payload
+from app.core.resilience import TransientError, resilient_call
+from app.core.tracing import set_span_attributes, span, traced
+from app.services import battle_jobs, cassette, conversations
+from app.services.battle_jobs import BattleJobStore
+from app.services.image_store import ContentAddressedImageStore
+from app.services.model_registry import GEMINI, IMAGEN, ModelRegistry, ModelSpec
+from app.services.operation_poller import OperationPoller
+from app.services.signing import UrlSigner
+from app.services.video_cache import create_video_extraction_cache
+from app.services.youtube import create_youtube_data_client
+
+logger = logging.getLogger(__name__)
+
+# The Google SDKs take seconds to import; they are loaded on first use so that
+# importing the app (and serving /health or the mock service) stays fast.
+vertexai = lazy_import("vertexai")
+generative_models = lazy_import("vertexai.generative_models")
+storage = lazy_import("google.cloud.storage")
+service_account = lazy_import("google.oauth2.service_account")
+genai = lazy_import("google.genai")
+genai_types = lazy_import("google.genai.types")
+
+# Function declarations of the tool-using models (FunctionDeclaration kwargs, built by the model registry)
+navigate_func = dict(
     name="navigate",
     description="ユーザーをアプリケーションの新しい画面に遷移させます。",
     parameters={
@@ -38,7 +56,7 @@ navigate_func = FunctionDeclaration(
     },
 )
 
-youtube_search_func = FunctionDeclaration(
+youtube_search_func = dict(
     name="search_youtube_videos",
     description="YouTubeで動画を検索します。",
     parameters={
@@ -53,10 +71,105 @@ youtube_search_func = FunctionDeclaration(
     }
 )
 
+get_policy_text_func = dict(
+    name="get_policy_text",
+    description="画像生成で遵守すべきルールを取得します。",
+    parameters={
+        "type": "object",
+        "properties": {}
+    },
+)
+
+
+# Standing instructions of the shopping advisor chat, sent as the chat model's system instruction
+# so that each turn only carries the user's message and the (trimmed) conversation history.
+CHAT_SYSTEM_INSTRUCTION = """# 命令書
+
+あなたは、ユーザーの購入活動を支援する優秀なショッピングアドバイザーです。
+ユーザーが入力した検討中の商品について、YouTubeのレビュー動画を多角的に調査・分析し、ユーザーが自身のニーズに合った最適な商品を選べるようにサポートしてください。
+
+実行ステップ:
+
+
+1.  **キーワードの受け取り**: ユーザーから商品名やカテゴリを受け取ります。
+2.  **YouTubeでの動画検索**: `search_youtube_videos` ツールを使って、関連性の高いレビュー動画を検索します。検索クエリは具体的に、例えば「[商品名] レビュー」のようにします。
+3.  **レビュー動画の分析**: (これは概念的なステップです。実際に動画を視聴するわけではありません) 検索結果の動画タイトルやスニペットから、その動画が肯定的な意見か、否定的な意見か、あるいは中立的な比較レビューなのかを判断します。
+4.  **情報の統合と要約**: 複数のレビュー動画から得られた情報を統合し、各商品の長所と短所を客観的にまとめて、カテゴライズします。
+5.  **最終的な提案**: 分析結果に基づいて、求める商品タイプを提案します。
+---
+
+{以下はインプットとアウトプットの例であり、実際の回答に含める必要はありません。}
+
+### 具体的なユーザー入力例
+
+ユーザー入力例:
+「ソニーのヘッドホン、WH-1000XM5を買おうか悩んでいます。」
+
+### 具体的なアウトプットの例
+
+AIの思考プロセス例（非表示）:
+*   YouTubeで「WH-1000XM5 レビュー」を検索。
+*   複数の動画を分析。「ノイズキャンセリングは最強クラス」「音質も良いが、もっと音楽鑑賞に特化したモデルもある」「価格が高い」「BoseやSennheiserが競合としてよく挙
+げられる」「装着感や携帯性も重要な比較ポイント」といった情報を得る。
+*   これらの情報から、「ノイズキャンセリング性能」「音質」「コストパフォーマンス」「携帯性」といった選び方の軸を抽出する。
+
+
+AIの最終的なアウトプット例（ユーザーへの提示内容）:
+「承知いたしました。ソニーのWH-1000XM5ですね。様々なレビューを拝見したところ、素晴らしい製品ですが、購入された方がどのような点を重視するかによって、さらに満足度の
+高い選択肢がありそうです。
+
+もしよろしければ、あなたがヘッドホンに最も求める「方向性」は以下のどれに近いか教えていただけますか？」
+
+
+A. 静寂性を最優先するタイプ: とにかく周囲の騒音を消すことを最優先し、業界最高レベルのノイズキャンセリング性能を求める。
+
+
+B. 音質を最優先するタイプ:
+ノイズキャンセリング性能も重要だが、それ以上に音楽への深い没入感や、アーティストの息遣いまで感じられるような繊細な音の表現力を重視する。
+
+
+C. バランスと携帯性を重視するタイプ: 高い性能は維持しつつ、日常的に長時間利用しても疲れにくい軽さや、カバンにすっきり収まるコンパクトさも同じくらい大切にする。
+
+D. コストパフォーマンスを重視するタイプ: 最新・最高の機能にはこだわらず、十分な性能を持ちながらも、価格とのバランスが取れた賢い選択をしたい。
+---
+ユーザーの最初のメッセージが、検討中の商品です。"""
+
+
+def _tools_options(*declarations: dict) -> Dict[str, Any]:
+    return {"tools": [generative_models.Tool(function_declarations=[
+        generative_models.FunctionDeclaration(**declaration) for declaration in declarations
+    ])]}
+
+
+# One model handle per task, created once per process; model names come from Settings.
+models = ModelRegistry({
+    "chat": ModelSpec(GEMINI, "CHAT_MODEL_NAME", lambda: {
+        **_tools_options(navigate_func, youtube_search_func),
+        "system_instruction": CHAT_SYSTEM_INSTRUCTION,
+    }),
+    "needs": ModelSpec(GEMINI, "NEEDS_MODEL_NAME"),
+    "image_prompt": ModelSpec(GEMINI, "IMAGE_PROMPT_MODEL_NAME", lambda: _tools_options(get_policy_text_func)),
+    "image_prompt_batch": ModelSpec(
+        GEMINI, "IMAGE_PROMPT_MODEL_NAME", lambda: {"generation_config": {"response_mime_type": "application/json"}}
+    ),
+    "image": ModelSpec(IMAGEN, "IMAGE_MODEL_NAME"),
+    "video_summary": ModelSpec(GEMINI, "VIDEO_SUMMARY_MODEL_NAME"),
+    "recommendation": ModelSpec(GEMINI, "RECOMMENDATION_MODEL_NAME"),
+    "summary_keyword": ModelSpec(GEMINI, "SUMMARY_KEYWORD_MODEL_NAME"),
+    "battle": ModelSpec(GEMINI, "BATTLE_MODEL_NAME"),
+})
+
+T = TypeVar("T")
+
+# Rules that generated images must follow; shared by the per-archetype and batched prompt agents.
+IMAGE_POLICY_TEXT = """商標、個人特定、センシティブな表現は避けてください。"""
+
+
 class AnalyzeNeedsService:
     def __init__(self, project_id: str, location: str):
         self.project_id = project_id
         self.location = location
+        init_start = time.perf_counter()
 
         # Explicitly create credentials from the service account file if provided
         self.credentials = None
@@ -66,53 +179,121 @@ class AnalyzeNeedsService:
                     settings.GOOGLE_APPLICATION_CREDENTIALS
                 )
             except Exception as e:
-                print(f"ERROR: Failed to create credentials from file specified in GOOGLE_APPLICATION_CREDENTIALS: {e}")
+                logger.error(f"ERROR: Failed to create credentials from file specified in GOOGLE_APPLICATION_CREDENTIALS: {e}")
 
+        start = time.perf_counter()
         vertexai.init(project=self.project_id, location=self.location, credentials=self.credentials)
+        self._log_client_construction("vertexai.init", start)
         
-        # Initialize clients with credentials
+        # Initialize clients with credentials. These are created once per process
+        # and reused by every request (see get_analyze_needs_service).
+        start = time.perf_counter()
         self.storage_client = storage.Client(credentials=self.credentials)
-        if settings.YOUTUBE_API_KEY:
-            self.youtube = build("youtube", "v3", developerKey=settings.YOUTUBE_API_KEY)
-        else:
-            self.youtube = None
+        self._log_client_construction("storage.Client", start)
+        self.image_store = ContentAddressedImageStore(self.storage_client, settings.GCS_BUCKET_NAME)
+        # Signing credentials and signed URLs are shared across requests.
+        self.url_signer = UrlSigner(
+            self.storage_client,
+            credentials=self.credentials,
+            signer_email=settings.GCP_IAM_SERVICE_ACCOUNT_EMAIL,
+            expiration_seconds=settings.SIGNED_URL_EXPIRATION_SECONDS,
+            refresh_margin_seconds=settings.SIGNED_URL_REFRESH_MARGIN_SECONDS,
+        )
+
+        start = time.perf_counter()
+        self.youtube = create_youtube_data_client(settings.YOUTUBE_API_KEY)
+        if self.youtube:
+            self._log_client_construction("YouTubeDataClient", start)
 
         # Initialize the client for Google AI (for Veo)
         try:
+            start = time.perf_counter()
             self.genai_client = genai.Client(
                 project=self.project_id, 
                 location=self.location, 
                 vertexai=True
             )
+            self._log_client_construction("genai.Client", start)
         except Exception as e:
-            print(f"ERROR: Failed to initialize genai.Client: {e}")
+            logger.error(f"ERROR: Failed to initialize genai.Client: {e}")
             self.genai_client = None
 
-        # Combine tools
-        combined_tool = Tool(function_declarations=[navigate_func, youtube_search_func])
+        # One poller shared by every Veo operation in flight
+        self.veo_poller = None
+        if self.genai_client:
+            genai_client = self.genai_client
+            self.veo_poller = OperationPoller(
+                fetch=lambda operation: genai_client.operations.get(operation),
+                initial_interval=settings.VEO_POLL_INITIAL_SECONDS,
+                max_interval=settings.VEO_POLL_MAX_SECONDS,
+                backoff=settings.VEO_POLL_BACKOFF,
+                jitter=settings.VEO_POLL_JITTER,
+                name="veo",
+            )
 
         # Let the model know about the tools it can use
-        self.model = GenerativeModel(
-            "gemini-2.5-flash", 
-            tools=[combined_tool]
+        self.model = models.get("chat")
+        # Analysis results and their image blobs, keyed by normalized product category.
+        self.needs_cache = TTLCache(
+            max_bytes=settings.NEEDS_CACHE_MAX_BYTES,
+            ttl_seconds=settings.NEEDS_CACHE_TTL_SECONDS,
         )
+        # Per-video extraction results; video analysis is the most expensive call we make.
+        self.video_cache = create_video_extraction_cache()
+        # Chat history per conversationId, sent back to the model as the session history.
+        self.conversations = conversations.create_conversation_store()
+        # Background tasks (battle video renders) that outlive their request.
+        self._background_tasks: set[asyncio.Task] = set()
+        self._log_client_construction("AnalyzeNeedsService", init_start)
+
+    @staticmethod
+    def _log_client_construction(name: str, start: float) -> None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"[クライアント] {name} の初期化時間: {elapsed_ms:.1f}ms")
+
+    async def aclose(self) -> None:
+        """Stops background work and releases the pooled clients. Called once on application shutdown."""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self.veo_poller:
+            await self.veo_poller.close()
+        # Closing the HTTP clients may block, so do it off the event loop.
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """Releases the pooled clients."""
+        self.video_cache.close()
+        self.conversations.close()
+        if self.youtube:
+            self.youtube.close()
+        try:
+            self.storage_client.close()
+        except Exception as e:
+            logger.warning(f"[クライアント] storage.Clientのクローズに失敗しました: {e}")
+        if self.genai_client:
+            try:
+                self.genai_client.close()
+            except Exception as e:
+                logger.warning(f"[クライアント] genai.Clientのクローズに失敗しました: {e}")
 
-    def _search_youtube(self, query: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    async def _call_backend(backend: str, call: Callable[[], Awaitable[T]], model: str = "", retry: bool = True) -> T:
+        """
+        Runs a call to an external backend through its process-wide rate limiter,
+        with retries (exponential backoff, jitter, retry budget) and a circuit breaker.
+        `model` labels the call's metrics; `retry=False` for calls that are not idempotent.
+        """
+        return await resilient_call(backend, call, model, retry)
+
+    async def _search_youtube(self, query: str) -> List[Dict[str, Any]]:
         """Performs a YouTube search and returns video details."""
         if not self.youtube:
             return [{"error": "YouTube API key is not configured."}]
         try:
-            search_response = self.youtube.search().list(
-                q=query,
-                part="snippet",
-                type="video",
-                maxResults=5,
-                regionCode="JP",
-                relevanceLanguage="ja"
-            ).execute()
+            items = await self.youtube.search_videos(query, max_results=5)
 
             videos = []
-            for item in search_response.get("items", []):
+            for item in items:
                 videos.append({
                     "title": item["snippet"]["title"],
                     "videoId": item["id"]["videoId"],
@@ -120,72 +301,35 @@ class AnalyzeNeedsService:
                 })
             return videos
         except Exception as e:
-            print(f"Error searching YouTube: {e}")
+            logger.error(f"Error searching YouTube: {e}")
             return []
 
     async def generate_chat_response(
         self, 
         message: str, 
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        conversation_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Generates a chat response using the Vertex AI Gemini API."""
-        try:
-            prompt = f'''
-                # 命令書
-
-                あなたは、ユーザーの購入活動を支援する優秀なショッピングアドバイザーです。
-                ユーザーが入力した検討中の商品について、YouTubeのレビュー動画を多角的に調査・分析し、ユーザーが自身のニーズに合った最適な商品を選べるようにサポートしてください。
-
-                実行ステップ:
-
-
-                1.  **キーワードの受け取り**: ユーザーから商品名やカテゴリを受け取ります。
-                2.  **YouTubeでの動画検索**: `search_youtube_videos` ツールを使って、関連性の高いレビュー動画を検索します。検索クエリは具体的に、例えば「[商品名] レビュー」のようにします。
-                3.  **レビュー動画の分析**: (これは概念的なステップです。実際に動画を視聴するわけではありません) 検索結果の動画タイトルやスニペットから、その動画が肯定的な意見か、否定的な意見か、あるいは中立的な比較レビューなのかを判断します。
-                4.  **情報の統合と要約**: 複数のレビュー動画から得られた情報を統合し、各商品の長所と短所を客観的にまとめて、カテゴライズします。
-                5.  **最終的な提案**: 分析結果に基づいて、求める商品タイプを提案します。
-                ---
-
-                {{以下はインプットとアウトプットの例であり、実際の回答に含める必要はありません。}}
-
-                ### 具体的なユーザー入力例
-
-                ユーザー入力例:
-                「ソニーのヘッドホン、WH-1000XM5を買おうか悩んでいます。」
-
-                ### 具体的なアウトプットの例
-
-                AIの思考プロセス例（非表示）:
-                *   YouTubeで「WH-1000XM5 レビュー」を検索。
-                *   複数の動画を分析。「ノイズキャンセリングは最強クラス」「音質も良いが、もっと音楽鑑賞に特化したモデルもある」「価格が高い」「BoseやSennheiserが競合としてよく挙
-                げられる」「装着感や携帯性も重要な比較ポイント」といった情報を得る。
-                *   これらの情報から、「ノイズキャンセリング性能」「音質」「コストパフォーマンス」「携帯性」といった選び方の軸を抽出する。
-
-
-                AIの最終的なアウトプット例（ユーザーへの提示内容）:
-                「承知いたしました。ソニーのWH-1000XM5ですね。様々なレビューを拝見したところ、素晴らしい製品ですが、購入された方がどのような点を重視するかによって、さらに満足度の
-                高い選択肢がありそうです。
-
-                もしよろしければ、あなたがヘッドホンに最も求める「方向性」は以下のどれに近いか教えていただけますか？」
-
-
-                A. 静寂性を最優先するタイプ: とにかく周囲の騒音を消すことを最優先し、業界最高レベルのノイズキャンセリング性能を求める。
-
-
-                B. 音質を最優先するタイプ:
-                ノイズキャンセリング性能も重要だが、それ以上に音楽への深い没入感や、アーティストの息遣いまで感じられるような繊細な音の表現力を重視する。
-
-
-                C. バランスと携帯性を重視するタイプ: 高い性能は維持しつつ、日常的に長時間利用しても疲れにくい軽さや、カバンにすっきり収まるコンパクトさも同じくらい大切にする。
+        """
+        Generates a chat response using the Vertex AI Gemini API.
 
-                D. コストパフォーマンスを重視するタイプ: 最新・最高の機能にはこだわらず、十分な性能を持ちながらも、価格とのバランスが取れた賢い選択をしたい。
-                ---
-                では、始めましょう。私が最初にお願いしたい商品はこちらです：
-                {message}
-                '''
-            
-            chat = self.model.start_chat()
-            response = await chat.send_message_async(prompt)
+        The instructions are the model's system instruction; with a conversation_id
+        the stored earlier turns are sent as history and the new exchange is stored.
+        """
+        try:
+            turns = await self.conversations.history(conversation_id) if conversation_id else []
+            history = [
+                generative_models.Content(role=turn["role"], parts=[generative_models.Part.from_text(turn["text"])])
+                for turn in turns
+            ]
+            prompt = message
+            if context:
+                prompt += f"\n\n(ユーザー情報: {json.dumps(context, ensure_ascii=False)})"
+            history_tokens = sum(conversations.estimate_tokens(turn["text"]) for turn in turns)
+            logger.info(f"[チャット] 会話 {conversation_id}: 履歴 {len(turns)} 件 (約{history_tokens}トークン)")
+
+            chat = self.model.start_chat(history=history)
+            response = await self._call_backend("gemini", lambda: chat.send_message_async(prompt), model=models.name("chat"))
             
             res_text = ""
             res_nav = None
@@ -196,17 +340,16 @@ class AnalyzeNeedsService:
                         res_nav = part.function_call.args.get("path")
                     elif part.function_call.name == "search_youtube_videos":
                         query = part.function_call.args.get("query")
-                        search_results = self._search_youtube(query)
+                        search_results = await self._search_youtube(query)
                         
                         # Send search results back to the model
-                        response = await chat.send_message_async(
-                            Part.from_function_response(
-                                name="search_youtube_videos",
-                                response={
-                                    "content": {"videos": search_results},
-                                }
-                            )
+                        function_response = generative_models.Part.from_function_response(
+                            name="search_youtube_videos",
+                            response={
+                                "content": {"videos": search_results},
+                            }
                         )
+                        response = await self._call_backend("gemini", lambda: chat.send_message_async(function_response), model=models.name("chat"))
                         # Process the new response after providing tool output
                         for new_part in response.candidates[0].content.parts:
                             if hasattr(new_part, 'text') and new_part.text:
@@ -218,18 +361,22 @@ class AnalyzeNeedsService:
             if res_nav and not res_text:
                 res_text = f"{res_nav} に移動します。"
 
+            if conversation_id:
+                await self.conversations.append(conversation_id, message, res_text)
             return {"message": res_text, "navigateTo": res_nav}
 
         except Exception as e:
-            print(f"Error calling Vertex AI: {e}")
+            logger.error(f"Error calling Vertex AI: {e}")
             return {"message": "AIとの接続中にエラーが発生しました。", "navigateTo": None}
 
+    @traced("needs.analyze")
     async def _analyze_user_needs(self, product_category: str) -> dict:
         """ユーザーの潜在的なニーズを分析し、ユーザータイプを提示する"""
-        print(f"[分析エージェント] カテゴリ「{product_category}」の潜在ニーズを分析中...")
+        set_span_attributes(model=models.name("needs"), category=product_category)
+        logger.info(f"[分析エージェント] カテゴリ「{product_category}」の潜在ニーズを分析中...")
         try:
             # Use a model without function calling for this specific task
-            model = GenerativeModel("gemini-2.5-flash")
+            model = models.get("needs")
             prompt = f'''あなたは、顧客の潜在的なニーズを分析し、具体的な商品を例示するプロのマーケティングアナリストです。
 
 顧客が「{product_category}」の購入を検討しています。
@@ -252,7 +399,7 @@ class AnalyzeNeedsService:
   ]
 }}'''
 
-            response = await model.generate_content_async([prompt])
+            response = await self._call_backend("gemini", lambda: model.generate_content_async([prompt]), model=models.name("needs"))
             
             if not response or not response.text:
                 raise ValueError("AIモデルから空の応答が返されました。")
@@ -272,31 +419,22 @@ class AnalyzeNeedsService:
             except json.JSONDecodeError as e:
                 raise ValueError(f"AIモデルの応答をJSONとして解析できませんでした。生の応答: {response_text}") from e
 
-            print(f"[分析エージェント] 分析が完了しました。")
+            logger.info(f"[分析エージェント] 分析が完了しました。")
             return json_response
 
         except Exception as e:
             raise ValueError(f"分析中に予期せぬ問題が発生しました: {e}")
 
+    @traced("needs.image_prompt")
     async def _generate_image_prompts_async(self, product_description: str) -> dict:
         """Generates optimized prompts for image generation."""
+        set_span_attributes(model=models.name("image_prompt"))
+
         def get_policy_text():
             """Mock tool to get policy text."""
-            return """商標、個人特定、センシティブな表現は避けてください。"""
-
-        get_policy_text_tool = FunctionDeclaration(
-            name="get_policy_text",
-            description="画像生成で遵守すべきルールを取得します。",
-            parameters={
-                "type": "object",
-                "properties": {}
-            }
-        )
+            return IMAGE_POLICY_TEXT
 
-        model = GenerativeModel(
-            "gemini-2.0-flash-lite-001",
-            tools=[Tool([get_policy_text_tool])]
-        )
+        model = models.get("image_prompt")
 
         chat = model.start_chat()
 
@@ -351,7 +489,7 @@ class AnalyzeNeedsService:
 
 入力テキスト: {product_description}
 '''
-        response = await chat.send_message_async(prompt)
+        response = await self._call_backend("gemini", lambda: chat.send_message_async(prompt), model=models.name("image_prompt"))
 
         part = response.candidates[0].content.parts[0]
 
@@ -359,14 +497,13 @@ class AnalyzeNeedsService:
             function_call = part.function_call
             if function_call.name == "get_policy_text":
                 policy_text = get_policy_text()
-                response = await chat.send_message_async(
-                    Part.from_function_response(
-                        name="get_policy_text",
-                        response={
-                            "content": policy_text,
-                        }
-                    ),
+                function_response = generative_models.Part.from_function_response(
+                    name="get_policy_text",
+                    response={
+                        "content": policy_text,
+                    }
                 )
+                response = await self._call_backend("gemini", lambda: chat.send_message_async(function_response), model=models.name("image_prompt"))
                 try:
                     response_text = response.text.strip()
                     match = re.search(r"```json\s*(\{.*\})\s*```", response_text, re.DOTALL)
@@ -385,159 +522,209 @@ class AnalyzeNeedsService:
         except (json.JSONDecodeError, AttributeError):
             return {"error": "Failed to get valid JSON response from prompt generation agent."}
 
-    async def _generate_image_async(self, archetype: dict, session_id: str) -> Optional[str]:
-        """イメージ生成エージェント: 各タイプを象徴する商品を、単色のイラスト調で生成し、GCSに保存する"""
+    @traced("needs.image_prompts")
+    async def _generate_image_prompts_batch_async(self, archetypes: List[dict]) -> List[Optional[str]]:
+        """
+        Generates the positive image prompt for every archetype in a single model call.
+        Returns one prompt per archetype, in order; None where the batch did not yield one.
+        """
+        set_span_attributes(model=models.name("image_prompt_batch"), archetypes=len(archetypes))
+        descriptions = [
+            {"index": i, "name": archetype.get("name", ""), "description": archetype.get("description", "a generic product")}
+            for i, archetype in enumerate(archetypes)
+        ]
+        model = models.get("image_prompt_batch")
+        prompt = f'''あなたの主目的：以下の各ユーザータイプについて、「コマースサイトの商品紹介」に使える、
+高度にデフォルメされた概念イラストを生成するための Imagen 用ポジティブプロンプトを1つずつ作成してください。
+
+遵守すべきルール（policy_text）:
+{IMAGE_POLICY_TEXT}
+
+各プロンプトは以下を満たすこと:
+- 説明文の特徴を視覚的に強調した「概念としての商品主題」を表現する。漫画風のエフェクトやシンボルを活用してもよい。
+- 特定ブランドや実在の個人を連想させない（非特定化）。
+- 「かわいい3Dアニメ」スタイルで、やわらかい質感とパステルカラーを基調とした明るい配色にする。
+- 構図（中央配置など）、余白、照明、高解像度・滑らかな曲線といったディテール指示を含める。
+- 英語で記述する。
+
+最終出力は以下のJSONスキーマに厳密に従って返すこと（JSON 以外の説明を付けない）。index は入力の index をそのまま使うこと:
+
+{{
+  "prompts": [
+    {{"index": 0, "positive_prompt": "<Imagen 用に最適化されたプロンプト>"}}
+  ]
+}}
+
+入力（ユーザータイプ一覧）:
+{json.dumps(descriptions, ensure_ascii=False)}
+'''
+        prompts: List[Optional[str]] = [None] * len(archetypes)
+        try:
+            response = await self._call_backend("gemini", lambda: model.generate_content_async([prompt]), model=models.name("image_prompt_batch"))
+            response_text = response.text.strip()
+            match = re.search(r"```json\s*(\{.*\})\s*```", response_text, re.DOTALL)
+            if match:
+                response_text = match.group(1)
+            for item in json.loads(response_text).get("prompts", []):
+                index = item.get("index")
+                positive_prompt = item.get("positive_prompt")
+                if isinstance(index, int) and 0 <= index < len(prompts) and positive_prompt:
+                    prompts[index] = positive_prompt
+        except Exception as e:
+            logger.warning(f"[画像生成エージェント] プロンプトの一括生成に失敗しました。タイプごとに生成します: {e}")
+        set_span_attributes(prompts=sum(1 for p in prompts if p))
+        logger.info(f"[画像生成エージェント] {sum(1 for p in prompts if p)}/{len(prompts)}件のプロンプトを一括生成しました。")
+        return prompts
+
+    @traced("needs.image")
+    async def _generate_image_async(self, archetype: dict, image_prompt: Optional[str] = None) -> Optional[str]:
+        """イメージ生成エージェント: 各タイプを象徴する商品を、単色のイラスト調で生成し、GCSに保存してblob名を返す"""
         archetype_id = archetype.get("id", "unknown")
-        print(f"[画像生成エージェント] タイプID: {archetype_id} の画像生成を開始...")
+        set_span_attributes(archetype_id=archetype_id, batched_prompt=bool(image_prompt))
+        logger.info(f"[画像生成エージェント] タイプID: {archetype_id} の画像生成を開始...")
         try:
-            product_description = archetype.get('description', 'a generic product')
-            prompt_generation_result = await self._generate_image_prompts_async(product_description)
+            if not image_prompt:
+                # Fall back to the per-archetype agent when the batched call did not produce a prompt.
+                product_description = archetype.get('description', 'a generic product')
+                prompt_generation_result = await self._generate_image_prompts_async(product_description)
 
-            if "error" in prompt_generation_result:
-                print(f"[画像生成エージェント] プロンプト生成に失敗しました: {prompt_generation_result['error']}")
-                return None
+                if "error" in prompt_generation_result:
+                    logger.warning(f"[画像生成エージェント] プロンプト生成に失敗しました: {prompt_generation_result['error']}")
+                    return None
 
-            image_prompt = prompt_generation_result.get("positive_prompt")
-            if not image_prompt:
-                print(f"[画像生成エージェント] ポジティブプロンプトが生成されませんでした。")
-                return None
+                image_prompt = prompt_generation_result.get("positive_prompt")
+                if not image_prompt:
+                    logger.info(f"[画像生成エージェント] ポジティブプロンプトが生成されませんでした。")
+                    return None
 
-            model = ImageGenerationModel.from_pretrained("imagen-4.0-fast-generate-001")
-            
-            response = None
-            max_retries = 3
-            retry_delay = 2  # seconds
-            for attempt in range(max_retries):
-                try:
+            model_name = models.name("image")
+            set_span_attributes(model=model_name)
+
+            async def generate_image_bytes() -> bytes:
+                # The first lookup fetches the model over the network unless the warm-up already did.
+                model = await asyncio.to_thread(models.get, "image")
+
+                async def generate_images():
                     response = await asyncio.to_thread(
                         model.generate_images,
                         prompt=image_prompt,
                         number_of_images=1
                     )
-                    if response and response.images:
-                        break  # Success
-                    else:
-                        # This case handles when generate_images returns a response with no images, but doesn't throw an exception.
-                        print(f"[画像生成エージェント] 画像が生成されませんでした。リトライします... ({attempt + 1}/{max_retries})")
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
-
-                except Exception as e:
-                    if "429" in str(e) and attempt < max_retries - 1:
-                        print(f"[画像生成エージェント] 429リソース枯渇エラー。{retry_delay}秒後にリトライします... ({attempt + 1}/{max_retries})")
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                    else:
-                        # For other errors or last retry, print and return None
-                        print(f"[画像生成エージェント] タイプID: {archetype_id} の画像生成中に回復不能なエラー: {e}")
-                        return None # Exit and return None
-            
-            if not response or not response.images:
-                print(f"[画像生成エージェント] タイプID: {archetype_id} の画像生成に失敗しました。モデルから画像が返されませんでした。")
-                return None
-
-            image_bytes = response.images[0]._image_bytes
-            
-            bucket = self.storage_client.bucket(settings.GCS_BUCKET_NAME)
-            blob_name = f"archetype_images/{session_id}/{archetype_id}.png"
-            blob = bucket.blob(blob_name)
-            
-            await asyncio.to_thread(blob.upload_from_string, image_bytes, content_type='image/png')
-            print(f"[画像生成エージェント] タイプID: {archetype_id} の画像をGCSにアップロードしました: gs://{settings.GCS_BUCKET_NAME}/{blob_name}")
+                    if not response or not response.images:
+                        # generate_images can return a response with no images without raising; treat it as transient.
+                        raise TransientError("モデルから画像が返されませんでした。")
+                    return response
 
-            # Generate a signed URL to provide temporary access to the private object
-            expiration_time = datetime.now() + timedelta(hours=1) 
-            
-            signing_creds = self.credentials
-
-            if not signing_creds:
-                if not settings.GCP_IAM_SERVICE_ACCOUNT_EMAIL:
-                    raise ValueError("GCP_IAM_SERVICE_ACCOUNT_EMAIL is not set. It's required for signing URLs in this environment.")
-                
-                # Get default credentials from the environment
-                default_creds, _ = default()
-                # Create impersonated credentials
-                signing_creds = impersonated_credentials.Credentials(
-                    source_credentials=default_creds,
-                    target_principal=settings.GCP_IAM_SERVICE_ACCOUNT_EMAIL,
-                    target_scopes=["https://www.googleapis.com/auth/iam"], # Scope for signing
-                )
+                response = await self._call_backend("imagen", generate_images, model=model_name)
+                return response.images[0]._image_bytes
 
-            signed_url = await asyncio.to_thread(
-                blob.generate_signed_url,
-                expiration=expiration_time,
-                credentials=signing_creds,
-                version="v4"
-            )
-            
-            print(f"[画像生成エージェント] タイプID: {archetype_id} の署名付きURLを生成しました。")
-            return signed_url
+            # Images are stored under a hash of the normalized prompt, so a recurring prompt skips Imagen entirely.
+            blob_name = await self.image_store.get_or_create(image_prompt, model_name, generate_image_bytes)
+            logger.info(f"[画像生成エージェント] タイプID: {archetype_id} の画像: gs://{settings.GCS_BUCKET_NAME}/{blob_name}")
+            return blob_name
 
         except Exception as e:
-            print(f"[画像生成エージェント] タイプID: {archetype_id} の画像生成またはアップロード中にエラー: {e}")
+            logger.error(f"[画像生成エージェント] タイプID: {archetype_id} の画像生成またはアップロード中にエラー: {e}")
             return None
 
+    @traced("needs.sign_urls")
+    async def _sign_archetype_images(self, entry: Dict[str, Any]) -> None:
+        """(Re-)issues signed URLs for the cached image blobs of an analysis result."""
+        image_blobs = entry["image_blobs"]
+        try:
+            signed_urls, urls_expire_at = await self.url_signer.sign_many_with_expiry_async(
+                settings.GCS_BUCKET_NAME, [blob_name for blob_name in image_blobs if blob_name]
+            )
+        except Exception as e:
+            logger.error(f"署名付きURLの生成中にエラー: {e}")
+            signed_urls, urls_expire_at = {}, 0.0
+        for archetype, blob_name in zip(entry["result"]["user_archetypes"], image_blobs):
+            archetype["imageUrl"] = signed_urls.get(blob_name)
+        entry["urls_expire_at"] = urls_expire_at
+
     async def analyze_needs_and_generate_images(self, product_category: str) -> Dict[str, Any]:
         """Orchestrates needs analysis and image generation."""
-        session_id = str(uuid.uuid4())
-        print(f"[メイン] セッションID: {session_id}")
+        cache_key = normalize_key(product_category)
+        entry = self.needs_cache.get(cache_key)
+        if entry is not None:
+            logger.info(f"[メイン] カテゴリ「{product_category}」の分析結果をキャッシュから返します。")
+            if entry["urls_expire_at"] - time.time() < settings.SIGNED_URL_REFRESH_MARGIN_SECONDS:
+                logger.info("[メイン] 署名付きURLの有効期限が近いため再発行します。")
+                await self._sign_archetype_images(entry)
+            return copy.deepcopy(entry["result"])
 
         try:
             analysis_result = await self._analyze_user_needs(product_category)
             
             archetypes = analysis_result.get("user_archetypes", [])
             if not archetypes:
-                print("分析の結果、ユーザータイプが見つかりませんでした。")
+                logger.info("分析の結果、ユーザータイプが見つかりませんでした。")
                 return analysis_result
 
-            print("\n[メイン] 各タイプのイメージ画像を並列で生成し、GCSにアップロードします...")
-            # To avoid 429 Resource Exhausted errors, limit concurrent requests to the image generation API.
-            sem = asyncio.Semaphore(3)
-
-            async def generate_with_semaphore(archetype, session_id):
-                async with sem:
-                    return await self._generate_image_async(archetype, session_id)
-
-            image_tasks = [generate_with_semaphore(archetype, session_id) for archetype in archetypes]
-            signed_urls = await asyncio.gather(*image_tasks)
+            logger.info("[メイン] 各タイプのイメージ画像を並列で生成し、GCSにアップロードします...")
+            # Concurrency against the image generation API is bounded process-wide by the "imagen" rate limiter.
+            image_prompts = await self._generate_image_prompts_batch_async(archetypes)
+            image_tasks = [
+                self._generate_image_async(archetype, image_prompt)
+                for archetype, image_prompt in zip(archetypes, image_prompts)
+            ]
+            image_blobs = await asyncio.gather(*image_tasks)
 
-            for i, archetype in enumerate(archetypes):
-                archetype["imageUrl"] = signed_urls[i]
+            entry = {"result": analysis_result, "image_blobs": image_blobs}
+            await self._sign_archetype_images(entry)
+            # Only cache complete results so a transient image failure is not pinned for the whole TTL.
+            if all(image_blobs):
+                self.needs_cache.set(cache_key, entry)
 
-            print("\n========================================")
-            print(f"🏆「{product_category}」の分析結果 🏆")
-            print("========================================")
-            print(json.dumps(analysis_result, indent=2, ensure_ascii=False))
-            return analysis_result
+            logger.info(f"[メイン] 「{product_category}」の分析が完了しました (タイプ: {len(analysis_result.get('user_archetypes', []))}件)")
+            log_payload(logger, f"🏆「{product_category}」の分析結果 🏆", analysis_result)
+            return copy.deepcopy(analysis_result)
 
         except Exception as e:
-            print(f"\n[メイン] エラーが発生しました: {e}")
+            logger.error(f"[メイン] エラーが発生しました: {e}")
             raise e
 
+    @traced("summary.view_counts")
     async def _get_video_view_counts_async(self, video_ids: list[str]) -> dict[str, int]:
         """YouTube Data APIを使って、複数の動画の再生数を一括で取得する"""
         if not self.youtube:
-            print("[警告] YouTubeクライアントが初期化されていません。再生数は0になります。")
+            logger.warning("[警告] YouTubeクライアントが初期化されていません。再生数は0になります。")
             return {video_id: 0 for video_id in video_ids}
 
         try:
-            def fetch_views():
-                request = self.youtube.videos().list(part="statistics", id=",".join(video_ids[:50]))
-                response = request.execute()
-                return {item['id']: int(item['statistics']['viewCount']) for item in response.get('items', [])}
-            
-            view_counts = await asyncio.to_thread(fetch_views)
-            print(f"[YouTube] 再生数を一括取得しました: {view_counts}")
+            view_counts = await self.youtube.get_view_counts(video_ids)
+            logger.info(f"[YouTube] 再生数を一括取得しました: {view_counts}")
             return view_counts
         except Exception as e:
-            print(f"[警告] YouTube APIからの再生数取得に失敗しました: {e}")
+            logger.warning(f"[警告] YouTube APIからの再生数取得に失敗しました: {e}")
             return {video_id: 0 for video_id in video_ids}
 
+    @staticmethod
+    def _video_id_from_url(youtube_link: str) -> str:
+        return youtube_link.split("v=")[-1].split("&")[0]
+
+    @traced("summary.video")
     async def _extract_product_info_from_video_async(self, youtube_link: str, limited_tags: List[str], keyword: str) -> tuple[str, dict]:
         """ワーカーエージェント: 動画から詳細な商品情報を抽出し、JSON形式で生成する"""
-        print(f"[ワーカー] {youtube_link} の商品分析を開始..." )
+        model_name = models.name("video_summary")
+        set_span_attributes(video_id=self._video_id_from_url(youtube_link), model=model_name)
+        cache_key = self.video_cache.make_key(
+            video_id=self._video_id_from_url(youtube_link),
+            keyword=keyword,
+            limited_tags=limited_tags,
+            start_offset=settings.VIDEO_ANALYSIS_START_OFFSET,
+            end_offset=settings.VIDEO_ANALYSIS_END_OFFSET,
+            model_name=model_name,
+        )
+        cached_summary = await self.video_cache.get(cache_key)
+        set_span_attributes(cached=cached_summary is not None)
+        if cached_summary is not None:
+            logger.info(f"[ワーカー] {youtube_link} の分析結果をキャッシュから返します。")
+            return youtube_link, cached_summary
+
+        logger.info(f"[ワーカー] {youtube_link} の商品分析を開始...")
         try:
-            model = GenerativeModel("gemini-2.0-flash")
+            model = models.get("video_summary")
             
             video_part_dict = {
                 "file_data": {
@@ -555,7 +742,7 @@ class AnalyzeNeedsService:
             if video_metadata:
                 video_part_dict["video_metadata"] = video_metadata
 
-            youtube_video = Part.from_dict(video_part_dict)
+            youtube_video = generative_models.Part.from_dict(video_part_dict)
 
             # specificationsのスキーマを動的に生成
             specifications_schema_parts = []
@@ -597,7 +784,7 @@ class AnalyzeNeedsService:
 }}
 """
             contents = [youtube_video, prompt]
-            response = await model.generate_content_async(contents)
+            response = await self._call_backend("gemini", lambda: model.generate_content_async(contents), model=model_name)
             
             if not response or not response.text:
                 raise ValueError("AIモデルから空の応答が返されました。セーフティ設定によるブロックの可能性があります。")
@@ -613,26 +800,29 @@ class AnalyzeNeedsService:
             try:
                 json_summary = json.loads(json_string)
             except json.JSONDecodeError:
-                print(f"[ワーカー] ERROR: JSONの解析に失敗しました。モデルの生レスポンス: '''{response_text}'''")
+                logger.error(f"[ワーカー] ERROR: JSONの解析に失敗しました。モデルの生レスポンス: '''{response_text}'''")
                 raise ValueError("モデルが有効なJSONを返しませんでした。")
 
-            print(f"[ワーカー] {youtube_link} の商品分析が完了しました。")
+            logger.info(f"[ワーカー] {youtube_link} の商品分析が完了しました。")
+            await self.video_cache.set(cache_key, json_summary)
             return youtube_link, json_summary
 
         except Exception as e:
             error_message = f"処理中に予期せぬ問題が発生しました: {e}"
-            print(f"[ワーカー] {youtube_link} の処理中にエラー: {e}")
+            logger.error(f"[ワーカー] {youtube_link} の処理中にエラー: {e}")
             return youtube_link, {"error": error_message}
 
+    @traced("summary.recommendation")
     async def _generate_final_recommendation_async(self, all_products: list) -> dict:
         """総括エージェント: 全ワーカーの結果を分析し、おすすめ商品のリストをJSONで返す"""
-        print("[総括エージェント] 全ワーカーの分析結果を評価し、おすすめ商品をランク付け中...")
+        set_span_attributes(model=models.name("recommendation"), products=len(all_products))
+        logger.info("[総括エージェント] 全ワーカーの分析結果を評価し、おすすめ商品をランク付け中...")
         try:
             if not all_products:
                 return {"error": "有効な分析結果がなかったため、おすすめ商品を決定できませんでした。"}
 
             results_json_string = json.dumps(all_products, indent=2, ensure_ascii=False)
-            model = GenerativeModel("gemini-2.5-flash-lite")
+            model = models.get("recommendation")
             prompt = f'''あなたは複数の商品情報リストを評価し、購入検討者に最適なおすすめを提案するチーフアナリストです。
 
 以下のJSONデータは、複数の動画から抽出された商品情報のリストです。各商品には、情報ソースとなった動画のURLリスト(`source_urls`)と、各動画の再生数リスト(`source_review_counts`)が含まれています。
@@ -672,7 +862,7 @@ class AnalyzeNeedsService:
 }}
 '''
 
-            response = await model.generate_content_async([prompt])
+            response = await self._call_backend("gemini", lambda: model.generate_content_async([prompt]), model=models.name("recommendation"))
             
             if not response or not response.text:
                 raise ValueError("総括AIモデルから空の応答が返されました。セーフティ設定によるブロックの可能性があります。")
@@ -683,70 +873,106 @@ class AnalyzeNeedsService:
                 response_text = match.group(1)
             
             final_json = json.loads(response_text)
-            print("[総括エージェント] 最終推薦リストの作成が完了しました。")
+            logger.info("[総括エージェント] 最終推薦リストの作成が完了しました。")
             return final_json
         except Exception as e:
             error_message = f"最終推薦文の作成中にエラーが発生しました: {e}"
-            print(f"[総括エージェント] エラー: {e}")
+            logger.error(f"[総括エージェント] エラー: {e}")
             return {"error": error_message}
 
     async def summarize_videos_and_recommend(self, youtube_urls: list[str], limited_tags: List[str], keyword: str) -> dict:
         """Orchestrates YouTube video summarization and recommendation."""
-        video_ids = [url.split("v=")[-1].split("&")[0] for url in youtube_urls]
+        final_recommendation: dict = {"recommended_products": []}
+        async for event, data in self._stream_video_summaries(youtube_urls, limited_tags, keyword):
+            if event in ("result", "error"):
+                final_recommendation = data
+        return final_recommendation
+
+    async def _stream_video_summaries(self, youtube_urls: list[str], limited_tags: List[str], keyword: str) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Summarizes the videos and yields ("video", ...) as each worker finishes,
+        followed by a single ("result", ...) or ("error", ...) event.
+        """
+        video_ids = [self._video_id_from_url(url) for url in youtube_urls]
         view_counts_map = await self._get_video_view_counts_async(video_ids)
 
-        print(f"[マネージャー] {len(youtube_urls)}件のURLの並列処理を開始します。")
-        tasks = [self._extract_product_info_from_video_async(url, limited_tags, keyword) for url in youtube_urls]
-        results = await asyncio.gather(*tasks)
+        logger.info(f"[マネージャー] {len(youtube_urls)}件のURLの並列処理を開始します。")
+        tasks = [
+            asyncio.create_task(self._extract_product_info_from_video_async(url, limited_tags, keyword))
+            for url in youtube_urls
+        ]
 
-        print("\n--- 各ワーカーの分析結果 ---")
         all_products_map = {}
-        for url, summary_json in results:
-            video_id = url.split("v=")[-1].split("&")[0]
-            view_count = view_counts_map.get(video_id, 0)
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                url, summary_json = await next_result
+                video_id = self._video_id_from_url(url)
+                view_count = view_counts_map.get(video_id, 0)
+
+                log_payload(logger, f"--- {url} (再生数: {view_count}) ---", summary_json)
+
+                if summary_json and "error" not in summary_json and "products" in summary_json:
+                    for product in summary_json["products"]:
+                        product_name = product.get("name")
+                        if not product_name:
+                            continue
+
+                        # Merge info if the same product is found in multiple videos
+                        if product_name not in all_products_map:
+                            # Sanitize product name to create a stable ID
+                            sanitized_name = re.sub(r'[^a-zA-Z0-9]+', '-', product_name).lower().strip('-')
+                            product["id"] = f"product-{sanitized_name}-{str(uuid.uuid4())[:8]}"
+                            product["source_urls"] = [url]
+                            product["source_review_counts"] = [view_count]
+                            all_products_map[product_name] = product
+                        else:
+                            all_products_map[product_name]["source_urls"].append(url)
+                            all_products_map[product_name]["source_review_counts"].append(view_count)
+
+                yield "video", {
+                    "url": url,
+                    "view_count": view_count,
+                    "products": summary_json.get("products", []) if summary_json else [],
+                    "error": summary_json.get("error") if summary_json else None,
+                }
+        finally:
+            # The consumer may stop early (e.g. the SSE client disconnected).
+            for task in tasks:
+                task.cancel()
 
-            print(f"\n--- {url} (再生数: {view_count}) ---")
-            print(json.dumps(summary_json, indent=2, ensure_ascii=False))
-            
-            if summary_json and "error" not in summary_json and "products" in summary_json:
-                for product in summary_json["products"]:
-                    product_name = product.get("name")
-                    if not product_name:
-                        continue
-
-                    # Merge info if the same product is found in multiple videos
-                    if product_name not in all_products_map:
-                        # Sanitize product name to create a stable ID
-                        sanitized_name = re.sub(r'[^a-zA-Z0-9]+', '-', product_name).lower().strip('-')
-                        product["id"] = f"product-{sanitized_name}-{str(uuid.uuid4())[:8]}"
-                        product["source_urls"] = [url]
-                        product["source_review_counts"] = [view_count]
-                        all_products_map[product_name] = product
-                    else:
-                        all_products_map[product_name]["source_urls"].append(url)
-                        all_products_map[product_name]["source_review_counts"].append(view_count)
-        
         all_products_list = list(all_products_map.values())
 
         if all_products_list:
             final_recommendation = await self._generate_final_recommendation_async(all_products_list)
-            print("\n========================================")
-            print("🏆 総括エージェントによる最終推薦リスト 🏆")
-            print("========================================")
-            print(json.dumps(final_recommendation, indent=2, ensure_ascii=False))
-            return final_recommendation
+            log_payload(logger, "🏆 総括エージェントによる最終推薦リスト 🏆", final_recommendation)
+            yield ("error" if "error" in final_recommendation else "result"), final_recommendation
         else:
-            print("\n分析できる商品情報がなかったため、最終推薦は行いませんでした。")
-            return {"recommended_products": []} # Return empty list if no products found
+            logger.info("分析できる商品情報がなかったため、最終推薦は行いませんでした。")
+            yield "result", {"recommended_products": []} # Return empty list if no products found
 
     async def search_youtube_reviews_and_summarize(self, keyword: str, tags: List[str]) -> dict:
         """Searches YouTube for review videos based on keyword and tags, then summarizes them."""
+        result: dict = {"error": "要約処理が完了しませんでした。"}
+        async for event, data in self.stream_youtube_reviews_and_summarize(keyword, tags):
+            if event in ("result", "error"):
+                result = data
+        return result
+
+    async def stream_youtube_reviews_and_summarize(self, keyword: str, tags: List[str]) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Streaming variant of search_youtube_reviews_and_summarize.
+
+        Yields (event, data) pairs per pipeline stage: "keyword", "videos",
+        one "video" per analyzed video as soon as it finishes, and finally
+        "result" (or "error").
+        """
         if not self.youtube:
-            return {"error": "YouTube APIクライアントが初期化されていません。YouTube検索を実行できません。"}
+            yield "error", {"error": "YouTube APIクライアントが初期化されていません。YouTube検索を実行できません。"}
+            return
 
         # AIエージェント: ユーザーが商品選びに重視しているポイントを抽出
         try:
-            model = GenerativeModel("gemini-2.5-flash-lite")
+            model = models.get("summary_keyword")
             
             # 1. keywordからYouTube検索に有効なワードを抽出
             keyword_extraction_prompt = f'''以下の文章から、YouTube検索に最も適した短いキーワード（2〜3語程度）を抽出してください。
@@ -756,12 +982,13 @@ class AnalyzeNeedsService:
 
             文章: "{keyword}"
             '''
-            keyword_response = await model.generate_content_async([keyword_extraction_prompt])
+            with span("summary.keyword", model=models.name("summary_keyword")):
+                keyword_response = await self._call_backend("gemini", lambda: model.generate_content_async([keyword_extraction_prompt]), model=models.name("summary_keyword"))
             if not keyword_response or not keyword_response.text:
                 raise ValueError("AIモデルからキーワード抽出の空の応答が返されました。")
             
             extracted_keyword = keyword_response.text.strip()
-            print(f"[AIエージェント] 抽出された検索キーワード: {extracted_keyword}")
+            logger.info(f"[AIエージェント] 抽出された検索キーワード: {extracted_keyword}")
 
             # 2. ユーザーが商品選びに重視しているポイントをタグから選択
             tag_selection_prompt = f'''以下のタグの中から、ユーザーが商品選びに最も重視していると思われるポイントを2つだけ選んで、カンマ区切りで出力してください。
@@ -769,7 +996,8 @@ class AnalyzeNeedsService:
 
             タグ: {', '.join(tags)}
             '''
-            tag_response = await model.generate_content_async([tag_selection_prompt])
+            with span("summary.tags", model=models.name("summary_keyword"), candidates=len(tags)):
+                tag_response = await self._call_backend("gemini", lambda: model.generate_content_async([tag_selection_prompt]), model=models.name("summary_keyword"))
             if not tag_response or not tag_response.text:
                 raise ValueError("AIモデルからタグ選択の空の応答が返されました。")
             
@@ -781,43 +1009,54 @@ class AnalyzeNeedsService:
             else:
                 limited_tags = selected_tags[:2] # 上位2つを使用
             
-            print(f"[AIエージェント] ユーザーが重視するポイント: {', '.join(limited_tags)}")
+            logger.info(f"[AIエージェント] ユーザーが重視するポイント: {', '.join(limited_tags)}")
 
         except Exception as e:
-            print(f"[AIエージェント] キーワード抽出または重視ポイントの抽出中にエラーが発生しました: {e}")
+            logger.error(f"[AIエージェント] キーワード抽出または重視ポイントの抽出中にエラーが発生しました: {e}")
             extracted_keyword = keyword # エラー時は元のキーワードを使用
             limited_tags = random.sample(tags, 2) if len(tags) > 2 else tags
 
+        yield "keyword", {"keyword": extracted_keyword, "tags": limited_tags}
+
         search_query = f"{extracted_keyword} {' '.join(limited_tags)} レビュー" # e.g., "ワイヤレスイヤホン ノイズキャンセリング デザイン性 価格 レビュー"
-        print(f"[YouTube検索] 検索クエリ: {search_query}")
+        logger.info(f"[YouTube検索] 検索クエリ: {search_query}")
 
         try:
-            search_response = await asyncio.to_thread(
-                self.youtube.search().list,
-                q=search_query,
-                part="id,snippet",
-                type="video",
-                maxResults=3, # Max 3 videos
-                regionCode="JP",
-                relevanceLanguage="ja"
-            )
-            response_data = search_response.execute()
+            with span("summary.youtube_search", query=search_query):
+                items = await self.youtube.search_videos(
+                    search_query,
+                    max_results=3, # Max 3 videos
+                    part="id,snippet",
+                )
+        except Exception as e:
+            logger.error(f"[YouTube検索] YouTube検索中にエラーが発生しました: {e}")
+            yield "error", {"error": f"YouTube検索中にエラーが発生しました: {e}"}
+            return
+
+        videos = [
+            {
+                "url": f"https://www.youtube.com/watch?v={item['id']['videoId']}",
+                "title": item.get("snippet", {}).get("title"),
+                "channelTitle": item.get("snippet", {}).get("channelTitle"),
+            }
+            for item in items
+        ]
+        youtube_urls = [video["url"] for video in videos]
 
-            youtube_urls = []
-            for item in response_data.get("items", []):
-                video_id = item["id"]["videoId"]
-                youtube_urls.append(f"https://www.youtube.com/watch?v={video_id}")
-            
-            if not youtube_urls:
-                print("[YouTube検索] 関連するYouTubeレビュー動画が見つかりませんでした。")
-                return {"error": "関連するYouTubeレビュー動画が見つかりませんでした。"}
+        if not youtube_urls:
+            logger.info("[YouTube検索] 関連するYouTubeレビュー動画が見つかりませんでした。")
+            yield "error", {"error": "関連するYouTubeレビュー動画が見つかりませんでした。"}
+            return
 
-            print(f"[YouTube検索] {len(youtube_urls)}件の動画が見つかりました。要約処理を開始します。")
-            return await self.summarize_videos_and_recommend(youtube_urls, limited_tags, keyword)
+        yield "videos", {"videos": videos}
 
+        logger.info(f"[YouTube検索] {len(youtube_urls)}件の動画が見つかりました。要約処理を開始します。")
+        try:
+            async for event, data in self._stream_video_summaries(youtube_urls, limited_tags, keyword):
+                yield event, data
         except Exception as e:
-            print(f"[YouTube検索] YouTube検索中にエラーが発生しました: {e}")
-            return {"error": f"YouTube検索中にエラーが発生しました: {e}"}
+            logger.error(f"[YouTube検索] 要約処理中にエラーが発生しました: {e}")
+            yield "error", {"error": f"要約処理中にエラーが発生しました: {e}"}
 
     _VEO_PROMPT_TEMPLATE = """[PRODUCT A]:< {product_a_summary} >
 [PRODUCT B]:< {product_b_summary} >
@@ -859,26 +1098,28 @@ class AnalyzeNeedsService:
         """
         Generates an optimized Veo3 prompt based on two product summaries.
         """
-        print("[VEOエージェント] 動画生成用のプロンプトを作成中...")
+        logger.info("[VEOエージェント] 動画生成用のプロンプトを作成中...")
         prompt = self._VEO_PROMPT_TEMPLATE.format(
             product_a_summary=product_a_summary,
             product_b_summary=product_b_summary
         )
-        print("[VEOエージェント] 動画生成用のプロンプトの作成が完了しました。")
+        logger.info("[VEOエージェント] 動画生成用のプロンプトの作成が完了しました。")
         return prompt.strip()
 
+    @traced("battle.video")
     async def _generate_video_async(self, prompt: str, session_id: str) -> dict:
         """Generates a video using Veo, polls for completion, and returns a signed URL."""
-        print(f"[動画生成エージェント] セッションID: {session_id} の動画生成を開始...")
+        logger.info(f"[動画生成エージェント] セッションID: {session_id} の動画生成を開始...")
         # --- Diagnostic Logging ---
         model_name_to_use = settings.VEO_MODEL_NAME
-        print(f"[動画生成エージェント] 使用する設定値:")
-        print(f"  - Project: {self.project_id}")
-        print(f"  - Location: {self.location}")
-        print(f"  - Model Name: {model_name_to_use}")
+        set_span_attributes(model=model_name_to_use, session_id=session_id)
+        logger.info(f"[動画生成エージェント] 使用する設定値:")
+        logger.info(f"  - Project: {self.project_id}")
+        logger.info(f"  - Location: {self.location}")
+        logger.info(f"  - Model Name: {model_name_to_use}")
         # -------------------------
         if not self.genai_client:
-            print("[動画生成エージェント] ERROR: genai.Clientが初期化されていません。動画生成を中止します。")
+            logger.error("[動画生成エージェント] ERROR: genai.Clientが初期化されていません。動画生成を中止します。")
             return {"status": "error", "message": "genai.Clientが初期化されていません。"}
 
         try:
@@ -886,10 +1127,11 @@ class AnalyzeNeedsService:
             current_date_str = datetime.now(timezone(timedelta(hours=+9))).strftime("%Y-%m-%d")
             gcs_blob_folder = f"{current_date_str}/{session_id}"
             output_gcs_folder_uri = f'gs://{settings.GCS_BUCKET_NAME}/{gcs_blob_folder}'
-            print(f'[{session_id}] Veo出力先: {output_gcs_folder_uri}')
+            logger.info(f'[{session_id}] Veo出力先: {output_gcs_folder_uri}')
 
-            # 2. Start the video generation operation
-            veo_operation = await asyncio.to_thread(
+            # 2. Start the video generation operation. Not retried: after a timeout the render may
+            #    have started, and a second submission would be a second billed render.
+            veo_operation = await self._call_backend("veo", lambda: asyncio.to_thread(
                 self.genai_client.models.generate_videos,
                 model=getattr(settings, 'VEO_MODEL_NAME', "veo-3.0-fast-generate-001"),
                 prompt=prompt,
@@ -898,18 +1140,14 @@ class AnalyzeNeedsService:
                     aspect_ratio='16:9',
                     output_gcs_uri=output_gcs_folder_uri,
                 ),
-            )
-            print(f'[{session_id}] Veo operation 開始: {veo_operation.name}')
+            ), model=model_name_to_use or "", retry=False)
+            logger.info(f'[{session_id}] Veo operation 開始: {veo_operation.name}')
 
-            # 3. Poll the operation for completion
-            while not veo_operation.done:
-                await asyncio.sleep(5) # Poll every 5 seconds
-                veo_operation = await asyncio.to_thread(
-                    self.genai_client.operations.get, veo_operation
-                )
-                print(f"[{session_id}] ポーリング中...完了ステータス: {veo_operation.done}")
+            # 3. Wait for completion; the shared poller checks all outstanding operations with adaptive backoff
+            with span("battle.video_render", operation=veo_operation.name):
+                veo_operation = await self.veo_poller.wait(veo_operation)
 
-            print(f'[{session_id}] Veo操作完了。ステータス: {veo_operation.done}')
+            logger.info(f'[{session_id}] Veo操作完了。ステータス: {veo_operation.done}')
 
             # 4. Process the result
             if veo_operation.error:
@@ -922,7 +1160,7 @@ class AnalyzeNeedsService:
             # 5. Get GCS URI from response and generate a signed URL
             generated_video_info = veo_operation.response.generated_videos[0]
             veo_provided_gcs_uri = generated_video_info.video.uri
-            print(f'[{session_id}] 動画オブジェクトを受信。Veo GCS URI: {veo_provided_gcs_uri}')
+            logger.info(f'[{session_id}] 動画オブジェクトを受信。Veo GCS URI: {veo_provided_gcs_uri}')
 
             parsed_uri = urlparse(veo_provided_gcs_uri)
             blob_name = parsed_uri.path.lstrip('/')
@@ -939,56 +1177,26 @@ class AnalyzeNeedsService:
             }
 
         except Exception as e:
-            print(f"[動画生成エージェント] 動画生成中にエラー: {e}")
+            logger.error(f"[動画生成エージェント] 動画生成中にエラー: {e}")
             return {"status": "error", "message": str(e), "gcs_signed_url": None}
 
     async def _generate_signed_url_async(self, blob_name: str, bucket_name: str) -> Optional[str]:
         """Generates a signed URL for a GCS blob, using impersonation if needed."""
         try:
-            blob = self.storage_client.bucket(bucket_name).blob(blob_name)
-            
-            # Determine credentials for signing
-            signing_creds = self.credentials
-
-            # If no file-based credentials are provided, use impersonation
-            if not signing_creds:
-                signer_email = settings.GCP_IAM_SERVICE_ACCOUNT_EMAIL
-                if not signer_email:
-                    raise ValueError(
-                        "GCP_IAM_SERVICE_ACCOUNT_EMAIL environment variable is not set. "
-                        "It is required for signing URLs in a Cloud Run environment."
-                    )
-                
-                print(f"署名にサービスアカウント'{signer_email}'の権限借用を使用します。")
-                # Get default credentials from the environment (the runtime service account)
-                default_creds, _ = default()
-                # Create impersonated credentials
-                signing_creds = impersonated_credentials.Credentials(
-                    source_credentials=default_creds,
-                    target_principal=signer_email,
-                    target_scopes=["https://www.googleapis.com/auth/iam"], # Scope for signing
-                )
-
-            signed_url = await asyncio.to_thread(
-                blob.generate_signed_url,
-                version="v4",
-                expiration=timedelta(hours=1),
-                method="GET",
-                credentials=signing_creds,
-            )
-            print(f"GCS URI gs://{bucket_name}/{blob_name} の署名付きURLを生成しました。")
+            signed_url = await self.url_signer.sign_async(bucket_name, blob_name)
+            logger.info(f"GCS URI gs://{bucket_name}/{blob_name} の署名付きURLを生成しました。")
             return signed_url
         except Exception as e:
-            print(f"署名付きURLの生成中にエラー: {e}")
+            logger.error(f"署名付きURLの生成中にエラー: {e}")
             return None
 
-    async def generate_product_battle(self, product_name_1: str, product_name_2: str) -> dict:
-        """Generates a mock product battle description."""
-        print(f"[対決エージェント] 「{product_name_1}」vs「{product_name_2}」の対決シナリオを生成中...")
-        battle_id = f"battle-{uuid.uuid4()}"
-        try:
-            model = GenerativeModel("gemini-2.5-flash")
-            prompt = f'''あなたは、2つの製品の擬人化キャラクターとして、互いの長所をアピールし合う対決形式のプレゼンテーションを行う脚本家です。
+    @traced("battle.descriptions")
+    async def _generate_battle_descriptions_async(self, product_name_1: str, product_name_2: str) -> dict:
+        """対決エージェント: 両製品が互いの強みを主張し合う説明文を生成する"""
+        logger.info(f"[対決エージェント] 「{product_name_1}」vs「{product_name_2}」の対決シナリオを生成中...")
+        set_span_attributes(model=models.name("battle"))
+        model = models.get("battle")
+        prompt = f'''あなたは、2つの製品の擬人化キャラクターとして、互いの長所をアピールし合う対決形式のプレゼンテーションを行う脚本家です。
 
 製品1: 「{product_name_1}」
 製品2: 「{product_name_2}」
@@ -1016,62 +1224,89 @@ class AnalyzeNeedsService:
 }}
 '''
 
-            response = await model.generate_content_async([prompt])
-            
-            if not response or not response.text:
-                raise ValueError("AIモデルから空の応答が返されました。")
+        response = await self._call_backend("gemini", lambda: model.generate_content_async([prompt]), model=models.name("battle"))
+        
+        if not response or not response.text:
+            raise ValueError("AIモデルから空の応答が返されました。")
 
-            response_text = response.text.strip()
-            json_string = response_text
+        response_text = response.text.strip()
+        json_string = response_text
 
-            match = re.search(r"```json\s*(\{.*\})\s*```", response_text, re.DOTALL)
-            if match:
-                json_string = match.group(1)
+        match = re.search(r"```json\s*(\{.*\})\s*```", response_text, re.DOTALL)
+        if match:
+            json_string = match.group(1)
 
-            try:
-                ai_response = json.loads(json_string)
-            except json.JSONDecodeError as e:
-                print(f"[対決エージェント] ERROR: JSONの解析に失敗しました。モデルの生レスポンス: '''{response_text}'''")
-                raise ValueError(f"モデルが有効なJSONを返しませんでした: {e}")
+        try:
+            ai_response = json.loads(json_string)
+        except json.JSONDecodeError as e:
+            logger.error(f"[対決エージェント] ERROR: JSONの解析に失敗しました。モデルの生レスポンス: '''{response_text}'''")
+            raise ValueError(f"モデルが有効なJSONを返しませんでした: {e}")
+        return ai_response
+
+    def _build_battle_response(self, battle_id: str, product_name_1: str, product_name_2: str, ai_response: dict) -> dict:
+        """Builds the battle payload (without the video) from the generated descriptions."""
+        product1_full_description = " ".join(ai_response.get("product1_description", []))
+        product2_full_description = " ".join(ai_response.get("product2_description", []))
+
+        # --- AI Agent 2: Video Prompt Generation ---
+        video_prompt = self._create_veo_prompt_for_battle(
+            product_a_summary=f"{product_name_1}: {product1_full_description}",
+            product_b_summary=f"{product_name_2}: {product2_full_description}"
+        )
 
-            # --- AI Agent 2: Video Prompt Generation ---
-            product1_full_description = " ".join(ai_response.get("product1_description", []))
-            product2_full_description = " ".join(ai_response.get("product2_description", []))
-            
-            video_prompt = self._create_veo_prompt_for_battle(
-                product_a_summary=f"{product_name_1}: {product1_full_description}",
-                product_b_summary=f"{product_name_2}: {product2_full_description}"
-            )
+        return {
+            "id": battle_id,
+            "product1_id": "dummy-prod-1",
+            "product1_name": product_name_1,
+            "product1_description": ai_response.get("product1_description", []),
+            "product2_id": "dummy-prod-2",
+            "product2_name": product_name_2,
+            "product2_description": ai_response.get("product2_description", []),
+            "video_prompt": video_prompt,
+            "video_url": None,
+        }
 
-            # --- AI Agent 3: Video Generation ---
-            video_generation_result = await self._generate_video_async(
-                prompt=video_prompt,
-                session_id=battle_id
-            )
+    async def start_product_battle(self, product_name_1: str, product_name_2: str, job_store: BattleJobStore) -> dict:
+        """
+        Generates the battle descriptions and returns immediately with a job in
+        `rendering` status. The Veo video renders in a background task that
+        updates the job in `job_store` when it finishes.
+        """
+        battle_id = f"battle-{uuid.uuid4()}"
+        try:
+            ai_response = await self._generate_battle_descriptions_async(product_name_1, product_name_2)
+        except Exception as e:
+            logger.error(f"[対決エージェント] 対決シナリオの生成中にエラー: {e}")
+            raise ValueError(f"対決シナリオの生成中にエラーが発生しました: {e}")
 
-            video_url = video_generation_result.get("gcs_signed_url")
-            # Use placeholder if generation fails
-            if video_generation_result.get("status") != "success" or not video_url:
-                video_url = ""
-
-            # Add static data and the new video prompt to the response
-            final_response = {
-                "id": battle_id,
-                "product1_id": "dummy-prod-1",
-                "product1_name": product_name_1,
-                "product1_description": ai_response.get("product1_description", []),
-                "product2_id": "dummy-prod-2",
-                "product2_name": product_name_2,
-                "product2_description": ai_response.get("product2_description", []),
-                "video_prompt": video_prompt,
-                "video_url": video_url,
-            }
-            print(f"[対決エージェント] 対決シナリオと動画の生成が完了しました。")
-            return final_response
+        job = self._build_battle_response(battle_id, product_name_1, product_name_2, ai_response)
+        job.update({"status": battle_jobs.RENDERING, "error": None})
+        await job_store.save(job)
 
+        task = asyncio.create_task(self._render_battle_video(battle_id, job["video_prompt"], job_store))
+        # Keep a reference so the task is not garbage collected, and so it can be cancelled on shutdown.
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        logger.info(f"[対決エージェント] 対決シナリオを生成しました。動画はバックグラウンドで生成します: {battle_id}")
+        return job
+
+    async def _render_battle_video(self, battle_id: str, video_prompt: str, job_store: BattleJobStore) -> None:
+        """Background task: renders the battle video and records the outcome on the job."""
+        try:
+            video_generation_result = await self._generate_video_async(prompt=video_prompt, session_id=battle_id)
+        except asyncio.CancelledError:
+            await job_store.update(battle_id, status=battle_jobs.FAILED, error="動画生成が中断されました。")
+            raise
         except Exception as e:
-            print(f"[対決エージェント] 対決シナリオの生成中にエラー: {e}")
-            raise ValueError(f"対決シナリオの生成中にエラーが発生しました: {e}")
+            video_generation_result = {"status": "error", "message": str(e)}
+
+        video_url = video_generation_result.get("gcs_signed_url")
+        if video_generation_result.get("status") == "success" and video_url:
+            await job_store.update(battle_id, status=battle_jobs.COMPLETED, video_url=video_url)
+            logger.info(f"[対決エージェント] {battle_id} の動画生成が完了しました。")
+        else:
+            await job_store.update(battle_id, status=battle_jobs.FAILED, error=video_generation_result.get("message"))
+            logger.warning(f"[対決エージェント] {battle_id} の動画生成に失敗しました。")
 
     async def recommend_products(
         self, 
@@ -1081,7 +1316,7 @@ class AnalyzeNeedsService:
         """Recommends products based on user preferences."""
         # This is a stub implementation.
         # Actual implementation will use a recommendation algorithm.
-        print(f"Recommending products based on: {user_preferences}")
+        logger.info(f"Recommending products based on: {user_preferences}")
         return product_catalog[:2] # Return first two products as a mock recommendation
 
 class MockAnalyzeNeedsService: 
@@ -1090,10 +1325,11 @@ class MockAnalyzeNeedsService:
     async def generate_chat_response(
         self, 
         message: str, 
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        conversation_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Generates a mock chat response."""
-        print(f"Mock chat response for message: {message}")
+        logger.info(f"Mock chat response for message: {message}")
         if "比較" in message:
             return {
                 "message": "承知いたしました。比較ページに移動します。",
@@ -1106,7 +1342,7 @@ class MockAnalyzeNeedsService:
 
     async def analyze_needs_and_generate_images(self, product_category: str) -> Dict[str, Any]:
         """Generates mock user archetypes with placeholder images."""
-        print(f"Mock analysis for product category: {product_category}")
+        logger.info(f"Mock analysis for product category: {product_category}")
         await asyncio.sleep(1)  # Simulate network delay
         return {
             "user_archetypes": [
@@ -1129,19 +1365,80 @@ class MockAnalyzeNeedsService:
             ]
         }
 
-def get_analyze_needs_service() -> AnalyzeNeedsService | MockAnalyzeNeedsService:
+_service_instance: AnalyzeNeedsService | MockAnalyzeNeedsService | None = None
+_service_lock = threading.Lock()
+
+
+def create_analyze_needs_service() -> AnalyzeNeedsService | MockAnalyzeNeedsService:
     """
-    Factory function to get the appropriate AnalyzeNeedsService instance
+    Builds the appropriate AnalyzeNeedsService instance
     based on the environment settings.
     """
-    if settings.ENVIRONMENT == "development":
-        print("Using MockAnalyzeNeedsService for development environment.")
+    # Replaying a cassette runs the real service offline, so it is available in development too.
+    if settings.ENVIRONMENT == "development" and settings.CASSETTE_MODE != cassette.REPLAY:
+        logger.info("Using MockAnalyzeNeedsService for development environment.")
         return MockAnalyzeNeedsService()
     
     # In a production environment, you would initialize the real service
     # with credentials and other necessary configurations.
-    print("Using real AnalyzeNeedsService.")
+    logger.info("Using real AnalyzeNeedsService.")
+    if cassette.start_cassette_from_settings():
+        # Model handles built before the cassette was installed would bypass it.
+        models.clear()
     return AnalyzeNeedsService(
         project_id=settings.GCP_PROJECT_ID,
         location=settings.VERTEX_AI_MODEL_REGION
     )
+
+
+def _get_or_create_service() -> AnalyzeNeedsService | MockAnalyzeNeedsService:
+    global _service_instance
+    if _service_instance is None:
+        # A request that arrives while the startup warm-up is still building the service waits for it
+        # instead of building a second one.
+        with _service_lock:
+            if _service_instance is None:
+                _service_instance = create_analyze_needs_service()
+    return _service_instance
+
+
+async def init_analyze_needs_service() -> AnalyzeNeedsService | MockAnalyzeNeedsService:
+    """
+    Creates the process-wide service instance. Started by the app lifespan as a
+    background warm-up, so the port opens before the Google SDKs are imported.
+    """
+    start = time.perf_counter()
+    try:
+        # SDK imports and client construction block (credentials, discovery), so keep them off the event loop.
+        service = await asyncio.to_thread(_get_or_create_service)
+    except Exception as e:
+        logger.error(f"[ウォームアップ] サービスの初期化に失敗しました。最初のリクエストで再試行します: {e}")
+        raise
+    logger.info(f"[ウォームアップ] サービスの初期化が完了しました ({time.perf_counter() - start:.2f}秒)")
+    if isinstance(service, AnalyzeNeedsService) and settings.MODEL_WARM_UP:
+        # Handles are built after vertexai.init (in the service constructor), which they read their project from.
+        await models.warm_up(send_requests=settings.MODEL_WARM_UP_REQUESTS)
+    return service
+
+
+async def close_analyze_needs_service() -> None:
+    """Closes the process-wide service instance. Called from the app lifespan on shutdown."""
+    global _service_instance
+    service, _service_instance = _service_instance, None
+    if isinstance(service, AnalyzeNeedsService):
+        await service.aclose()
+    if cassette.active_cassette():
+        cassette.stop_cassette()
+        models.clear()
+
+
+def get_analyze_needs_service() -> AnalyzeNeedsService | MockAnalyzeNeedsService:
+    """
+    Dependency that returns the process-wide service instance.
+
+    The instance is normally created by the startup warm-up; it is created lazily
+    here when the lifespan has not run (e.g. a TestClient used without `with`).
+    FastAPI runs this sync dependency on a worker thread, so waiting for an
+    unfinished warm-up does not block the event loop.
+    """
+    return _get_or_create_service()
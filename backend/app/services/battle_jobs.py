@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.config import settings
+
+# Job statuses
+RENDERING = "rendering"
+COMPLETED = "completed"
+FAILED = "failed"
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+
+
+class BattleJobStore:
+    """
+    Stores product battle jobs while their Veo video renders in the background.
+
+    Jobs are plain dicts shaped like ProductBattleResponse plus `status` and `error`.
+    Persistence is delegated to a CacheBackend ("memory", "sqlite" or "gcs"), so
+    the methods are async; in-process waiters are notified on every update so SSE
+    clients do not have to poll.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._updated: Dict[str, asyncio.Event] = {}
+
+    async def get(self, battle_id: str) -> Optional[Dict[str, Any]]:
+        return await self.backend.get_async(battle_id)
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        await self.backend.set_async(job["id"], job)
+        event = self._updated.pop(job["id"], None)
+        if event:
+            event.set()
+
+    async def update(self, battle_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        job = await self.get(battle_id)
+        if job is None:
+            return None
+        job.update(fields)
+        await self.save(job)
+        return job
+
+    async def wait_for_update(self, battle_id: str, timeout: float) -> None:
+        """Waits until the job is saved again, or the timeout elapses."""
+        event = self._updated.setdefault(battle_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+_store_instance: Optional[BattleJobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_battle_job_store() -> BattleJobStore:
+    """Dependency that returns the process-wide battle job store."""
+    global _store_instance
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                _store_instance = BattleJobStore(
+                    create_cache_backend(
+                        settings.BATTLE_JOB_STORE_BACKEND,
+                        namespace="battle_jobs",
+                        ttl_seconds=settings.BATTLE_JOB_TTL_SECONDS,
+                        max_bytes=settings.BATTLE_JOB_STORE_MAX_BYTES,
+                    )
+                )
+    return _store_instance
+
+
+def close_battle_job_store() -> None:
+    global _store_instance
+    with _store_lock:
+        store, _store_instance = _store_instance, None
+    if store:
+        store.close()
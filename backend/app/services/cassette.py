@@ -0,0 +1,744 @@
+"""
+Record/replay of the external calls made by AnalyzeNeedsService.
+
+In "record" mode every call to Gemini, Imagen, Veo, the YouTube Data API and
+GCS is passed through to the real SDK and written to a cassette together with
+its response (or error) and how long it took. In "replay" mode the same calls
+are answered from the cassette, after the recorded time, without importing
+the SDKs or touching the network. This gives prompt and pipeline changes a
+deterministic input to be benchmarked against.
+
+The cassette is a gzip-compressed JSON Lines file: a header, then one line per
+interaction and one per distinct binary payload (Imagen images), which the
+interactions reference by SHA-256.
+
+Requests are matched by a fingerprint of their arguments, with values that
+change on every run (UUIDs, generated product ids) masked. A request that does
+not match exactly is matched ignoring the order of its lines (prompts embed
+results in completion order), and failing that falls back to the oldest
+unused recording of the same call and prompt template.
+
+The cassette is installed by overriding the lazily imported SDK modules (see
+app.core.lazy.override_module), so the service code is the same in every mode.
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Mapping, Sequence
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.lazy import override_module, resolve_module
+
+logger = logging.getLogger(__name__)
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+_FORMAT_VERSION = 1
+
+# Values that differ between a recording and its replay; masked before fingerprinting.
+_VOLATILE_PATTERNS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"(product-[a-z0-9-]*-)[0-9a-f]{8}(?![a-z0-9-])"), r"\1<id>"),
+    (re.compile(r" at 0x[0-9a-f]+"), ""),
+]
+# How much of the first line of a request's text identifies its prompt template.
+_GROUP_PREFIX_CHARS = 100
+# Replay matching steps, from the most to the least exact: (count name, fingerprint field).
+_MATCH_ORDER = (("replayed", "key"), ("reordered", "unordered"), ("fallbacks", "group"))
+
+
+class _Fingerprint(NamedTuple):
+    """How a request is matched on replay: exactly, ignoring line order, or by prompt template."""
+    key: str
+    unordered: str
+    group: str
+    label: str
+
+
+class CassetteMiss(LookupError):
+    """A replayed request has no recording."""
+
+
+class ReplayedError(Exception):
+    """An error recorded from a backend, raised again on replay. `code` is its HTTP status, if any."""
+
+    def __init__(self, message: str, code: Optional[int] = None, error_type: str = ""):
+        super().__init__(message)
+        self.code = code
+        self.error_type = error_type
+
+
+def _plain(value: Any) -> Any:
+    """Converts SDK values (proto maps and lists, tagged Parts, bytes) to JSON-compatible ones."""
+    if isinstance(value, _Tagged):
+        return _plain(value.source)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, bytes):
+        return {"$sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, Mapping):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, Sequence):
+        return [_plain(v) for v in value]
+    return repr(value)
+
+
+def _mask(text: str) -> str:
+    for pattern, replacement in _VOLATILE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def _first_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, Mapping):
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            text = _first_text(item)
+            if text:
+                return text
+    return ""
+
+
+def _error_status(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    return status if isinstance(status, int) else None
+
+
+class Cassette:
+    """One cassette file, open for recording or loaded for replay."""
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._file = None
+        self._blobs: Dict[str, bytes] = {}
+        self._written_blobs: set = set()
+        # Unused recordings by each fingerprint field; an entry is in all three and marked "used" once taken.
+        self._indexes: Dict[str, Dict[str, Deque[dict]]] = {
+            field: defaultdict(deque) for _, field in _MATCH_ORDER
+        }
+        self._last_by_key: Dict[str, dict] = {}
+        # Veo: when each operation started, to replay its states at their recorded offsets.
+        self._operation_starts: Dict[str, float] = {}
+        if mode == RECORD:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({"version": _FORMAT_VERSION, "recorded_at": time.time()})
+        else:
+            self._load()
+
+    # --- file format ---
+
+    def _write(self, line: dict) -> None:
+        self._file.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported cassette version in {self.path}: {header.get('version')}")
+            for line in f:
+                entry = json.loads(line)
+                if "blob" in entry:
+                    self._blobs[entry["blob"]] = base64.b64decode(entry["data"])
+                    continue
+                for _, field in _MATCH_ORDER:
+                    self._indexes[field][entry[field]].append(entry)
+        logger.info(
+            f"[カセット] {self.path} を読み込みました "
+            f"(リクエスト: {sum(len(q) for q in self._indexes['key'].values())}件, バイナリ: {len(self._blobs)}件)"
+        )
+
+    def store_bytes(self, data: bytes) -> dict:
+        """Writes `data` once per distinct content and returns a reference to it."""
+        sha = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if sha not in self._written_blobs:
+                self._written_blobs.add(sha)
+                self._write({"blob": sha, "data": base64.b64encode(data).decode("ascii")})
+        return {"$blob": sha}
+
+    def load_bytes(self, ref: dict) -> bytes:
+        return self._blobs[ref["$blob"]]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        logger.info(f"[カセット] {self.mode}: {dict(self.counts)} ({self.path})")
+
+    # --- matching ---
+
+    @staticmethod
+    def _identify(backend: str, op: str, request: Any) -> "_Fingerprint":
+        plain = _plain(request)
+        canonical = _mask(f"{backend}:{op}:" + json.dumps(plain, sort_keys=True, ensure_ascii=False))
+        model = ""
+        if isinstance(plain, dict):
+            model = plain.get("model", "")
+            plain = {k: v for k, v in plain.items() if k not in ("model", "options")}
+        text = _mask(_first_text(plain)).strip()
+        return _Fingerprint(
+            key=_digest(canonical),
+            # Lines of a prompt, JSON-escaped; the same lines in another order (e.g. results in completion order).
+            unordered=_digest("\n".join(sorted(canonical.split("\\n")))),
+            group=_digest(f"{backend}:{op}:{model}:{text.splitlines()[0][:_GROUP_PREFIX_CHARS] if text else ''}"),
+            label=" ".join(text.split())[:60],
+        )
+
+    def _take(self, backend: str, op: str, request: Any) -> dict:
+        fingerprint = self._identify(backend, op, request)
+        with self._lock:
+            for outcome, field in _MATCH_ORDER:
+                queue = self._indexes[field][getattr(fingerprint, field)]
+                while queue and queue[0].get("used"):
+                    queue.popleft()
+                if queue:
+                    entry = queue.popleft()
+                    entry["used"] = True
+                    self._last_by_key[entry["key"]] = entry
+                    self.counts[outcome] += 1
+                    if outcome == "fallbacks":
+                        logger.debug(f"[カセット] 同じ種類のリクエストの記録で代用します: {backend} {op} {fingerprint.label!r}")
+                    return entry
+                if outcome == "replayed" and fingerprint.key in self._last_by_key:
+                    # The same request again (e.g. a retry after a cache miss): answer it like last time.
+                    self.counts["repeated"] += 1
+                    return self._last_by_key[fingerprint.key]
+            self.counts["misses"] += 1
+        logger.warning(f"[カセット] 記録にないリクエストです: {backend} {op} {fingerprint.label!r}")
+        raise CassetteMiss(f"No recording for {backend} {op} {fingerprint.label!r}")
+
+    def _record(self, backend: str, op: str, request: Any, elapsed: float, **fields: Any) -> None:
+        line = {"backend": backend, "op": op, **self._identify(backend, op, request)._asdict(),
+                "elapsed": round(elapsed, 4), **fields}
+        with self._lock:
+            if self._file is not None:
+                self._write(line)
+                self.counts["recorded"] += 1
+
+    @staticmethod
+    def _encode_error(exc: BaseException) -> dict:
+        return {"type": type(exc).__name__, "message": str(exc)[:1000], "code": _error_status(exc)}
+
+    @staticmethod
+    def _raise(entry: dict) -> None:
+        error = entry.get("error")
+        if error:
+            raise ReplayedError(error["message"], code=error.get("code"), error_type=error.get("type", ""))
+
+    # --- calls ---
+
+    def _call_recorded(self, backend: str, op: str, request: Any, fn: Callable[[], Any],
+                       encode: Callable[[Any], Any], **fields: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self._record(backend, op, request, time.perf_counter() - start, error=self._encode_error(e), **fields)
+            raise
+        self._record(backend, op, request, time.perf_counter() - start, result=encode(result), **fields)
+        return result
+
+    def call(self, backend: str, op: str, request: Any, fn: Callable[[], Any],
+             encode: Callable[[Any], Any], decode: Callable[[Any], Any]) -> Any:
+        """Runs a blocking call: records `fn()`, or replays it (sleeping for the recorded time)."""
+        if self.mode == REPLAY:
+            entry = self._take(backend, op, request)
+            time.sleep(entry["elapsed"] * self.latency_scale)
+            self._raise(entry)
+            return decode(entry["result"])
+        return self._call_recorded(backend, op, request, fn, encode)
+
+    async def call_async(self, backend: str, op: str, request: Any, fn: Callable[[], Awaitable[Any]],
+                         encode: Callable[[Any], Any], decode: Callable[[Any], Any]) -> Any:
+        """Coroutine counterpart of call()."""
+        if self.mode == REPLAY:
+            entry = self._take(backend, op, request)
+            await asyncio.sleep(entry["elapsed"] * self.latency_scale)
+            self._raise(entry)
+            return decode(entry["result"])
+        start = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record(backend, op, request, time.perf_counter() - start, error=self._encode_error(e))
+            raise
+        self._record(backend, op, request, time.perf_counter() - start, result=encode(result))
+        return result
+
+    def operation_started(self, name: str) -> None:
+        self._operation_starts[name] = time.monotonic()
+
+    def operation_state(self, name: str, fn: Callable[[], Any],
+                        encode: Callable[[Any], Any], decode: Callable[[Any], Any]) -> Any:
+        """
+        Polls a long-running operation. Records each state with its offset from
+        the operation's start; replay returns the latest state recorded at or
+        before the same offset, so an operation completes after its recorded time.
+        """
+        started = self._operation_starts.get(name, time.monotonic())
+        request = {"operation": name}
+        if self.mode == RECORD:
+            since = round(time.monotonic() - started, 3)
+            return self._call_recorded("veo", "operations.get", request, fn, encode, since=since)
+        key = self._identify("veo", "operations.get", request).key
+        with self._lock:
+            states = sorted(self._indexes["key"].get(key, ()), key=lambda entry: entry["since"])
+        if not states:
+            self.counts["misses"] += 1
+            raise CassetteMiss(f"No recording for operation {name}")
+        elapsed = time.monotonic() - started
+        state = states[0]
+        for candidate in states:
+            if candidate["since"] * self.latency_scale <= elapsed:
+                state = candidate
+        self.counts["replayed"] += 1
+        time.sleep(state["elapsed"] * self.latency_scale)
+        self._raise(state)
+        return decode(state["result"])
+
+
+class _Tagged:
+    """An SDK value built from plain data; the data is what gets fingerprinted."""
+
+    def __init__(self, source: Any, value: Any):
+        self.source = source
+        self.value = value
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _Tagged):
+        return value.value
+    if isinstance(value, list):
+        return [_unwrap(v) for v in value]
+    return value
+
+
+# --- Gemini (vertexai.generative_models) ---
+
+def _encode_gemini(response: Any) -> dict:
+    parts = []
+    for part in response.candidates[0].content.parts:
+        function_call = getattr(part, "function_call", None)
+        if function_call and function_call.name:
+            parts.append({"function_call": {"name": function_call.name, "args": _plain(function_call.args)}})
+        else:
+            parts.append({"text": getattr(part, "text", "")})
+    return {"parts": parts}
+
+
+def _decode_gemini(data: dict) -> Any:
+    parts = []
+    for part in data["parts"]:
+        call = part.get("function_call")
+        function_call = SimpleNamespace(name=call["name"], args=call["args"]) if call else None
+        parts.append(SimpleNamespace(text=part.get("text", ""), function_call=function_call))
+    text = "".join(part.text for part in parts)
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))])
+
+
+class _GenerativeModel:
+    def __init__(self, cassette: Cassette, upstream: Any, model_name: str, **kwargs: Any):
+        self._cassette = cassette
+        self._model = model_name
+        # Tools are SDK objects; the fingerprint keeps only the plain options (generation_config, system_instruction).
+        self._options = {k: _plain(v) for k, v in kwargs.items() if k != "tools"}
+        self._inner = upstream.GenerativeModel(model_name, **kwargs) if upstream else None
+
+    async def generate_content_async(self, contents: Any, **kwargs: Any) -> Any:
+        request = {"model": self._model, "options": self._options, "contents": contents, **kwargs}
+        return await self._cassette.call_async(
+            "gemini", "generate_content", request,
+            lambda: self._inner.generate_content_async(_unwrap(contents), **kwargs),
+            _encode_gemini, _decode_gemini,
+        )
+
+    def start_chat(self, **kwargs: Any) -> "_ChatSession":
+        history = kwargs.get("history") or []
+        inner = self._inner.start_chat(**{**kwargs, "history": _unwrap(history)}) if self._inner else None
+        return _ChatSession(self._cassette, self._model, self._options, inner, [_plain(m) for m in history])
+
+
+class _ChatSession:
+    def __init__(self, cassette: Cassette, model: str, options: dict, inner: Any, history: List[Any]):
+        self._cassette = cassette
+        self._model = model
+        self._options = options
+        self._inner = inner
+        self._sent: List[Any] = history
+
+    async def send_message_async(self, message: Any, **kwargs: Any) -> Any:
+        request = {"model": self._model, "options": self._options, "history": list(self._sent), "message": message}
+        self._sent.append(_plain(message))
+        return await self._cassette.call_async(
+            "gemini", "chat.send_message", request,
+            lambda: self._inner.send_message_async(_unwrap(message), **kwargs),
+            _encode_gemini, _decode_gemini,
+        )
+
+
+class _Part:
+    def __init__(self, upstream: Any):
+        self._upstream = upstream
+
+    def from_dict(self, data: dict) -> _Tagged:
+        return _Tagged(data, self._upstream.Part.from_dict(data) if self._upstream else data)
+
+    def from_text(self, text: str) -> _Tagged:
+        return _Tagged({"text": text}, self._upstream.Part.from_text(text) if self._upstream else text)
+
+    def from_function_response(self, name: str, response: Any) -> _Tagged:
+        source = {"function_response": {"name": name, "response": response}}
+        value = self._upstream.Part.from_function_response(name=name, response=response) if self._upstream else source
+        return _Tagged(source, value)
+
+
+class _GenerativeModelsModule:
+    """Stands in for vertexai.generative_models."""
+
+    def __init__(self, cassette: Cassette, upstream: Any):
+        self._cassette = cassette
+        self._upstream = upstream
+        self.Part = _Part(upstream)
+
+    def GenerativeModel(self, model_name: str, **kwargs: Any) -> _GenerativeModel:
+        return _GenerativeModel(self._cassette, self._upstream, model_name, **kwargs)
+
+    def Content(self, role: str, parts: List[Any]) -> _Tagged:
+        source = {"role": role, "parts": [_plain(part) for part in parts]}
+        return _Tagged(source, self._upstream.Content(role=role, parts=_unwrap(parts)) if self._upstream else source)
+
+    def __getattr__(self, attr: str) -> Any:
+        # Tool, FunctionDeclaration, ...: only configuration, nothing to record.
+        if self._upstream is not None:
+            return getattr(self._upstream, attr)
+        return lambda *args, **kwargs: SimpleNamespace(args=args, **kwargs)
+
+
+# --- Imagen (vertexai.preview.vision_models) ---
+
+class _ImageGenerationModel:
+    def __init__(self, cassette: Cassette, model_name: str, inner: Any):
+        self._cassette = cassette
+        self._model = model_name
+        self._inner = inner
+
+    def generate_images(self, prompt: str, number_of_images: int = 1, **kwargs: Any) -> Any:
+        cassette = self._cassette
+        return cassette.call(
+            "imagen", "generate_images",
+            {"model": self._model, "prompt": prompt, "number_of_images": number_of_images, **kwargs},
+            lambda: self._inner.generate_images(prompt=prompt, number_of_images=number_of_images, **kwargs),
+            lambda response: {"images": [cassette.store_bytes(image._image_bytes) for image in response.images]},
+            lambda data: SimpleNamespace(images=[
+                SimpleNamespace(_image_bytes=cassette.load_bytes(ref)) for ref in data["images"]
+            ]),
+        )
+
+
+class _ImageGenerationModelLoader:
+    def __init__(self, cassette: Cassette, upstream: Any):
+        self._cassette = cassette
+        self._upstream = upstream
+
+    def from_pretrained(self, model_name: str) -> _ImageGenerationModel:
+        inner = self._upstream.ImageGenerationModel.from_pretrained(model_name) if self._upstream else None
+        return _ImageGenerationModel(self._cassette, model_name, inner)
+
+
+class _VisionModelsModule:
+    """Stands in for vertexai.preview.vision_models."""
+
+    def __init__(self, cassette: Cassette, upstream: Any):
+        self.ImageGenerationModel = _ImageGenerationModelLoader(cassette, upstream)
+
+
+# --- GCS (google.cloud.storage) ---
+
+class _Blob:
+    def __init__(self, cassette: Cassette, inner: Any, bucket: str, name: str):
+        self._cassette = cassette
+        self._inner = inner
+        self._request = {"bucket": bucket, "blob": name}
+
+    def _call(self, op: str, fn: Callable[[], Any], **request: Any) -> Any:
+        return self._cassette.call("gcs", op, {**self._request, **request}, fn, lambda r: r, lambda r: r)
+
+    def exists(self, **kwargs: Any) -> bool:
+        return self._call("blob.exists", lambda: self._inner.exists(**kwargs))
+
+    def upload_from_string(self, data: Any, content_type: str = "text/plain", **kwargs: Any) -> None:
+        self._call("blob.upload", lambda: self._inner.upload_from_string(data, content_type=content_type, **kwargs))
+
+    def generate_signed_url(self, **kwargs: Any) -> str:
+        return self._call(
+            "blob.sign", lambda: self._inner.generate_signed_url(**kwargs),
+            method=kwargs.get("method"), version=kwargs.get("version"),
+        )
+
+
+class _Bucket:
+    def __init__(self, cassette: Cassette, inner: Any, name: str):
+        self._cassette = cassette
+        self._inner = inner
+        self.name = name
+
+    def blob(self, blob_name: str) -> _Blob:
+        return _Blob(self._cassette, self._inner.blob(blob_name) if self._inner else None, self.name, blob_name)
+
+
+class _StorageClient:
+    def __init__(self, cassette: Cassette, inner: Any):
+        self._cassette = cassette
+        self._inner = inner
+
+    def bucket(self, name: str) -> _Bucket:
+        return _Bucket(self._cassette, self._inner.bucket(name) if self._inner else None, name)
+
+    def close(self) -> None:
+        if self._inner is not None:
+            self._inner.close()
+
+
+class _StorageModule:
+    """Stands in for google.cloud.storage."""
+
+    def __init__(self, cassette: Cassette, upstream: Any):
+        self._cassette = cassette
+        self._upstream = upstream
+
+    def Client(self, *args: Any, **kwargs: Any) -> _StorageClient:
+        return _StorageClient(self._cassette, self._upstream.Client(*args, **kwargs) if self._upstream else None)
+
+
+# --- Veo (google.genai) ---
+
+def _encode_operation(operation: Any) -> dict:
+    error = getattr(operation, "error", None)
+    videos = []
+    response = getattr(operation, "response", None)
+    if operation.done and response is not None:
+        videos = [generated.video.uri for generated in (response.generated_videos or [])]
+    return {
+        "name": operation.name,
+        "done": bool(operation.done),
+        "error": getattr(error, "message", str(error)) if error else None,
+        "videos": videos,
+    }
+
+
+def _decode_operation(data: dict) -> Any:
+    response = None
+    if data["done"]:
+        response = SimpleNamespace(generated_videos=[
+            SimpleNamespace(video=SimpleNamespace(uri=uri)) for uri in data["videos"]
+        ])
+    error = SimpleNamespace(message=data["error"]) if data["error"] else None
+    return SimpleNamespace(name=data["name"], done=data["done"], error=error, response=response)
+
+
+class _GenaiModels:
+    def __init__(self, cassette: Cassette, inner: Any):
+        self._cassette = cassette
+        self._inner = inner
+
+    def generate_videos(self, model: str, prompt: str, config: Any = None, **kwargs: Any) -> Any:
+        # The output path contains the date and a session id; the model and prompt identify the request.
+        operation = self._cassette.call(
+            "veo", "generate_videos", {"model": model, "prompt": prompt},
+            lambda: self._inner.generate_videos(model=model, prompt=prompt, config=config, **kwargs),
+            _encode_operation, _decode_operation,
+        )
+        self._cassette.operation_started(operation.name)
+        return operation
+
+
+class _GenaiOperations:
+    def __init__(self, cassette: Cassette, inner: Any):
+        self._cassette = cassette
+        self._inner = inner
+
+    def get(self, operation: Any, **kwargs: Any) -> Any:
+        return self._cassette.operation_state(
+            operation.name, lambda: self._inner.get(operation, **kwargs), _encode_operation, _decode_operation
+        )
+
+
+class _GenaiClient:
+    def __init__(self, cassette: Cassette, inner: Any):
+        self._inner = inner
+        self.models = _GenaiModels(cassette, inner.models if inner else None)
+        self.operations = _GenaiOperations(cassette, inner.operations if inner else None)
+
+    def close(self) -> None:
+        if self._inner is not None:
+            self._inner.close()
+
+
+class _GenaiModule:
+    """Stands in for google.genai."""
+
+    def __init__(self, cassette: Cassette, upstream: Any):
+        self._cassette = cassette
+        self._upstream = upstream
+
+    def Client(self, **kwargs: Any) -> _GenaiClient:
+        return _GenaiClient(self._cassette, self._upstream.Client(**kwargs) if self._upstream else None)
+
+
+# --- YouTube Data API (googleapiclient.discovery) ---
+
+class _YouTubeRequest:
+    def __init__(self, cassette: Cassette, op: str, params: dict, inner: Any):
+        self._cassette = cassette
+        self._op = op
+        self._params = params
+        self._inner = inner
+
+    def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._cassette.call(
+            "youtube", self._op, self._params, lambda: self._inner.execute(**kwargs), lambda r: r, lambda r: r
+        )
+
+
+class _YouTubeResource:
+    def __init__(self, cassette: Cassette, name: str, inner: Any):
+        self._cassette = cassette
+        self._name = name
+        self._inner = inner
+
+    def __getattr__(self, method: str) -> Callable[..., _YouTubeRequest]:
+        def build_request(**params: Any) -> _YouTubeRequest:
+            inner = getattr(self._inner, method)(**params) if self._inner else None
+            return _YouTubeRequest(self._cassette, f"{self._name}.{method}", params, inner)
+        return build_request
+
+
+class _YouTubeClient:
+    def __init__(self, cassette: Cassette, inner: Any):
+        self._cassette = cassette
+        self._inner = inner
+
+    def __getattr__(self, resource: str) -> Callable[[], _YouTubeResource]:
+        return lambda: _YouTubeResource(
+            self._cassette, resource, getattr(self._inner, resource)() if self._inner else None
+        )
+
+    def close(self) -> None:
+        if self._inner is not None:
+            self._inner.close()
+
+
+class _DiscoveryModule:
+    """Stands in for googleapiclient.discovery."""
+
+    def __init__(self, cassette: Cassette, upstream: Any):
+        self._cassette = cassette
+        self._upstream = upstream
+
+    def build(self, *args: Any, **kwargs: Any) -> _YouTubeClient:
+        return _YouTubeClient(self._cassette, self._upstream.build(*args, **kwargs) if self._upstream else None)
+
+
+# --- Replay-only stand-ins: no project, credentials or network ---
+
+class _ReplayCredentials:
+    token = "replay"
+    expiry = None
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._source_credentials = self
+
+    def refresh(self, request: Any) -> None:
+        pass
+
+
+_RECORDED_MODULES = {
+    "vertexai.generative_models": _GenerativeModelsModule,
+    "vertexai.preview.vision_models": _VisionModelsModule,
+    "google.cloud.storage": _StorageModule,
+    "google.genai": _GenaiModule,
+    "googleapiclient.discovery": _DiscoveryModule,
+}
+
+_REPLAY_ONLY_MODULES = {
+    "vertexai": SimpleNamespace(init=lambda **kwargs: None),
+    "google.genai.types": SimpleNamespace(GenerateVideosConfig=lambda **kwargs: SimpleNamespace(**kwargs)),
+    "google.auth": SimpleNamespace(default=lambda *args, **kwargs: (_ReplayCredentials(), None)),
+    "google.auth.impersonated_credentials": SimpleNamespace(Credentials=_ReplayCredentials),
+    "google.auth.transport.requests": SimpleNamespace(Request=lambda *args, **kwargs: None),
+}
+
+_active: Optional[Cassette] = None
+_saved_overrides: Dict[str, Any] = {}
+
+
+def start_cassette(mode: str, path: str, latency_scale: float = 1.0) -> Cassette:
+    """Opens a cassette and routes the SDK modules through it until stop_cassette()."""
+    global _active
+    stop_cassette()
+    cassette = Cassette(path, mode, latency_scale=latency_scale)
+    for name, standin in _RECORDED_MODULES.items():
+        # Recording wraps whatever the module currently resolves to (the real SDK, or a fake in benchmarks).
+        upstream = resolve_module(name) if mode == RECORD else None
+        _saved_overrides[name] = override_module(name, standin(cassette, upstream))
+    if mode == REPLAY:
+        for name, standin in _REPLAY_ONLY_MODULES.items():
+            _saved_overrides[name] = override_module(name, standin)
+    _active = cassette
+    logger.info(f"[カセット] {mode} を開始しました: {path}")
+    return cassette
+
+
+def start_cassette_from_settings() -> Optional[Cassette]:
+    if settings.CASSETTE_MODE == OFF:
+        return None
+    return start_cassette(settings.CASSETTE_MODE, settings.CASSETTE_PATH, settings.CASSETTE_REPLAY_LATENCY_SCALE)
+
+
+def stop_cassette() -> None:
+    """Closes the active cassette, if any, and restores the SDK modules."""
+    global _active
+    cassette, _active = _active, None
+    if cassette is None:
+        return
+    for name, previous in _saved_overrides.items():
+        override_module(name, previous)
+    _saved_overrides.clear()
+    cassette.close()
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
@@ -0,0 +1,285 @@
+import base64
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http_cache import SerializedResponse, serialize_json
+from app.schemas.product import Product, ProductType
+from app.services.search_index import FIELD_WEIGHTS, NgramSearchIndex, normalize_search_text
+
+
+def encode_cursor(ordinal: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{ordinal}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Returns the ordinal encoded in a cursor; raises ValueError if the cursor is malformed."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    prefix, _, ordinal = decoded.partition(":")
+    if prefix != "o" or not ordinal.isdigit():
+        raise ValueError("Invalid cursor")
+    return int(ordinal)
+
+
+class ProductCatalog:
+    """
+    In-memory product catalog indexed at load time.
+
+    Lookups by id, category and tag are dict lookups, price and rating ranges are
+    answered by bisecting value-sorted indexes, and search goes through an
+    n-gram inverted index over names, descriptions, tags and specifications
+    instead of scanning every product; ranked results of recent queries are cached
+    per catalog version. `upsert` and `remove` keep the indexes up to date incrementally;
+    `version` increases on every change so that derived data can be invalidated.
+
+    Every product gets an increasing ordinal when it is first added; listings are
+    ordered by it, so a cursor (the last ordinal returned) stays valid while
+    products are added, updated or removed.
+
+    Responses built from the catalog can be cached as bytes with `serialized()`;
+    the cache is keyed by version, so a change invalidates them all at once.
+    """
+
+    # Numeric fields with a value-sorted index for range filters.
+    RANGE_FIELDS = ("price", "rating")
+
+    def __init__(self, products: Iterable[Product] = (), product_types: Iterable[ProductType] = ()):
+        self._lock = threading.Lock()
+        self._product_types: List[ProductType] = list(product_types)
+        self._by_id: Dict[str, Product] = {}
+        self._by_category: Dict[str, Dict[str, Product]] = {}
+        self._by_tag: Dict[str, Dict[str, Product]] = {}
+        self._ordinals: Dict[str, int] = {}
+        self._next_ordinal = 0
+        self._search_index = NgramSearchIndex()
+        self._search_results = TTLCache(max_bytes=1024 * 1024, ttl_seconds=300)
+        self._all: Optional[List[Product]] = None
+        self._all_ordinals: Optional[List[int]] = None
+        # field -> (sorted values, product ids in the same order); rebuilt lazily after a change.
+        self._sorted: Dict[str, Tuple[List[float], List[str]]] = {}
+        self._responses = TTLCache(
+            max_bytes=settings.CATALOG_RESPONSE_CACHE_MAX_BYTES,
+            ttl_seconds=24 * 60 * 60,
+            sizeof=lambda serialized: len(serialized.body) + 64,
+        )
+        self.version = 0
+        self.load(products)
+
+    def load(self, products: Iterable[Product]) -> None:
+        """Replaces the catalog contents and rebuilds every index."""
+        with self._lock:
+            self._by_id = {}
+            self._by_category = {}
+            self._by_tag = {}
+            self._ordinals = {}
+            self._next_ordinal = 0
+            self._search_index.clear()
+            for product in products:
+                self._add(product)
+            self._changed()
+
+    def upsert(self, product: Product) -> None:
+        """Adds a product or replaces the product with the same id, keeping its position."""
+        with self._lock:
+            self._add(product)
+            self._changed()
+
+    def remove(self, product_id: str) -> bool:
+        """Removes a product; returns False if it was not in the catalog."""
+        with self._lock:
+            product = self._by_id.pop(product_id, None)
+            if product is None:
+                return False
+            self._unindex(product)
+            del self._ordinals[product_id]
+            self._changed()
+            return True
+
+    def _add(self, product: Product) -> None:
+        previous = self._by_id.get(product.id)
+        if previous is not None:
+            self._unindex(previous)
+        else:
+            self._ordinals[product.id] = self._next_ordinal
+            self._next_ordinal += 1
+        # Assigning to an existing key keeps its position in insertion order.
+        self._by_id[product.id] = product
+        self._by_category.setdefault(product.category, {})[product.id] = product
+        for tag in product.tags:
+            self._by_tag.setdefault(tag, {})[product.id] = product
+        self._search_index.add(product.id, self._search_fields(product))
+
+    def _unindex(self, product: Product) -> None:
+        self._discard(self._by_category, product.category, product.id)
+        for tag in product.tags:
+            self._discard(self._by_tag, tag, product.id)
+        self._search_index.remove(product.id)
+
+    @staticmethod
+    def _discard(index: Dict[str, Dict[str, Product]], key: str, product_id: str) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(product_id, None)
+            if not bucket:
+                del index[key]
+
+    @staticmethod
+    def _search_fields(product: Product) -> List[Tuple[str, float]]:
+        fields = [(product.name, FIELD_WEIGHTS["name"])]
+        if product.description:
+            fields.append((product.description, FIELD_WEIGHTS["description"]))
+        fields.extend((tag, FIELD_WEIGHTS["tags"]) for tag in product.tags)
+        fields.extend(
+            (f"{key} {value}", FIELD_WEIGHTS["specifications"]) for key, value in product.specifications.items()
+        )
+        return fields
+
+    def _changed(self) -> None:
+        self._all = None
+        self._all_ordinals = None
+        self._sorted = {}
+        self.version += 1
+
+    def set_product_types(self, product_types: Iterable[ProductType]) -> None:
+        with self._lock:
+            self._product_types = list(product_types)
+            self._changed()
+
+    def product_types(self) -> List[ProductType]:
+        return self._product_types
+
+    def serialized(self, key: Hashable, build: Callable[[], Tuple[Any, Dict[str, str]]]) -> SerializedResponse:
+        """
+        Returns the response for `key` serialized to JSON bytes, calling `build()`
+        (which returns the content and extra headers) only once per catalog version.
+        """
+        cache_key = (self.version, key)
+        serialized = self._responses.get(cache_key)
+        if serialized is None:
+            content, headers = build()
+            serialized = serialize_json(content, headers)
+            self._responses.set(cache_key, serialized)
+        return serialized
+
+    def get(self, product_id: str) -> Optional[Product]:
+        return self._by_id.get(product_id)
+
+    def all(self) -> List[Product]:
+        """Returns every product in insertion order. The list is shared; do not mutate it."""
+        products = self._all
+        if products is None:
+            products = self._all = list(self._by_id.values())
+        return products
+
+    def by_category(self, category: str) -> List[Product]:
+        return list(self._by_category.get(category, {}).values())
+
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    def _sorted_index(self, field: str) -> Tuple[List[float], List[str]]:
+        index = self._sorted.get(field)
+        if index is None:
+            pairs = sorted((getattr(product, field), product_id) for product_id, product in self._by_id.items())
+            index = self._sorted[field] = ([value for value, _ in pairs], [product_id for _, product_id in pairs])
+        return index
+
+    def _in_range(self, field: str, minimum: Optional[float], maximum: Optional[float]) -> Sequence[str]:
+        values, product_ids = self._sorted_index(field)
+        start = 0 if minimum is None else bisect_left(values, minimum)
+        end = len(values) if maximum is None else bisect_right(values, maximum)
+        return product_ids[start:end]
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        tags: Sequence[str] = (),
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        max_rating: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Product], Optional[str]]:
+        """
+        Returns one page of products matching every given filter, in catalog order,
+        and the cursor of the next page (None on the last page). `tags` must all match.
+        Raises ValueError for a malformed cursor.
+        """
+        after = decode_cursor(cursor) if cursor else -1
+        with self._lock:
+            candidates: List[object] = []
+            if category is not None:
+                candidates.append(self._by_category.get(category, {}).keys())
+            for tag in tags:
+                candidates.append(self._by_tag.get(tag, {}).keys())
+            if min_price is not None or max_price is not None:
+                candidates.append(self._in_range("price", min_price, max_price))
+            if min_rating is not None or max_rating is not None:
+                candidates.append(self._in_range("rating", min_rating, max_rating))
+
+            ordinals = self._ordinals
+            if not candidates:
+                products = self.all()
+                if self._all_ordinals is None:
+                    self._all_ordinals = [ordinals[product.id] for product in products]
+                start = bisect_right(self._all_ordinals, after)
+                page = products[start:start + limit + 1]
+            else:
+                # Intersect from the most selective filter down.
+                candidates.sort(key=len)
+                matching = set(candidates[0])
+                for other in candidates[1:]:
+                    if not matching:
+                        break
+                    matching.intersection_update(other)
+                page_ids = heapq.nsmallest(
+                    limit + 1, (i for i in matching if ordinals[i] > after), key=ordinals.__getitem__
+                )
+                page = [self._by_id[product_id] for product_id in page_ids]
+
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_cursor(ordinals[page[-1].id])
+            return page, next_cursor
+
+    def search(self, query: str, limit: int = 20) -> List[Product]:
+        """Returns the `limit` best matches for `query`, best first."""
+        if not query:
+            return []
+        # Keyed by version, so results computed before an update are never served after it.
+        cache_key = (self.version, normalize_search_text(query), limit)
+        product_ids = self._search_results.get(cache_key)
+        if product_ids is None:
+            with self._lock:
+                product_ids = [product_id for product_id, _ in self._search_index.search(query, limit)]
+            self._search_results.set(cache_key, product_ids)
+        return [self._by_id[product_id] for product_id in product_ids if product_id in self._by_id]
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {"catalog_search": self._search_results.stats(), "catalog_responses": self._responses.stats()}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+_catalog_instance: Optional[ProductCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_product_catalog() -> ProductCatalog:
+    """Returns the process-wide catalog, loading the mock products and types on first use."""
+    global _catalog_instance
+    if _catalog_instance is None:
+        with _catalog_lock:
+            if _catalog_instance is None:
+                from .mock_data import mock_product_types, mock_products
+                _catalog_instance = ProductCatalog(mock_products, mock_product_types)
+    return _catalog_instance
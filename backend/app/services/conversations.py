@@ -0,0 +1,83 @@
+import logging
+import math
+from typing import Dict, List
+
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER = "user"
+MODEL = "model"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough Gemini token count without a count_tokens round trip:
+    about one token per Japanese character and four ASCII characters per token.
+    """
+    ascii_chars = sum(1 for char in text if char < "\x80")
+    return (len(text) - ascii_chars) + math.ceil(ascii_chars / 4)
+
+
+def trim_history(turns: List[Dict[str, str]], max_tokens: int) -> List[Dict[str, str]]:
+    """Drops the oldest user/model exchanges until the history fits in `max_tokens`."""
+    total = sum(estimate_tokens(turn["text"]) for turn in turns)
+    start = 0
+    while total > max_tokens and start < len(turns):
+        # Whole exchanges, so the history still starts with a user turn.
+        for turn in turns[start:start + 2]:
+            total -= estimate_tokens(turn["text"])
+        start += 2
+    return turns[start:]
+
+
+class ConversationStore:
+    """
+    Keeps the turns of each /chat conversation, keyed by conversationId, so a
+    message only sends its own text and the earlier turns go as chat history.
+
+    Turns are plain {"role", "text"} dicts (tool calls are not kept) persisted
+    through a CacheBackend ("memory": LRU bounded in bytes, "sqlite" or "gcs"); every
+    append refreshes the conversation's TTL and trims it to the token budget.
+    """
+
+    def __init__(self, backend: CacheBackend, max_history_tokens: int):
+        self.backend = backend
+        self.max_history_tokens = max_history_tokens
+
+    async def history(self, conversation_id: str) -> List[Dict[str, str]]:
+        try:
+            return await self.backend.get_async(conversation_id) or []
+        except Exception as e:
+            logger.warning(f"[チャット] 会話履歴の読み込みに失敗しました: {e}")
+            return []
+
+    async def append(self, conversation_id: str, user_text: str, model_text: str) -> List[Dict[str, str]]:
+        """Adds one exchange and returns the trimmed history that was stored."""
+        # Read again: another message of the same conversation may have finished meanwhile.
+        turns = await self.history(conversation_id) + [
+            {"role": USER, "text": user_text},
+            {"role": MODEL, "text": model_text},
+        ]
+        turns = trim_history(turns, self.max_history_tokens)
+        try:
+            await self.backend.set_async(conversation_id, turns)
+        except Exception as e:
+            logger.warning(f"[チャット] 会話履歴の書き込みに失敗しました: {e}")
+        return turns
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_conversation_store() -> ConversationStore:
+    return ConversationStore(
+        create_cache_backend(
+            settings.CHAT_CONVERSATION_STORE_BACKEND,
+            namespace="chat_conversations",
+            ttl_seconds=settings.CHAT_CONVERSATION_TTL_SECONDS,
+            max_bytes=settings.CHAT_CONVERSATION_STORE_MAX_BYTES,
+        ),
+        max_history_tokens=settings.CHAT_HISTORY_MAX_TOKENS,
+    )
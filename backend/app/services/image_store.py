@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import TTLCache, hash_key, normalize_key
+from app.core.lazy import loaded_module
+from app.core.resilience import resilient_call
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[\s\.,!?;:、。！？・「」『』()（）\"']+")
+
+
+def normalize_image_prompt(prompt: str) -> str:
+    """Normalizes an image prompt so that prompts differing only in case, width, spacing or punctuation match."""
+    return _PUNCTUATION.sub(" ", normalize_key(prompt)).strip()
+
+
+class ContentAddressedImageStore:
+    """
+    Stores generated images in GCS under a hash of the normalized prompt and model name,
+    so an identical (or trivially different) prompt reuses the existing blob instead
+    of calling the image model again.
+    """
+
+    def __init__(self, storage_client: Any, bucket_name: str, prefix: str = "archetype_images/cas"):
+        self.storage_client = storage_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        # Blobs known to exist, to skip the GCS existence check on repeat hits.
+        self._known_blobs = TTLCache(max_bytes=1024 * 1024, ttl_seconds=24 * 60 * 60)
+        # Generations in progress, so concurrent requests for the same prompt share one model call.
+        # A future resolves to None when its request was cancelled before finishing.
+        self._in_flight: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def blob_name_for(self, prompt: str, model_name: str) -> str:
+        digest = hash_key("image", normalize_image_prompt(prompt), model_name)
+        return f"{self.prefix}/{digest}.png"
+
+    async def find(self, prompt: str, model_name: str) -> Optional[str]:
+        """Returns the blob name of a previously generated image for this prompt, if any."""
+        blob_name = self.blob_name_for(prompt, model_name)
+        exists = self._known_blobs.get(blob_name)
+        if exists is None:
+            blob = self.storage_client.bucket(self.bucket_name).blob(blob_name)
+            exists = await resilient_call("gcs", lambda: asyncio.to_thread(blob.exists))
+            if exists:
+                self._known_blobs.set(blob_name, True)
+        if exists:
+            self.hits += 1
+            return blob_name
+        self.misses += 1
+        return None
+
+    async def put(self, prompt: str, model_name: str, image_bytes: bytes) -> str:
+        """Uploads an image under its content address and returns the blob name."""
+        blob_name = self.blob_name_for(prompt, model_name)
+        blob = self.storage_client.bucket(self.bucket_name).blob(blob_name)
+        try:
+            # if_generation_match=0 only creates the object; a concurrent upload of the same prompt wins.
+            await resilient_call("gcs", lambda: asyncio.to_thread(
+                blob.upload_from_string, image_bytes, content_type="image/png", if_generation_match=0
+            ))
+        except Exception as e:
+            google_exceptions = loaded_module("google.api_core.exceptions")
+            # A replayed recording of the same error carries only its status code.
+            precondition_failed = getattr(e, "code", None) == 412 or (
+                google_exceptions is not None and isinstance(e, google_exceptions.PreconditionFailed)
+            )
+            if not precondition_failed:
+                raise
+        self._known_blobs.set(blob_name, True)
+        return blob_name
+
+    async def get_or_create(
+        self, prompt: str, model_name: str, generate: Callable[[], Awaitable[bytes]]
+    ) -> str:
+        """Returns the blob name for this prompt, calling `generate()` only if no image exists yet."""
+        blob_name = self.blob_name_for(prompt, model_name)
+        while True:
+            in_flight = self._in_flight.get(blob_name)
+            if in_flight is None:
+                break
+            shared = await asyncio.shield(in_flight)
+            if shared is not None:
+                self.hits += 1
+                return shared
+            # The request generating it was cancelled: start over, generating it here if nobody else has.
+
+        future: "asyncio.Future[Optional[str]]" = asyncio.get_running_loop().create_future()
+        self._in_flight[blob_name] = future
+        try:
+            existing = await self.find(prompt, model_name)
+            if existing:
+                logger.info(f"[画像ストア] 同一プロンプトの画像を再利用します: {existing}")
+                result = existing
+            else:
+                result = await self.put(prompt, model_name, await generate())
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # The cancellation belongs to this request only; waiters get None and retry.
+            future.set_result(None)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting on it.
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(blob_name, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
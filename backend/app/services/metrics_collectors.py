@@ -0,0 +1,93 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.metrics import Family, MetricsRegistry
+from app.core.rate_limit import rate_limiters
+from app.core.resilience import resilience
+from app.services import catalog
+from app.services.youtube import quota_tracker
+
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+def collect_youtube_quota() -> Iterable[Family]:
+    usage = quota_tracker.usage()
+    endpoints = usage["endpoints"]
+    yield ("rakubato_youtube_quota_used_units", "gauge", "YouTube Data API quota units spent today.",
+           [({}, usage["used_units"])])
+    yield ("rakubato_youtube_quota_remaining_units", "gauge", "YouTube Data API quota units left today.",
+           [({}, usage["remaining_units"])])
+    yield ("rakubato_youtube_quota_endpoint_units", "gauge", "YouTube Data API quota units spent today per endpoint.",
+           [({"endpoint": name}, e["units"]) for name, e in endpoints.items()])
+
+
+def collect_backends() -> Iterable[Family]:
+    limiters = rate_limiters.stats()
+    policies = resilience.stats()
+    yield ("rakubato_backend_in_flight", "gauge", "External calls currently in flight per backend.",
+           [({"backend": name}, s["in_flight"]) for name, s in limiters.items()])
+    yield ("rakubato_backend_waiting", "gauge", "Calls queued by the rate limiter per backend.",
+           [({"backend": name}, s["waiting"]) for name, s in limiters.items()])
+    yield ("rakubato_rate_limit_wait_seconds_total", "counter", "Time spent waiting for the rate limiter.",
+           [({"backend": name}, s["wait_seconds_total"]) for name, s in limiters.items()])
+    yield ("rakubato_circuit_open", "gauge", "1 while the backend's circuit breaker is open or half-open.",
+           [({"backend": name}, int(s["circuit_state"] != "closed")) for name, s in policies.items()])
+    yield ("rakubato_circuit_rejected_total", "counter", "Calls rejected by an open circuit breaker.",
+           [({"backend": name}, s["circuit_rejected_total"]) for name, s in policies.items()])
+
+
+def _cache_stats(service: Any) -> Dict[str, Dict[str, int]]:
+    sources: Dict[str, Callable[[], Dict[str, int]]] = {}
+    for name, attr in (("needs", "needs_cache"), ("video_extraction", "video_cache"),
+                       ("image_store", "image_store"), ("signed_urls", "url_signer")):
+        source = getattr(service, attr, None)
+        if source is not None:
+            sources[name] = source.stats
+    youtube = getattr(service, "youtube", None)
+    if youtube is not None:
+        sources["youtube_search"] = youtube.search_cache.stats
+        sources["youtube_stats"] = youtube.stats_cache.stats
+
+    stats = {name: stat() for name, stat in sources.items()}
+    if catalog._catalog_instance is not None:
+        stats.update(catalog._catalog_instance.cache_stats())
+    return stats
+
+
+def collect_caches(get_service: Callable[[], Optional[Any]]) -> Callable[[], Iterable[Family]]:
+    """Cache hit/miss counters of the AI service and the product catalog."""
+
+    def collect() -> Iterable[Family]:
+        stats = _cache_stats(get_service())
+        for key, kind, help in (
+            ("hits", "counter", "Cache hits."),
+            ("misses", "counter", "Cache misses."),
+            ("entries", "gauge", "Entries held by the cache."),
+            ("bytes", "gauge", "Approximate size of the cached values."),
+        ):
+            samples: Samples = [({"cache": name}, s[key]) for name, s in stats.items() if key in s]
+            yield (f"rakubato_cache_{key}" + ("_total" if kind == "counter" else ""), kind, help, samples)
+
+    return collect
+
+
+def collect_pollers(get_service: Callable[[], Optional[Any]]) -> Callable[[], Iterable[Family]]:
+    """In-flight long-running operations, e.g. Veo renders."""
+
+    def collect() -> Iterable[Family]:
+        poller = getattr(get_service(), "veo_poller", None)
+        if poller is None:
+            return
+        stats = poller.stats()
+        yield ("rakubato_operations_in_flight", "gauge", "Long-running operations being polled.",
+               [({"poller": poller.name}, stats["in_flight"])])
+        yield ("rakubato_operation_polls_total", "counter", "Status polls of long-running operations.",
+               [({"poller": poller.name}, stats["polls_total"])])
+
+    return collect
+
+
+def register_collectors(registry: MetricsRegistry, get_service: Callable[[], Optional[Any]]) -> None:
+    registry.add_collector(collect_youtube_quota)
+    registry.add_collector(collect_backends)
+    registry.add_collector(collect_caches(get_service))
+    registry.add_collector(collect_pollers(get_service))
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.core.resilience import resilient_call
+
+logger = logging.getLogger(__name__)
+
+generative_models = lazy_import("vertexai.generative_models")
+vision_models = lazy_import("vertexai.preview.vision_models")
+
+GEMINI = "gemini"
+IMAGEN = "imagen"
+
+# A billed but negligible request that makes the first real call skip connection setup.
+_WARM_UP_PROMPT = "ping"
+
+
+class ModelSpec(NamedTuple):
+    """How to build the model handle of one task: its kind, the Settings field naming the model, extra options."""
+    kind: str
+    setting: str
+    options: Optional[Callable[[], Dict[str, Any]]] = None
+
+
+class ModelRegistry:
+    """
+    Creates each task's model handle (GenerativeModel / ImageGenerationModel)
+    once per process instead of on every call.
+
+    Model names come from Settings (e.g. NEEDS_MODEL_NAME), so a task can be
+    pointed at another model without a code change. Handles are stateless and
+    safe to share between requests; chat sessions are started per request.
+    """
+
+    def __init__(self, specs: Dict[str, ModelSpec]):
+        self._specs = specs
+        self._handles: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def name(self, task: str) -> str:
+        return getattr(settings, self._specs[task].setting)
+
+    def get(self, task: str) -> Any:
+        handle = self._handles.get(task)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(task)
+                if handle is None:
+                    handle = self._create(task)
+                    self._handles[task] = handle
+        return handle
+
+    def _create(self, task: str) -> Any:
+        spec = self._specs[task]
+        name = self.name(task)
+        if spec.kind == IMAGEN:
+            # from_pretrained looks the model up over the network.
+            return vision_models.ImageGenerationModel.from_pretrained(name)
+        return generative_models.GenerativeModel(name, **(spec.options() if spec.options else {}))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._handles.clear()
+
+    async def warm_up(self, send_requests: bool = False, tasks: Optional[Iterable[str]] = None) -> None:
+        """
+        Builds every handle off the event loop and, if `send_requests`, sends one
+        tiny request per distinct Gemini model. Failures are logged and left to
+        the first real call, which builds the handle again.
+        """
+        start = time.perf_counter()
+        warmed_models = set()
+        for task in tasks or self._specs:
+            try:
+                handle = await asyncio.to_thread(self.get, task)
+                name = self.name(task)
+                if send_requests and self._specs[task].kind == GEMINI and name not in warmed_models:
+                    warmed_models.add(name)
+                    await resilient_call(GEMINI, lambda: handle.generate_content_async(
+                        [_WARM_UP_PROMPT], generation_config={"max_output_tokens": 1}
+                    ), model=name)
+            except Exception as e:
+                logger.warning(f"[ウォームアップ] モデル {task} の準備に失敗しました: {e}")
+        logger.info(
+            f"[ウォームアップ] モデル {len(self._handles)}件を準備しました "
+            f"(リクエスト: {len(warmed_models)}件, {time.perf_counter() - start:.2f}秒)"
+        )
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.metrics import operation_duration
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingOperation:
+    def __init__(self, operation: Any, future: "asyncio.Future[Any]", interval: float):
+        self.operation = operation
+        self.future = future
+        self.started_at = time.monotonic()
+        self.interval = interval
+        self.next_poll_at = self.started_at + interval
+        self.polls = 0
+        self.consecutive_errors = 0
+
+
+class OperationPoller:
+    """
+    Polls every outstanding long-running operation (e.g. Veo video generation) from
+    a single background task instead of one polling loop per request.
+
+    Each operation is polled with its own adaptive interval: it starts at
+    `initial_interval`, grows by `backoff` after every poll up to `max_interval`,
+    and is jittered so that operations started together do not poll in lockstep.
+    Operations that are due within `batch_window` seconds of each other are checked
+    in the same tick, concurrently on a small dedicated thread pool.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Any], Any],
+        initial_interval: float = 2.0,
+        max_interval: float = 20.0,
+        backoff: float = 1.5,
+        jitter: float = 0.2,
+        batch_window: float = 0.5,
+        max_workers: int = 4,
+        max_consecutive_errors: int = 5,
+        name: str = "operation",
+    ):
+        self.name = name
+        self._fetch = fetch
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.batch_window = batch_window
+        self.max_consecutive_errors = max_consecutive_errors
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="operation-poller")
+        self._pending: Dict[str, _PendingOperation] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.polls_total = 0
+        self.poll_errors_total = 0
+        self.completed_total = 0
+        self.failed_total = 0
+        self.completion_seconds_total = 0.0
+        self.completion_seconds_max = 0.0
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def wait(self, operation: Any) -> Any:
+        """Registers an operation and waits until it reports `done`. Returns the final operation."""
+        if getattr(operation, "done", False):
+            return operation
+
+        loop = asyncio.get_running_loop()
+        pending = _PendingOperation(operation, loop.create_future(), self._jittered(self.initial_interval))
+        key = getattr(operation, "name", None) or str(id(operation))
+        self._pending[key] = pending
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        try:
+            return await pending.future
+        finally:
+            self._pending.pop(key, None)
+
+    async def _run(self) -> None:
+        while self._pending:
+            now = time.monotonic()
+            next_due = min(p.next_poll_at for p in self._pending.values())
+            if next_due > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=next_due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = [
+                (key, p) for key, p in self._pending.items()
+                if p.next_poll_at <= now + self.batch_window and not p.future.done()
+            ]
+            await asyncio.gather(*(self._poll(key, p) for key, p in due))
+
+    async def _poll(self, key: str, pending: _PendingOperation) -> None:
+        loop = asyncio.get_running_loop()
+        pending.polls += 1
+        self.polls_total += 1
+        try:
+            operation = await loop.run_in_executor(self._executor, self._fetch, pending.operation)
+            pending.consecutive_errors = 0
+        except Exception as e:
+            self.poll_errors_total += 1
+            pending.consecutive_errors += 1
+            logger.warning(f"[ポーラー] {key} のステータス取得に失敗しました ({pending.consecutive_errors}/{self.max_consecutive_errors}): {e}")
+            if pending.consecutive_errors >= self.max_consecutive_errors:
+                self.failed_total += 1
+                operation_duration.observe(time.monotonic() - pending.started_at, poller=self.name, outcome="error")
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+                self._pending.pop(key, None)
+                return
+            operation = pending.operation
+
+        pending.operation = operation
+        if getattr(operation, "done", False):
+            elapsed = time.monotonic() - pending.started_at
+            self.completed_total += 1
+            self.completion_seconds_total += elapsed
+            self.completion_seconds_max = max(self.completion_seconds_max, elapsed)
+            operation_duration.observe(elapsed, poller=self.name, outcome="done")
+            logger.info(f"[ポーラー] {key} が完了しました ({elapsed:.1f}秒, ポーリング{pending.polls}回)")
+            if not pending.future.done():
+                pending.future.set_result(operation)
+            self._pending.pop(key, None)
+            return
+
+        pending.interval = min(pending.interval * self.backoff, self.max_interval)
+        pending.next_poll_at = time.monotonic() + self._jittered(pending.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._pending),
+            "polls_total": self.polls_total,
+            "poll_errors_total": self.poll_errors_total,
+            "completed_total": self.completed_total,
+            "failed_total": self.failed_total,
+            "completion_seconds_total": self.completion_seconds_total,
+            "completion_seconds_max": self.completion_seconds_max,
+        }
+
+    async def close(self) -> None:
+        """Stops polling and cancels every waiter."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        pending: List[_PendingOperation] = list(self._pending.values())
+        for p in pending:
+            if not p.future.done():
+                p.future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
@@ -1,28 +1,86 @@
-from typing import List, Optional
-from .mock_data import mock_products, mock_product_types
+from typing import Dict, List, Optional, Sequence, Tuple
+from .catalog import ProductCatalog, get_product_catalog
+from app.core.http_cache import SerializedResponse
 from app.schemas.product import Product, ProductType
 
+# Field names accepted by `fields=`, as they appear in the JSON response.
+PRODUCT_FIELDS = {field.alias or name: name for name, field in Product.model_fields.items()}
+
 class ProductService:
+    def __init__(self, catalog: Optional[ProductCatalog] = None):
+        self.catalog = catalog or get_product_catalog()
+
     def get_all_products(self) -> List[Product]:
-        """Returns all products from the mock data."""
-        return mock_products
+        """Returns all products in the catalog."""
+        return self.catalog.all()
+
+    def list_products(
+        self,
+        category: Optional[str] = None,
+        tags: Sequence[str] = (),
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        max_rating: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Product], Optional[str]]:
+        """Returns one filtered page of products and the cursor of the next page."""
+        return self.catalog.query(
+            category=category, tags=tags, min_price=min_price, max_price=max_price,
+            min_rating=min_rating, max_rating=max_rating, cursor=cursor, limit=limit,
+        )
 
     def get_product_by_id(self, product_id: str) -> Optional[Product]:
-        """Finds a product by its ID in the mock data."""
-        for product in mock_products:
-            if product.id == product_id:
-                return product
-        return None
+        """Finds a product by its ID using the catalog's id index."""
+        return self.catalog.get(product_id)
+
+    def get_products_by_category(self, category: str) -> List[Product]:
+        """Returns the products of a category using the catalog's category index."""
+        return self.catalog.by_category(category)
 
     def get_all_product_types(self) -> List[ProductType]:
-        """Returns all product types from the mock data."""
-        return mock_product_types
-
-    def search_products(self, query: str) -> List[Product]:
-        """Searches for products by name or description in the mock data."""
-        if not query:
-            return []
-        
-        lower_query = query.lower()
-        return [p for p in mock_products 
-                if lower_query in p.name.lower() or lower_query in p.description.lower()]
+        """Returns all product types in the catalog."""
+        return self.catalog.product_types()
+
+    def search_products(self, query: str, limit: int = 20) -> List[Product]:
+        """Ranked search over product names, descriptions, tags and specifications."""
+        return self.catalog.search(query, limit)
+
+    # --- Pre-serialized responses, cached per catalog version ---
+
+    def list_products_response(self, fields: Optional[Sequence[str]] = None, **filters) -> SerializedResponse:
+        """
+        Returns a page of products as JSON bytes, projected to `fields` (response names).
+        Raises ValueError for unknown fields or a malformed cursor.
+        """
+        include = None
+        if fields:
+            unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            include = {PRODUCT_FIELDS[f] for f in fields}
+
+        def build():
+            products, next_cursor = self.list_products(**filters)
+            headers: Dict[str, str] = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+            return [p.model_dump(mode="json", by_alias=True, include=include) for p in products], headers
+
+        key = ("products", tuple(sorted(include or ())), tuple(sorted((k, str(v)) for k, v in filters.items())))
+        return self.catalog.serialized(key, build)
+
+    def get_product_response(self, product_id: str) -> Optional[SerializedResponse]:
+        """Returns a single product as JSON bytes, or None if it does not exist."""
+        if self.get_product_by_id(product_id) is None:
+            return None
+        return self.catalog.serialized(
+            ("product", product_id),
+            lambda: (self.get_product_by_id(product_id).model_dump(mode="json", by_alias=True), {}),
+        )
+
+    def get_product_types_response(self) -> SerializedResponse:
+        """Returns all product types as JSON bytes."""
+        return self.catalog.serialized(
+            ("types",),
+            lambda: ([t.model_dump(mode="json", by_alias=True) for t in self.get_all_product_types()], {}),
+        )
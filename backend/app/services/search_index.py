@@ -0,0 +1,128 @@
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from itertools import repeat
+from operator import add, mul, neg
+from typing import Dict, Iterable, List, Tuple
+
+# Katakana (ァ..ヶ) is folded to hiragana so that either spelling of a word matches.
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_TOKEN_SEPARATORS = re.compile(r"[^\w]+")
+
+# Relative weight of a match in each product field.
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "specifications": 1.0, "description": 1.0}
+
+
+def normalize_search_text(text: str) -> str:
+    """NFKC-normalizes, lowercases and folds katakana to hiragana."""
+    return unicodedata.normalize("NFKC", text).lower().translate(_KATAKANA_TO_HIRAGANA)
+
+
+def ngrams(text: str, n: int = 2) -> List[str]:
+    """
+    Splits normalized text into character n-grams. Text is first split on
+    punctuation and whitespace, so n-grams never span two words; words shorter
+    than `n` (e.g. a single kanji) are kept whole.
+    """
+    grams = []
+    for token in _TOKEN_SEPARATORS.split(normalize_search_text(text)):
+        if not token:
+            continue
+        if len(token) <= n:
+            grams.append(token)
+        else:
+            grams.extend(token[i:i + n] for i in range(len(token) - n + 1))
+    return grams
+
+
+class NgramSearchIndex:
+    """
+    Character n-gram inverted index with TF-IDF style ranking.
+
+    Word-boundary-free n-grams make partial and Japanese queries match without a
+    tokenizer. A document matches when it contains at least `min_coverage` of the
+    distinct query n-grams; matches are scored by the IDF-weighted field weights of
+    the n-grams they contain, and only the top `limit` are materialized.
+    """
+
+    def __init__(self, n: int = 2, min_coverage: float = 0.8):
+        self.n = n
+        self.min_coverage = min_coverage
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_grams: Dict[str, Dict[str, float]] = {}
+        self._doc_order: Dict[str, int] = {}
+        self._next_order = 0
+
+    def add(self, doc_id: str, fields: Iterable[Tuple[str, float]]) -> None:
+        """Indexes (or re-indexes) a document given as (text, weight) pairs."""
+        self.remove(doc_id)
+        weights: Dict[str, float] = {}
+        for text, weight in fields:
+            for gram in ngrams(text, self.n):
+                weights[gram] = weights.get(gram, 0.0) + weight
+        for gram, weight in weights.items():
+            # Sub-linear in the weight, so repeating a word does not dominate the ranking.
+            self._postings.setdefault(gram, {})[doc_id] = 1 + math.log(weight)
+        self._doc_grams[doc_id] = weights
+        self._doc_order[doc_id] = self._next_order
+        self._next_order += 1
+
+    def remove(self, doc_id: str) -> bool:
+        weights = self._doc_grams.pop(doc_id, None)
+        if weights is None:
+            return False
+        for gram in weights:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[gram]
+        del self._doc_order[doc_id]
+        return True
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._doc_grams.clear()
+        self._doc_order.clear()
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Returns up to `limit` (doc_id, score) pairs, best first; ties keep insertion order."""
+        query_grams = set(ngrams(query, self.n))
+        if not query_grams or limit <= 0:
+            return []
+        required = max(1, math.ceil(len(query_grams) * self.min_coverage))
+        present = sorted((g for g in query_grams if g in self._postings), key=lambda g: len(self._postings[g]))
+        if len(present) < required:
+            return []
+
+        # A document containing `required` of the grams must contain at least one of the
+        # len(present) - required + 1 rarest ones, so only those postings are read in full;
+        # the remaining grams are intersected with the candidates (set operations run in C).
+        seed_count = len(present) - required + 1
+        matched: Counter = Counter()
+        for gram in present[:seed_count]:
+            matched.update(self._postings[gram].keys())
+        for gram in present[seed_count:]:
+            matched.update(self._postings[gram].keys() & matched.keys())
+        if required > 1:
+            candidates = [doc_id for doc_id, count in matched.items() if count >= required]
+        else:
+            candidates = list(matched)
+
+        # Scores are accumulated one gram at a time over all candidates with map(), which
+        # keeps the per-candidate work in C even when a common query matches most of the catalog.
+        total_docs = len(self._doc_grams)
+        scores = [0.0] * len(candidates)
+        for gram in present:
+            posting = self._postings[gram]
+            idf = math.log(1 + total_docs / len(posting))
+            weights = map(posting.get, candidates, repeat(0.0))
+            scores = list(map(add, scores, map(mul, repeat(idf), weights)))
+        order = self._doc_order
+        best = heapq.nlargest(limit, zip(scores, map(neg, map(order.__getitem__, candidates)), candidates))
+        return [(doc_id, score) for score, _, doc_id in best]
+
+    def __len__(self) -> int:
+        return len(self._doc_grams)
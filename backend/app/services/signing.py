@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.lazy import lazy_import
+from app.core.resilience import resilient_call
+
+logger = logging.getLogger(__name__)
+
+google_auth = lazy_import("google.auth")
+impersonated_credentials = lazy_import("google.auth.impersonated_credentials")
+auth_requests = lazy_import("google.auth.transport.requests")
+
+
+class UrlSigner:
+    """
+    Issues V4 signed URLs for GCS blobs.
+
+    The signing credentials are created once and refreshed shortly before they
+    expire, instead of calling google.auth.default() and building impersonated
+    credentials for every URL. Signed URLs are cached per blob until
+    `refresh_margin_seconds` before they expire, and `sign_many_async` signs
+    every uncached blob of a batch in a single worker-thread hop.
+    """
+
+    def __init__(
+        self,
+        storage_client: Any,
+        credentials: Any = None,
+        signer_email: Optional[str] = None,
+        expiration_seconds: int = 3600,
+        refresh_margin_seconds: int = 300,
+        cache_max_bytes: int = 1024 * 1024,
+    ):
+        self.storage_client = storage_client
+        self.signer_email = signer_email
+        self.expiration_seconds = expiration_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._credentials = credentials
+        self._lock = threading.Lock()
+        self._url_cache = TTLCache(
+            max_bytes=cache_max_bytes,
+            ttl_seconds=max(expiration_seconds - refresh_margin_seconds, 0),
+        )
+
+    def _signing_credentials(self) -> Any:
+        """Returns the shared signing credentials, creating or refreshing them if needed."""
+        with self._lock:
+            if self._credentials is None:
+                if not self.signer_email:
+                    raise ValueError(
+                        "GCP_IAM_SERVICE_ACCOUNT_EMAIL environment variable is not set. "
+                        "It is required for signing URLs in a Cloud Run environment."
+                    )
+                logger.info(f"署名にサービスアカウント'{self.signer_email}'の権限借用を使用します。")
+                # Get default credentials from the environment (the runtime service account)
+                default_creds, _ = google_auth.default()
+                self._credentials = impersonated_credentials.Credentials(
+                    source_credentials=default_creds,
+                    target_principal=self.signer_email,
+                    target_scopes=["https://www.googleapis.com/auth/iam"], # Scope for signing
+                )
+            if isinstance(self._credentials, impersonated_credentials.Credentials):
+                # Each signBlob call is authorized with the source credentials; refresh them
+                # ahead of expiry so the refresh does not stall a request.
+                self._refresh_if_expiring(self._credentials._source_credentials)
+            return self._credentials
+
+    def _refresh_if_expiring(self, credentials: Any) -> None:
+        expiry = credentials.expiry
+        if expiry is not None and expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        refresh_at = datetime.now(timezone.utc) + timedelta(seconds=self.refresh_margin_seconds)
+        if not getattr(credentials, "token", None) or expiry is None or expiry <= refresh_at:
+            credentials.refresh(auth_requests.Request())
+
+    def _sign(self, bucket_name: str, blob_name: str) -> str:
+        blob = self.storage_client.bucket(bucket_name).blob(blob_name)
+        return blob.generate_signed_url(
+            version="v4",
+            expiration=timedelta(seconds=self.expiration_seconds),
+            method="GET",
+            credentials=self._signing_credentials(),
+        )
+
+    def _sign_uncached(self, bucket_name: str, blob_names: List[str]) -> Dict[str, Tuple[str, float]]:
+        signed = {}
+        for blob_name in blob_names:
+            expires_at = time.time() + self.expiration_seconds
+            signed_url = self._sign(bucket_name, blob_name)
+            self._url_cache.set((bucket_name, blob_name), (signed_url, expires_at))
+            signed[blob_name] = (signed_url, expires_at)
+        return signed
+
+    async def sign_many_with_expiry_async(self, bucket_name: str, blob_names: List[str]) -> Tuple[Dict[str, str], float]:
+        """
+        Returns ({blob_name: signed_url}, earliest expiry as a Unix timestamp).
+        Cached URLs are reused; the rest are signed in a single pass.
+        """
+        signed: Dict[str, Tuple[str, float]] = {}
+        missing = []
+        for blob_name in dict.fromkeys(blob_names):
+            cached = self._url_cache.get((bucket_name, blob_name))
+            if cached is None:
+                missing.append(blob_name)
+            else:
+                signed[blob_name] = cached
+        if missing:
+            signed.update(
+                await resilient_call("gcs", lambda: asyncio.to_thread(self._sign_uncached, bucket_name, missing))
+            )
+            logger.info(f"[署名] {len(missing)}件の署名付きURLを生成しました (キャッシュ済み: {len(signed) - len(missing)}件)")
+        expires_at = min((exp for _, exp in signed.values()), default=time.time() + self.expiration_seconds)
+        return {blob_name: url for blob_name, (url, _) in signed.items()}, expires_at
+
+    async def sign_many_async(self, bucket_name: str, blob_names: List[str]) -> Dict[str, str]:
+        """Returns {blob_name: signed_url}; cached URLs are reused, the rest are signed in one pass."""
+        signed_urls, _ = await self.sign_many_with_expiry_async(bucket_name, blob_names)
+        return signed_urls
+
+    async def sign_async(self, bucket_name: str, blob_name: str) -> str:
+        return (await self.sign_many_async(bucket_name, [blob_name]))[blob_name]
+
+    def stats(self) -> Dict[str, int]:
+        return self._url_cache.stats()
@@ -0,0 +1,75 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import CacheBackend, create_cache_backend, hash_key, normalize_key
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class VideoExtractionCache:
+    """
+    Caches per-video product extraction results so each review video is analyzed once.
+
+    The key covers every input that changes the model output: the video, the
+    normalized keyword, the evaluation tags, the analyzed time window and the model.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        video_id: str,
+        keyword: str,
+        limited_tags: List[str],
+        start_offset: Optional[str],
+        end_offset: Optional[str],
+        model_name: str,
+    ) -> str:
+        return hash_key(
+            "video-extraction",
+            video_id,
+            normalize_key(keyword),
+            [normalize_key(tag) for tag in limited_tags],
+            start_offset or "",
+            end_offset or "",
+            model_name,
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = await self.backend.get_async(key)
+        except Exception as e:
+            logger.warning(f"[キャッシュ] 動画分析キャッシュの読み込みに失敗しました: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            await self.backend.set_async(key, value)
+        except Exception as e:
+            logger.warning(f"[キャッシュ] 動画分析キャッシュの書き込みに失敗しました: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_video_extraction_cache() -> VideoExtractionCache:
+    return VideoExtractionCache(
+        create_cache_backend(
+            settings.VIDEO_CACHE_BACKEND,
+            namespace="video_extraction",
+            ttl_seconds=settings.VIDEO_CACHE_TTL_SECONDS,
+            max_bytes=settings.VIDEO_CACHE_MAX_BYTES,
+        )
+    )
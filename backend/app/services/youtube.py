@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from zoneinfo import ZoneInfo
+
+
+from app.core.cache import CacheBackend, create_cache_backend, hash_key, normalize_key
+from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.core.resilience import resilient_call
+
+logger = logging.getLogger(__name__)
+
+discovery = lazy_import("googleapiclient.discovery")
+
+# Quota units charged by the YouTube Data API per call.
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+}
+
+# The daily quota resets at midnight Pacific Time.
+_QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+class YouTubeClientPool:
+    """
+    A small pool of YouTube Data API clients shared across requests.
+
+    Each googleapiclient resource wraps its own httplib2.Http, which is not
+    thread-safe, so calls made through asyncio.to_thread check out a client
+    for the duration of the call instead of sharing a single instance.
+    """
+
+    def __init__(self, api_key: str, max_size: int = 4):
+        self.api_key = api_key
+        self.max_size = max(1, max_size)
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._all: List[Any] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # Build one client up front so the discovery document is loaded at startup.
+        self._idle.put(self._create_client())
+
+    def _create_client(self) -> Any:
+        start = time.perf_counter()
+        client = discovery.build("youtube", "v3", developerKey=self.api_key, cache_discovery=False)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"[クライアント] YouTubeクライアントを生成しました ({elapsed_ms:.1f}ms, {len(self._all) + 1}/{self.max_size})")
+        self._all.append(client)
+        return client
+
+    def _acquire(self) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.max_size:
+                return self._create_client()
+        return self._idle.get()
+
+    @contextmanager
+    def client(self) -> Iterator[Any]:
+        """Checks out a client for exclusive use by the calling thread."""
+        if self._closed:
+            raise RuntimeError("YouTubeClientPool is closed.")
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def close(self) -> None:
+        """Closes the HTTP connections held by every pooled client."""
+        self._closed = True
+        for client in self._all:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"[クライアント] YouTubeクライアントのクローズに失敗しました: {e}")
+        self._all.clear()
+
+
+class YouTubeQuotaTracker:
+    """Running count of YouTube Data API quota units spent today, per API endpoint."""
+
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._calls: Dict[str, int] = {}
+        self._units: Dict[str, int] = {}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(_QUOTA_TIMEZONE).date().isoformat()
+
+    def _roll_over(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._calls.clear()
+            self._units.clear()
+
+    def record(self, endpoint: str) -> None:
+        with self._lock:
+            self._roll_over()
+            self._calls[endpoint] = self._calls.get(endpoint, 0) + 1
+            self._units[endpoint] = self._units.get(endpoint, 0) + QUOTA_COSTS.get(endpoint, 1)
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            self._roll_over()
+            used = sum(self._units.values())
+            return {
+                "date": self._day,
+                "daily_limit": self.daily_limit,
+                "used_units": used,
+                "remaining_units": max(self.daily_limit - used, 0),
+                "endpoints": {
+                    endpoint: {"calls": self._calls[endpoint], "units": self._units[endpoint]}
+                    for endpoint in self._calls
+                },
+            }
+
+
+quota_tracker = YouTubeQuotaTracker(daily_limit=settings.YOUTUBE_DAILY_QUOTA)
+
+
+class YouTubeDataClient:
+    """
+    Cached access to the YouTube Data API endpoints used by the app.
+
+    search.list results and per-video view counts are cached with separate TTLs,
+    and every live call is charged to the process-wide quota tracker.
+    """
+
+    def __init__(
+        self,
+        pool: YouTubeClientPool,
+        search_cache: CacheBackend,
+        stats_cache: CacheBackend,
+        tracker: YouTubeQuotaTracker = quota_tracker,
+    ):
+        self.pool = pool
+        self.search_cache = search_cache
+        self.stats_cache = stats_cache
+        self.tracker = tracker
+
+    async def search_videos(
+        self,
+        query: str,
+        max_results: int,
+        part: str = "snippet",
+        region_code: str = "JP",
+        relevance_language: str = "ja",
+    ) -> List[Dict[str, Any]]:
+        """Returns the raw `items` of a search.list call for videos."""
+        cache_key = hash_key("search", normalize_key(query), max_results, part, region_code, relevance_language)
+        cached_items = await self.search_cache.get_async(cache_key)
+        if cached_items is not None:
+            logger.info(f"[YouTube] 検索結果をキャッシュから返します: {query}")
+            return cached_items
+
+        def run_search():
+            with self.pool.client() as youtube:
+                self.tracker.record("search.list")
+                return youtube.search().list(
+                    q=query,
+                    part=part,
+                    type="video",
+                    maxResults=max_results,
+                    regionCode=region_code,
+                    relevanceLanguage=relevance_language,
+                ).execute()
+
+        response = await resilient_call("youtube", lambda: asyncio.to_thread(run_search))
+        items = response.get("items", [])
+        await self.search_cache.set_async(cache_key, items)
+        return items
+
+    async def get_view_counts(self, video_ids: List[str]) -> Dict[str, int]:
+        """Returns view counts for up to 50 videos, fetching only the ones not cached."""
+        video_ids = video_ids[:50]
+        view_counts: Dict[str, int] = {}
+        missing_ids = []
+        cached_counts = await asyncio.gather(
+            *(self.stats_cache.get_async(hash_key("views", video_id)) for video_id in video_ids)
+        )
+        for video_id, cached in zip(video_ids, cached_counts):
+            if cached is None:
+                missing_ids.append(video_id)
+            else:
+                view_counts[video_id] = cached
+
+        if missing_ids:
+            def fetch_views():
+                with self.pool.client() as youtube:
+                    self.tracker.record("videos.list")
+                    return youtube.videos().list(part="statistics", id=",".join(missing_ids)).execute()
+
+            response = await resilient_call("youtube", lambda: asyncio.to_thread(fetch_views))
+            for item in response.get("items", []):
+                view_count = int(item["statistics"].get("viewCount", 0))
+                view_counts[item["id"]] = view_count
+                await self.stats_cache.set_async(hash_key("views", item["id"]), view_count)
+
+        return view_counts
+
+    def close(self) -> None:
+        self.search_cache.close()
+        self.stats_cache.close()
+        self.pool.close()
+
+
+def create_youtube_data_client(api_key: Optional[str]) -> Optional[YouTubeDataClient]:
+    if not api_key:
+        return None
+    return YouTubeDataClient(
+        pool=YouTubeClientPool(api_key, max_size=settings.YOUTUBE_CLIENT_POOL_SIZE),
+        search_cache=create_cache_backend(
+            settings.YOUTUBE_CACHE_BACKEND,
+            namespace="youtube_search",
+            ttl_seconds=settings.YOUTUBE_SEARCH_CACHE_TTL_SECONDS,
+            max_bytes=settings.YOUTUBE_CACHE_MAX_BYTES,
+        ),
+        stats_cache=create_cache_backend(
+            settings.YOUTUBE_CACHE_BACKEND,
+            namespace="youtube_view_counts",
+            ttl_seconds=settings.YOUTUBE_VIEW_COUNT_CACHE_TTL_SECONDS,
+            max_bytes=settings.YOUTUBE_CACHE_MAX_BYTES,
+        ),
+    )
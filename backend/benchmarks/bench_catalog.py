@@ -0,0 +1,83 @@
+"""
+Compares ProductCatalog lookups with the linear scans ProductService used before.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_catalog --sizes 1000 10000 50000
+"""
+import argparse
+import random
+import timeit
+from typing import List, Optional
+
+from app.schemas.product import Product
+from app.services.catalog import ProductCatalog
+
+CATEGORIES = ["laptop", "tablet", "smartphone", "camera", "headphones", "monitor", "keyboard", "speaker"]
+WORDS = ["pro", "air", "ultra", "mini", "max", "lite", "plus", "studio", "neo", "edge", "wave", "pixel"]
+
+
+def make_products(n: int, seed: int = 0) -> List[Product]:
+    rng = random.Random(seed)
+    products = []
+    for i in range(n):
+        name = " ".join(rng.choice(WORDS).title() for _ in range(3))
+        products.append(Product(
+            id=f"prod_{i:06d}",
+            name=f"{name} {i}",
+            price=round(rng.uniform(10, 3000), 2),
+            imageUrl=f"https://placehold.co/400x250?text={i}",
+            description=f"A {rng.choice(WORDS)} {rng.choice(CATEGORIES)} for {rng.choice(WORDS)} users.",
+            specifications={},
+            rating=round(rng.uniform(1, 5), 1),
+            reviewCount=rng.randint(0, 5000),
+            category=rng.choice(CATEGORIES),
+            tags=rng.sample(WORDS, 3),
+        ))
+    return products
+
+
+# The implementations ProductService used before the catalog.
+
+def scan_by_id(products: List[Product], product_id: str) -> Optional[Product]:
+    for product in products:
+        if product.id == product_id:
+            return product
+    return None
+
+
+def scan_by_category(products: List[Product], category: str) -> List[Product]:
+    return [p for p in products if p.category == category]
+
+
+def scan_search(products: List[Product], query: str) -> List[Product]:
+    lower_query = query.lower()
+    return [p for p in products if lower_query in p.name.lower() or lower_query in (p.description or "").lower()]
+
+
+def _per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def run(sizes: List[int]) -> None:
+    print(f"{'size':>8} {'operation':<12} {'scan (us)':>12} {'catalog (us)':>13} {'speedup':>8}")
+    for n in sizes:
+        products = make_products(n)
+        catalog = ProductCatalog(products)
+        ids = [p.id for p in random.Random(1).sample(products, min(n, 100))]
+        cases = [
+            ("get_by_id", lambda: [scan_by_id(products, i) for i in ids], lambda: [catalog.get(i) for i in ids], len(ids)),
+            ("category", lambda: scan_by_category(products, "tablet"), lambda: catalog.by_category("tablet"), 1),
+            ("search", lambda: scan_search(products, "Ultra"), lambda: catalog.search("Ultra"), 1),
+        ]
+        for name, scan, indexed, calls in cases:
+            number = max(1, 200_000 // (n * calls))
+            scan_us = _per_call_us(scan, number) / calls
+            indexed_us = _per_call_us(indexed, number * 10) / calls
+            print(f"{n:>8} {name:<12} {scan_us:>12.1f} {indexed_us:>13.2f} {scan_us / indexed_us:>7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    run(parser.parse_args().sizes)
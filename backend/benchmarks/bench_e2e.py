@@ -0,0 +1,278 @@
+"""
+Offline end-to-end load test of /summary, /analyze-needs, /battle and /chat.
+
+The real AnalyzeNeedsService runs against in-process fakes of Gemini, Imagen,
+Veo, YouTube and GCS (see benchmarks/fakes.py), so rate limiters, retries,
+caches and the Veo poller behave as in production while nothing touches the
+network. Requests go through the ASGI app (middleware and auth dependencies
+included) from N concurrent clients. Reports p50/p95/p99 latency, throughput,
+calls made to each fake backend, injected failures and retries.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_e2e --clients 8 --requests 40
+    python -m benchmarks.bench_e2e --endpoints summary chat --distinct-keys 5 --time-scale 0.1
+    python -m benchmarks.bench_e2e --endpoints battle --wait-videos --error-rate 0.05 --no-bursts
+
+`--time-scale` multiplies every simulated latency (0 removes them), which makes
+the run measure the backend's own overhead and the rate limiters.
+
+`--record PATH` also writes every external call to a cassette (see
+app/services/cassette.py); `--replay PATH` answers them from the cassette
+instead of the fakes, with their recorded timings scaled by --time-scale.
+Replay with the same endpoints, --requests and --distinct-keys as the recording:
+
+    python -m benchmarks.bench_e2e --endpoints summary analyze-needs --record .cassettes/bench.jsonl.gz
+    python -m benchmarks.bench_e2e --endpoints summary analyze-needs --replay .cassettes/bench.jsonl.gz
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.resilience import resilience
+from app.main import app, authenticate
+from app.services import analyze_needs, battle_jobs, cassette
+from benchmarks.fakes import DEFAULT_PROFILES, FakeBackends, install_fakes, offline_settings
+
+KEYWORDS = ["ワイヤレスイヤホン", "ノートパソコン", "電動歯ブラシ", "ロボット掃除機", "コーヒーメーカー",
+            "スマートウォッチ", "空気清浄機", "ゲーミングマウス", "ドライヤー", "モバイルバッテリー"]
+TAGS = ["デザイン性", "価格", "バッテリー", "軽量", "音質"]
+
+
+def _summary(i: int) -> Tuple[str, Dict[str, Any]]:
+    return "/api/v1/products/summary", {"keyword": KEYWORDS[i % len(KEYWORDS)] + _suffix(i), "tags": TAGS}
+
+
+def _analyze_needs(i: int) -> Tuple[str, Dict[str, Any]]:
+    return "/api/v1/products/analyze-needs", {"product_category": KEYWORDS[i % len(KEYWORDS)] + _suffix(i)}
+
+
+def _battle(i: int) -> Tuple[str, Dict[str, Any]]:
+    return "/api/v1/products/battle", {"product_name_1": f"Model {i}", "product_name_2": f"Model {i + 1}"}
+
+
+def _chat(i: int) -> Tuple[str, Dict[str, Any]]:
+    return "/api/v1/chat/message", {"message": f"{KEYWORDS[i % len(KEYWORDS)]}でおすすめは？ ({i})"}
+
+
+def _suffix(i: int) -> str:
+    return f" {i // len(KEYWORDS)}" if i >= len(KEYWORDS) else ""
+
+
+ENDPOINTS: Dict[str, Callable[[int], Tuple[str, Dict[str, Any]]]] = {
+    "summary": _summary,
+    "analyze-needs": _analyze_needs,
+    "battle": _battle,
+    "chat": _chat,
+}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return math.nan
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+class ScenarioResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.video_latencies: List[float] = []
+        self.video_statuses: Counter = Counter()
+        self.elapsed = 0.0
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.retries: Counter = Counter()
+        self.cassette: Counter = Counter()
+
+    def report(self, clients: int) -> None:
+        latencies = sorted(self.latencies)
+        print(f"{self.name}: {len(latencies)} requests, {clients} clients, {self.elapsed:.2f}s, "
+              f"{len(latencies) / self.elapsed:.2f} req/s")
+        print(f"  latency ms   {_latency_line(latencies)}")
+        print(f"  status       {_counter_line(self.statuses)}")
+        if self.video_latencies or self.video_statuses:
+            print(f"  video ms     {_latency_line(sorted(self.video_latencies))}")
+            print(f"  video status {_counter_line(self.video_statuses)}")
+        print(f"  ext. calls   {_counter_line(self.calls) or '-'}")
+        print(f"  injected     {_counter_line(self.errors) or '-'}")
+        print(f"  retries      {_counter_line(self.retries) or '-'}")
+        if self.cassette:
+            print(f"  cassette     {_counter_line(self.cassette)}")
+
+
+def _latency_line(latencies: List[float]) -> str:
+    if not latencies:
+        return "-"
+    return "  ".join(
+        f"{label} {percentile(latencies, q) * 1000:.0f}"
+        for label, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+    )
+
+
+def _counter_line(counter: Counter) -> str:
+    return ", ".join(f"{key}={value}" for key, value in sorted(counter.items()) if value)
+
+
+def _counters(backends: Optional[FakeBackends]) -> Tuple[Counter, Counter, Counter, Counter]:
+    """Calls and injected errors of the fakes, retries, and cassette counts, to be diffed around a scenario."""
+    active = cassette.active_cassette()
+    return (
+        Counter(backends.calls) if backends else Counter(),
+        Counter(backends.errors) if backends else Counter(),
+        Counter({name: stats["retries_total"] for name, stats in resilience.stats().items()}),
+        Counter(active.counts) if active else Counter(),
+    )
+
+
+async def _wait_for_video(client: httpx.AsyncClient, battle_id: str, poll_seconds: float, timeout: float) -> str:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        response = await client.get(f"/api/v1/products/battle/{battle_id}")
+        status = response.json().get("status") if response.status_code == 200 else f"http_{response.status_code}"
+        if status != battle_jobs.RENDERING:
+            return status
+        await asyncio.sleep(poll_seconds)
+    return "timeout"
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    backends: Optional[FakeBackends],
+    name: str,
+    clients: int,
+    requests: int,
+    distinct_keys: int,
+    wait_videos: bool,
+    video_timeout: float,
+) -> ScenarioResult:
+    result = ScenarioResult(name)
+    make_request = ENDPOINTS[name]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i % distinct_keys if distinct_keys else i)
+
+    async def worker() -> None:
+        while True:
+            try:
+                key = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            path, body = make_request(key)
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                status = str(response.status_code)
+            except Exception as e:
+                response, status = None, type(e).__name__
+            result.latencies.append(time.perf_counter() - start)
+            result.statuses[status] += 1
+            if wait_videos and response is not None and response.status_code == 202:
+                video_status = await _wait_for_video(
+                    client, response.json()["id"], poll_seconds=0.2, timeout=video_timeout
+                )
+                result.video_latencies.append(time.perf_counter() - start)
+                result.video_statuses[video_status] += 1
+
+    before = _counters(backends)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    result.elapsed = time.perf_counter() - start
+    result.calls, result.errors, result.retries, result.cassette = (
+        after - previous for after, previous in zip(_counters(backends), before)
+    )
+    return result
+
+
+async def run(
+    endpoints: List[str],
+    clients: int,
+    requests: int,
+    distinct_keys: int = 0,
+    time_scale: float = 1.0,
+    error_rate: float | None = None,
+    bursts: bool = True,
+    wait_videos: bool = False,
+    video_timeout: float = 600.0,
+    seed: int = 0,
+    record: Optional[str] = None,
+    replay: Optional[str] = None,
+) -> List[ScenarioResult]:
+    results = []
+    with contextlib.ExitStack() as stack:
+        if replay:
+            # No fakes: every external call is answered from the cassette.
+            backends = None
+            stack.enter_context(offline_settings(
+                CASSETTE_MODE=cassette.REPLAY, CASSETTE_PATH=replay, CASSETTE_REPLAY_LATENCY_SCALE=time_scale
+            ))
+        else:
+            profiles = {}
+            for backend, profile in DEFAULT_PROFILES.items():
+                if error_rate is not None:
+                    profile = profile._replace(error_rate=error_rate)
+                if not bursts:
+                    profile = profile._replace(burst_every_s=0.0)
+                profiles[backend] = profile
+            backends = FakeBackends(profiles, seed=seed, time_scale=time_scale)
+            stack.enter_context(install_fakes(backends))
+            if record:
+                stack.enter_context(offline_settings(CASSETTE_MODE=cassette.RECORD, CASSETTE_PATH=record))
+        saved_poll = settings.VEO_POLL_INITIAL_SECONDS, settings.VEO_POLL_MAX_SECONDS
+        # Poll as often relative to the (scaled) render time as production does.
+        settings.VEO_POLL_INITIAL_SECONDS *= time_scale
+        settings.VEO_POLL_MAX_SECONDS *= time_scale
+        app.dependency_overrides[authenticate] = lambda: "bench"
+        try:
+            # ASGITransport does not run the lifespan; build the service as the startup warm-up would.
+            await analyze_needs.init_analyze_needs_service()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for name in endpoints:
+                    results.append(await run_scenario(
+                        client, backends, name, clients, requests, distinct_keys, wait_videos, video_timeout
+                    ))
+        finally:
+            await analyze_needs.close_analyze_needs_service()
+            app.dependency_overrides.pop(authenticate, None)
+            settings.VEO_POLL_INITIAL_SECONDS, settings.VEO_POLL_MAX_SECONDS = saved_poll
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=40, help="requests per endpoint")
+    parser.add_argument("--distinct-keys", type=int, default=0,
+                        help="cycle through this many distinct inputs, to exercise the caches (0: all distinct)")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=None, help="override every backend's error rate")
+    parser.add_argument("--no-bursts", action="store_true", help="disable the periodic 429 bursts")
+    parser.add_argument("--wait-videos", action="store_true", help="also measure battles until the video is ready")
+    parser.add_argument("--seed", type=int, default=0)
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument("--record", metavar="PATH", help="write the external calls to a cassette")
+    recording.add_argument("--replay", metavar="PATH", help="answer the external calls from a cassette")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.getLogger("app").setLevel(args.log_level)
+    results = asyncio.run(run(
+        args.endpoints, args.clients, args.requests,
+        distinct_keys=args.distinct_keys, time_scale=args.time_scale, error_rate=args.error_rate,
+        bursts=not args.no_bursts, wait_videos=args.wait_videos, seed=args.seed,
+        record=args.record, replay=args.replay,
+    ))
+    for result in results:
+        result.report(args.clients)
@@ -0,0 +1,107 @@
+"""
+Measures product search latency on the n-gram index against the substring scan it replaced.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_search --sizes 10000 100000
+
+The synthetic catalog draws English words from a Zipf-distributed vocabulary and
+makes a third of the products Japanese. "cold" times the index itself, "cached"
+repeats a query against ProductCatalog.search, and "scan" is the old substring match.
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+from typing import Dict, List
+
+from app.schemas.product import Product
+from app.services.catalog import ProductCatalog
+from benchmarks.bench_catalog import scan_search
+
+JA_NAMES = ["ワイヤレスイヤホン", "ノートパソコン", "電動歯ブラシ", "ロボット掃除機", "コーヒーメーカー", "空気清浄機",
+            "スマートウォッチ", "ヘアドライヤー", "電気ケトル", "ゲーミングマウス", "モバイルバッテリー", "加湿器"]
+JA_TRAITS = ["軽量", "静音", "長時間バッテリー", "防水", "高画質", "コンパクト", "大容量", "急速充電", "折りたたみ", "抗菌"]
+CATEGORIES = ["laptop", "tablet", "smartphone", "camera", "headphones", "monitor", "keyboard", "speaker"]
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))))
+    return sorted(words)
+
+
+def make_search_products(n: int, vocab_size: int = 3000) -> List[Product]:
+    rng = random.Random(2)
+    vocabulary = make_vocabulary(vocab_size, rng)
+    # Zipf-like word frequencies, as in real product text.
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    products = []
+    for i in range(n):
+        if i % 3 == 0:
+            name = f"{rng.choice(JA_TRAITS)}{rng.choice(JA_NAMES)} {i}"
+            description = f"{rng.choice(JA_TRAITS)}で{rng.choice(JA_TRAITS)}な{rng.choice(JA_NAMES)}です。"
+            tags = rng.sample(JA_TRAITS, 2)
+        else:
+            words = rng.choices(vocabulary, weights, k=12)
+            name = " ".join(w.title() for w in words[:3]) + f" {i}"
+            description = " ".join(words[3:10])
+            tags = words[10:]
+        products.append(Product(
+            id=f"prod_{i:06d}", name=name, price=100.0, imageUrl="", description=description,
+            specifications={"Model": f"{rng.choice(string.ascii_uppercase)}{rng.choice(string.ascii_uppercase)}-{i % 997}"}, rating=4.0,
+            reviewCount=0, category=rng.choice(CATEGORIES), tags=tags,
+        ))
+    return products
+
+
+def make_queries(products: List[Product]) -> Dict[str, str]:
+    rng = random.Random(3)
+    english = [p for p in products if p.description and p.description.isascii()]
+    sample = rng.choice(english)
+    words = (sample.description or "").split()
+    return {
+        "rare word": words[-1],
+        "two words": f"{words[0]} {words[-1]}",
+        "name prefix": sample.name.split()[0][:4],
+        "japanese": "イヤホン",
+        "hiragana": "いやほん",
+        "japanese two terms": "静音 掃除機",
+        "common word": make_vocabulary(3000, random.Random(2))[0],
+    }
+
+
+def _time_ms(fn, rounds: int) -> List[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run(sizes: List[int], rounds: int) -> None:
+    for n in sizes:
+        products = make_search_products(n)
+        start = time.perf_counter()
+        catalog = ProductCatalog(products)
+        build_s = time.perf_counter() - start
+        index = catalog._search_index
+        print(f"--- {n} products (index build {build_s:.1f}s) ---")
+        print(f"  {'query':<20} {'matches':>8} {'cold p50':>10} {'cached p50':>11} {'scan p50':>10}")
+        for label, query in make_queries(products).items():
+            matches = len(index.search(query, limit=n))
+            cold = statistics.median(_time_ms(lambda: index.search(query, 20), rounds))
+            cached = statistics.median(_time_ms(lambda: catalog.search(query, 20), rounds))
+            scan = statistics.median(_time_ms(lambda: scan_search(products, query), max(1, rounds // 3)))
+            print(f"  {label:<20} {matches:>8} {cold:>8.2f}ms {cached:>9.3f}ms {scan:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--rounds", type=int, default=9)
+    args = parser.parse_args()
+    run(args.sizes, args.rounds)
@@ -0,0 +1,85 @@
+"""
+Serialization time and bytes on the wire for a representative /products/summary payload.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization
+"""
+import argparse
+import gzip
+import json
+import timeit
+
+from app.api.v1.products import SummaryResponse
+from app.core.compression import brotli
+from app.core.responses import dumps
+
+REASON = (
+    "長時間バッテリーと軽量ボディを両立しており、カフェや出張先での作業が多いユーザーに最適です。"
+    "レビュー動画では、キーボードの打鍵感と静音性、ディスプレイの発色の良さが高く評価されていました。"
+)
+
+
+def make_summary_payload(products: int = 5) -> dict:
+    return {
+        "recommended_products": [
+            {
+                "rank": i + 1,
+                "recommendation_reason": REASON * 2,
+                "id": f"prod_{i:03d}",
+                "name": f"モバイルノートPC モデル{i}",
+                "price": 129800.0 + i * 1000,
+                "description": REASON,
+                "specs": {"CPU": "Core Ultra 7", "メモリ": "16GB", "重量": "約1.1kg", "バッテリー": "約20時間"},
+                "specifications": {"ディスプレイ": "14インチ 2.8K OLED", "ストレージ": "1TB SSD", "ポート": ["USB-C", "HDMI"]},
+                "rating": 4.5,
+                "reviewCount": 1200 + i,
+                "category": "laptop",
+                "tags": ["軽量", "長時間バッテリー", "静音"],
+                "source_urls": [
+                    f"https://www.youtube.com/watch?v=abc{i}{j}&t=120s" for j in range(3)
+                ],
+            }
+            for i in range(products)
+        ]
+    }
+
+
+def _us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def run(products: int) -> None:
+    model = SummaryResponse(**make_summary_payload(products))
+    encoded = model.model_dump(mode="json")
+
+    # FastAPI serializes a response_model with pydantic, then the response class renders the result.
+    def stdlib():
+        return json.dumps(model.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def fast():
+        return dumps(model.model_dump(mode="json"))
+
+    body = fast()
+    print(f"payload: {products} recommended products")
+    print(f"  model_dump + json.dumps   : {_us(stdlib, 500):8.1f}us  (JSONResponse)")
+    print(f"  model_dump + orjson       : {_us(fast, 500):8.1f}us  (FastJSONResponse)")
+    print(f"  json.dumps only           : {_us(lambda: json.dumps(encoded, ensure_ascii=False), 500):8.1f}us")
+    print(f"  orjson.dumps only         : {_us(lambda: dumps(encoded), 500):8.1f}us")
+    print(f"  bytes identity            : {len(body):8d}")
+    print(f"  bytes ensure_ascii=True   : {len(json.dumps(encoded).encode()):8d}  (stdlib default outside FastAPI)")
+    for level in (1, 6):
+        size = len(gzip.compress(body, compresslevel=level))
+        t = _us(lambda: gzip.compress(body, compresslevel=level), 200)
+        print(f"  bytes gzip level {level}        : {size:8d}  ({t:.0f}us)")
+    if brotli is not None:
+        for quality in (4, 11):
+            size = len(brotli.compress(body, quality=quality))
+            t = _us(lambda: brotli.compress(body, quality=quality), 20 if quality > 9 else 200)
+            print(f"  bytes brotli quality {quality:<2}   : {size:8d}  ({t:.0f}us)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5)
+    run(parser.parse_args().products)
@@ -0,0 +1,95 @@
+"""
+Cold-start import time of the backend, per module.
+
+Each measurement runs in a fresh interpreter with `python -X importtime`, so
+nothing is cached in sys.modules. Reports the cost of `import app.main` (what
+Cloud Run pays before the port opens) and, separately, of the Google SDKs that
+are now loaded lazily by the startup warm-up or on first use.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --top 30 --module app.services.analyze_needs
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Imported by AnalyzeNeedsService on first use; not part of `import app.main`.
+LAZY_MODULES = (
+    "vertexai",
+    "vertexai.generative_models",
+    "vertexai.preview.vision_models",
+    "google.cloud.storage",
+    "google.genai",
+    "googleapiclient.discovery",
+    "google.auth.transport.requests",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """Returns ({module: (self_us, cumulative_us)}, modules imported directly by `module`) for one cold import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times: Dict[str, Tuple[int, int]] = {}
+    children: List[str] = []
+    direct: List[str] = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        times[name] = (int(self_us), int(cumulative_us))
+        # -X importtime lists a module after everything it imported, indented two spaces deeper.
+        if len(indent) == 3:
+            children.append(name)
+        elif len(indent) == 1:
+            if name == module:
+                direct = children
+            children = []
+    return times, direct
+
+
+def run(module: str, top: int, repeat: int) -> None:
+    runs = [import_times(module) for _ in range(repeat)]
+    totals = [times[module][1] for times, _ in runs]
+    # Report the fastest run's breakdown; the slower ones mostly measure a cold page cache.
+    times, direct = min(runs, key=lambda run: run[0][module][1])
+
+    print(f"import {module}: min {min(totals) / 1000:.0f}ms, median {statistics.median(totals) / 1000:.0f}ms "
+          f"({repeat} fresh interpreters)")
+    print(f"  direct imports of {module} (cumulative):")
+    for name in sorted(direct, key=lambda n: -times[n][1])[:top]:
+        print(f"    {times[name][1] / 1000:8.1f}ms  {name}")
+    print(f"  slowest modules (self time):")
+    for name, (self_us, _) in sorted(times.items(), key=lambda item: -item[1][0])[:top]:
+        print(f"    {self_us / 1000:8.1f}ms  {name}")
+
+    loaded = [name for name in LAZY_MODULES if name in times]
+    if loaded:
+        print(f"  WARNING: loaded eagerly by {module}: {', '.join(loaded)}")
+
+    print("deferred to the startup warm-up / first use (each in a fresh interpreter):")
+    for name in LAZY_MODULES:
+        try:
+            lazy_times, _ = import_times(name)
+        except subprocess.CalledProcessError:
+            print(f"    {'n/a':>8}    {name} (not installed)")
+            continue
+        print(f"    {lazy_times[name][1] / 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.module, args.top, args.repeat)
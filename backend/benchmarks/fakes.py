@@ -0,0 +1,474 @@
+"""
+In-process fakes of the external backends used by AnalyzeNeedsService:
+Gemini and Imagen (Vertex AI SDK), Veo (google-genai), the YouTube Data API
+and GCS, plus the google.auth calls made for URL signing.
+
+Each backend has a BackendProfile: a log-normal latency distribution, a random
+error rate (HTTP 503) and periodic 429 bursts. The fakes override the lazily
+imported SDK modules (app.core.lazy.override_module), so the real service code (rate limiters, retries,
+caches, the Veo poller) runs unchanged and nothing touches the network.
+
+    backends = FakeBackends(DEFAULT_PROFILES)
+    with install_fakes(backends):
+        ...  # create the service and drive the app
+"""
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.lazy import override_module
+from app.services import analyze_needs
+
+
+class FakeAPIError(Exception):
+    """Carries an HTTP status in `code`, like the google-api-core / googleapiclient errors."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class BackendProfile(NamedTuple):
+    """Latency (log-normal with the given median and p95) and failure behaviour of one backend."""
+    median_ms: float
+    p95_ms: float
+    error_rate: float = 0.0
+    # Every `burst_every_s` seconds, all calls fail with 429 for `burst_duration_s` seconds.
+    burst_every_s: float = 0.0
+    burst_duration_s: float = 0.0
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+# Rough shapes of the real services; Veo is a render time, not a request latency.
+DEFAULT_PROFILES: Dict[str, BackendProfile] = {
+    "gemini": BackendProfile(median_ms=900, p95_ms=2500, error_rate=0.01),
+    "gemini_video": BackendProfile(median_ms=6000, p95_ms=12000, error_rate=0.02),
+    "imagen": BackendProfile(median_ms=3000, p95_ms=6000, error_rate=0.02, burst_every_s=30, burst_duration_s=3),
+    "veo": BackendProfile(median_ms=400, p95_ms=900),
+    "veo_render": BackendProfile(median_ms=45000, p95_ms=70000),
+    "youtube": BackendProfile(median_ms=150, p95_ms=400),
+    "gcs": BackendProfile(median_ms=40, p95_ms=120),
+}
+
+
+class FakeBackends:
+    """Shared state of every fake: profiles, call/error counters, stored blobs and Veo operations."""
+
+    def __init__(self, profiles: Dict[str, BackendProfile], seed: int = 0, time_scale: float = 1.0):
+        self.profiles = {**DEFAULT_PROFILES, **profiles}
+        self.time_scale = time_scale
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.blobs: Dict[str, bytes] = {}
+        self.operations: Dict[str, float] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._operation_ids = itertools.count(1)
+
+    def _begin(self, backend: str) -> float:
+        """Counts the call, raises an injected failure if due, and returns the latency to simulate."""
+        profile = self.profiles[backend]
+        with self._lock:
+            self.calls[backend] += 1
+            latency = profile.sample_seconds(self._rng) * self.time_scale
+            fail = self._rng.random() < profile.error_rate
+        burst_every = profile.burst_every_s * self.time_scale
+        if burst_every > 0:
+            phase = (time.monotonic() - self._started) % burst_every
+            if phase < profile.burst_duration_s * self.time_scale:
+                self.errors[f"{backend}_429"] += 1
+                raise FakeAPIError(429, "RESOURCE_EXHAUSTED (injected burst)")
+        if fail:
+            self.errors[f"{backend}_503"] += 1
+            # Fail after part of the latency, as a real timeout or reset would.
+            raise _DelayedError(latency / 2, FakeAPIError(503, "UNAVAILABLE (injected)"))
+        return latency
+
+    async def call_async(self, backend: str) -> None:
+        try:
+            latency = self._begin(backend)
+        except _DelayedError as e:
+            await asyncio.sleep(e.delay)
+            raise e.error
+        await asyncio.sleep(latency)
+
+    def call_sync(self, backend: str) -> None:
+        try:
+            latency = self._begin(backend)
+        except _DelayedError as e:
+            time.sleep(e.delay)
+            raise e.error
+        time.sleep(latency)
+
+    def render_seconds(self) -> float:
+        with self._lock:
+            return self.profiles["veo_render"].sample_seconds(self._rng) * self.time_scale
+
+
+class _DelayedError(Exception):
+    def __init__(self, delay: float, error: Exception):
+        self.delay = delay
+        self.error = error
+
+
+# --- Gemini (vertexai.generative_models) ---
+
+def _response(text: str = "", function_call: Optional[Dict[str, Any]] = None) -> Any:
+    call = SimpleNamespace(name=function_call["name"], args=function_call["args"]) if function_call else None
+    part = SimpleNamespace(text=text, function_call=call)
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+def _prompt_text(contents: Any) -> str:
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(c for c in contents if isinstance(c, str))
+    return contents if isinstance(contents, str) else ""
+
+
+def _has_video(contents: Any) -> bool:
+    return isinstance(contents, (list, tuple)) and any(isinstance(c, dict) and "file_data" in c for c in contents)
+
+
+def _video_id(contents: Any) -> str:
+    for c in contents:
+        if isinstance(c, dict) and "file_data" in c:
+            return c["file_data"]["file_uri"].split("v=")[-1]
+    return "unknown"
+
+
+def _archetypes_json(prompt: str) -> str:
+    # Tied to the prompt, so that different categories get different image prompts (and images).
+    tag = zlib.crc32(prompt.encode())
+    names = ["携帯性重視タイプ", "コスパ重視タイプ", "デザイン重視タイプ", "多機能タイプ"]
+    return json.dumps({"user_archetypes": [
+        {
+            "id": f"type-{i}", "name": name, "description": f"{name}の説明 ({tag})",
+            "characteristics": ["軽量", "長時間"], "sampleProducts": [f"サンプル商品{i}"],
+        }
+        for i, name in enumerate(names)
+    ]}, ensure_ascii=False)
+
+
+def _batch_prompts_json(prompt: str) -> str:
+    count = len(re.findall(r'"index": \d+', prompt))
+    return json.dumps({"prompts": [
+        {"index": i, "positive_prompt": f"a cute pastel 3D illustration of product concept {i} ({zlib.crc32(prompt.encode())})"}
+        for i in range(count)
+    ]})
+
+
+def _video_products_json(video_id: str) -> str:
+    # Neighbouring videos review some of the same products, like real review videos do.
+    seed = sum(map(ord, video_id))
+    return json.dumps({"products": [
+        {
+            "name": f"Model {(seed + k) % 7}", "price": 10000 + 1000 * ((seed + k) % 7),
+            "description": "動画で紹介された商品", "specs": {"重量": "150g", "バッテリー": "20時間"},
+            "specifications": {"デザイン性": 4, "価格": 3}, "category": "earphones", "tags": ["軽量"],
+        }
+        for k in range(3)
+    ]}, ensure_ascii=False)
+
+
+def _recommendation_json(prompt: str) -> str:
+    ids = list(dict.fromkeys(re.findall(r'"id": "(product-[^"]+)"', prompt)))[:10]
+    return json.dumps({"recommended_products": [
+        {
+            "rank": rank, "recommendation_reason": "バランスが良い", "id": product_id, "name": product_id,
+            "price": 12000, "description": "おすすめ商品", "specs": {"重量": "150g"},
+            "specifications": {"デザイン性": 4}, "rating": 4.5, "reviewCount": 1000 * rank,
+            "category": "earphones", "tags": ["軽量"], "source_urls": ["https://www.youtube.com/watch?v=fake"],
+        }
+        for rank, product_id in enumerate(ids, 1)
+    ]}, ensure_ascii=False)
+
+
+def _battle_json() -> str:
+    return json.dumps({
+        "product1_description": ["軽い", "速い", "安い"],
+        "product2_description": ["強い", "長持ち", "美しい"],
+    }, ensure_ascii=False)
+
+
+def _image_prompt_json() -> str:
+    return json.dumps({"subject": "概念", "positive_prompt": f"a cute pastel 3D product concept {time.monotonic_ns()}",
+                       "negative_prompt": "no logos"})
+
+
+def _gemini_text(prompt: str) -> str:
+    if "user_archetypes" in prompt:
+        return _archetypes_json(prompt)
+    if '"prompts"' in prompt:
+        return _batch_prompts_json(prompt)
+    if "recommended_products" in prompt:
+        return _recommendation_json(prompt)
+    if "product1_description" in prompt:
+        return _battle_json()
+    if "YouTube検索に最も適した" in prompt:
+        match = re.search(r'文章: "(.*)"', prompt)
+        return match.group(1) if match else "イヤホン"
+    if "カンマ区切り" in prompt:
+        return "デザイン性,価格"
+    return "pong"
+
+
+class FakeGenerativeModel:
+    backends: FakeBackends
+
+    def __init__(self, model_name: str, tools: Any = None, generation_config: Any = None, **kwargs: Any):
+        self.model_name = model_name
+        self.tools = tools
+
+    async def generate_content_async(self, contents: Any, generation_config: Any = None, **kwargs: Any) -> Any:
+        if _has_video(contents):
+            await self.backends.call_async("gemini_video")
+            return _response(_video_products_json(_video_id(contents)))
+        await self.backends.call_async("gemini")
+        return _response(_gemini_text(_prompt_text(contents)))
+
+    def start_chat(self, history: Any = None) -> "FakeChatSession":
+        return FakeChatSession(self.backends)
+
+
+class FakeChatSession:
+    """Chat with tools: the first turn asks for a tool call, the turn after the tool result answers."""
+
+    def __init__(self, backends: FakeBackends):
+        self.backends = backends
+
+    async def send_message_async(self, message: Any) -> Any:
+        await self.backends.call_async("gemini")
+        if isinstance(message, dict) and "function_response" in message:
+            if message["function_response"]["name"] == "get_policy_text":
+                return _response(_image_prompt_json())
+            return _response("ノイズキャンセリング重視ならこちらがおすすめです。")
+        if "get_policy_text" in message:
+            return _response(function_call={"name": "get_policy_text", "args": {}})
+        return _response(function_call={"name": "search_youtube_videos", "args": {"query": "イヤホン レビュー"}})
+
+
+def _fake_generative_models(backends: FakeBackends) -> Any:
+    model = type("GenerativeModel", (FakeGenerativeModel,), {"backends": backends})
+    return SimpleNamespace(
+        GenerativeModel=model,
+        Tool=lambda *args, **kwargs: SimpleNamespace(args=args, kwargs=kwargs),
+        FunctionDeclaration=lambda **kwargs: SimpleNamespace(**kwargs),
+        Content=lambda role, parts: {"role": role, "parts": parts},
+        Part=SimpleNamespace(
+            from_dict=lambda d: d,
+            from_text=lambda text: {"text": text},
+            from_function_response=lambda name, response: {"function_response": {"name": name, "response": response}},
+        ),
+    )
+
+
+# --- Imagen (vertexai.preview.vision_models) ---
+
+def _fake_vision_models(backends: FakeBackends) -> Any:
+    class FakeImageGenerationModel:
+        @classmethod
+        def from_pretrained(cls, model_name: str) -> "FakeImageGenerationModel":
+            return cls()
+
+        def generate_images(self, prompt: str, number_of_images: int = 1) -> Any:
+            backends.call_sync("imagen")
+            image = SimpleNamespace(_image_bytes=b"\x89PNG fake " + prompt.encode()[:64])
+            return SimpleNamespace(images=[image] * number_of_images)
+
+    return SimpleNamespace(ImageGenerationModel=FakeImageGenerationModel)
+
+
+# --- GCS (google.cloud.storage) and signing (google.auth) ---
+
+def _fake_storage(backends: FakeBackends) -> Any:
+    class FakeBlob:
+        def __init__(self, bucket: str, name: str):
+            self.key = f"{bucket}/{name}"
+
+        def exists(self) -> bool:
+            backends.call_sync("gcs")
+            return self.key in backends.blobs
+
+        def upload_from_string(self, data: bytes, content_type: str = "", if_generation_match: Optional[int] = None):
+            backends.call_sync("gcs")
+            backends.blobs.setdefault(self.key, data)
+
+        def generate_signed_url(self, **kwargs: Any) -> str:
+            # Signing is local CPU work (plus a signBlob call with impersonation); count it without latency.
+            backends.calls["gcs_sign"] += 1
+            return f"https://storage.example/{self.key}?X-Goog-Signature=fake"
+
+    class FakeBucket:
+        def __init__(self, name: str):
+            self.name = name
+
+        def blob(self, name: str) -> FakeBlob:
+            return FakeBlob(self.name, name)
+
+    class FakeStorageClient:
+        def __init__(self, credentials: Any = None):
+            pass
+
+        def bucket(self, name: str) -> FakeBucket:
+            return FakeBucket(name)
+
+        def close(self) -> None:
+            pass
+
+    return SimpleNamespace(Client=FakeStorageClient)
+
+
+class _FakeCredentials:
+    token = "fake-token"
+    expiry = None
+
+    def refresh(self, request: Any) -> None:
+        pass
+
+
+class _FakeImpersonatedCredentials(_FakeCredentials):
+    def __init__(self, source_credentials: Any, target_principal: str, target_scopes: List[str]):
+        self._source_credentials = source_credentials
+
+
+# --- Veo (google.genai) ---
+
+def _fake_genai(backends: FakeBackends) -> Any:
+    class FakeModels:
+        def generate_videos(self, model: str, prompt: str, config: Any) -> Any:
+            backends.call_sync("veo")
+            name = f"operations/fake-{next(backends._operation_ids)}"
+            backends.operations[name] = time.monotonic() + backends.render_seconds()
+            return SimpleNamespace(name=name, done=False, output_gcs_uri=config.output_gcs_uri)
+
+    class FakeOperations:
+        def get(self, operation: Any) -> Any:
+            backends.calls["veo_poll"] += 1
+            if time.monotonic() < backends.operations[operation.name]:
+                return operation
+            uri = f"{operation.output_gcs_uri}/sample_0.mp4"
+            video = SimpleNamespace(video=SimpleNamespace(uri=uri))
+            return SimpleNamespace(name=operation.name, done=True, error=None,
+                                   response=SimpleNamespace(generated_videos=[video]))
+
+    class FakeGenaiClient:
+        def __init__(self, **kwargs: Any):
+            self.models = FakeModels()
+            self.operations = FakeOperations()
+
+        def close(self) -> None:
+            pass
+
+    return SimpleNamespace(Client=FakeGenaiClient)
+
+
+# --- YouTube Data API (googleapiclient.discovery) ---
+
+def _fake_discovery(backends: FakeBackends) -> Any:
+    class FakeRequest:
+        def __init__(self, result: Any):
+            self._result = result
+
+        def execute(self) -> Dict[str, Any]:
+            backends.call_sync("youtube")
+            return self._result()
+
+    class FakeYouTube:
+        def search(self) -> Any:
+            def search_list(q: str, maxResults: int = 5, **kwargs: Any) -> FakeRequest:
+                # A small pool of video ids, so that different queries share some videos.
+                base = sum(map(ord, q)) % 20
+                return FakeRequest(lambda: {"items": [
+                    {"id": {"videoId": f"vid{(base + i) % 20:03d}"},
+                     "snippet": {"title": f"{q} レビュー {i}", "channelTitle": "fake channel"}}
+                    for i in range(maxResults)
+                ]})
+            return SimpleNamespace(list=search_list)
+
+        def videos(self) -> Any:
+            def videos_list(part: str, id: str) -> FakeRequest:
+                return FakeRequest(lambda: {"items": [
+                    {"id": video_id, "statistics": {"viewCount": str(1000 + sum(map(ord, video_id)))}}
+                    for video_id in id.split(",")
+                ]})
+            return SimpleNamespace(list=videos_list)
+
+        def close(self) -> None:
+            pass
+
+    return SimpleNamespace(build=lambda *args, **kwargs: FakeYouTube())
+
+
+# What the real (non-mock) service needs from Settings to start without any Google project.
+OFFLINE_SETTINGS: Dict[str, Any] = {
+    "ENVIRONMENT": "production",
+    "GCP_PROJECT_ID": "fake-project",
+    "VERTEX_AI_MODEL_REGION": "us-central1",
+    "GCS_BUCKET_NAME": "fake-bucket",
+    "GCP_IAM_SERVICE_ACCOUNT_EMAIL": "signer@fake-project.iam.gserviceaccount.com",
+    "GOOGLE_APPLICATION_CREDENTIALS": None,
+    "YOUTUBE_API_KEY": "fake-key",
+    "VEO_MODEL_NAME": "veo-fake",
+    "VIDEO_CACHE_BACKEND": "memory",
+    "YOUTUBE_CACHE_BACKEND": "memory",
+}
+
+
+@contextlib.contextmanager
+def offline_settings(**overrides: Any) -> Iterator[None]:
+    """Applies OFFLINE_SETTINGS (and `overrides`) to Settings, restoring them on exit."""
+    values = {**OFFLINE_SETTINGS, **overrides}
+    saved = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+@contextlib.contextmanager
+def install_fakes(backends: FakeBackends) -> Iterator[FakeBackends]:
+    """
+    Serves the fakes in place of the lazily imported SDK modules and points
+    Settings at the real (non-mock) service. Everything is restored on exit.
+    """
+    fakes = {
+        "vertexai": SimpleNamespace(init=lambda **kwargs: None),
+        "vertexai.generative_models": _fake_generative_models(backends),
+        "vertexai.preview.vision_models": _fake_vision_models(backends),
+        "google.cloud.storage": _fake_storage(backends),
+        "google.genai": _fake_genai(backends),
+        "google.genai.types": SimpleNamespace(GenerateVideosConfig=lambda **kwargs: SimpleNamespace(**kwargs)),
+        "googleapiclient.discovery": _fake_discovery(backends),
+        "google.auth": SimpleNamespace(default=lambda: (_FakeCredentials(), "fake-project")),
+        "google.auth.impersonated_credentials": SimpleNamespace(Credentials=_FakeImpersonatedCredentials),
+        "google.auth.transport.requests": SimpleNamespace(Request=lambda: None),
+    }
+    saved = {name: override_module(name, fake) for name, fake in fakes.items()}
+    analyze_needs.models.clear()
+    try:
+        with offline_settings():
+            yield backends
+    finally:
+        for name, previous in saved.items():
+            override_module(name, previous)
+        analyze_needs.models.clear()
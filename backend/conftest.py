@@ -10,6 +10,7 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 from app.main import app
+from app.core.config import settings
 
 @pytest.fixture(scope="session")
 def client(monkeypatch_session):
@@ -20,6 +21,9 @@ def client(monkeypatch_session):
     # 1. Set test credentials as environment variables
     monkeypatch_session.setenv("BASIC_AUTH_USERNAME", "testuser")
     monkeypatch_session.setenv("BASIC_AUTH_PASSWORD", "testpass")
+    # Settings are read at import time, so patch the loaded instance as well.
+    monkeypatch_session.setattr(settings, "BASIC_AUTH_USERNAME", "testuser")
+    monkeypatch_session.setattr(settings, "BASIC_AUTH_PASSWORD", "testpass")
 
     # 2. Create the TestClient instance
     test_client = TestClient(app)
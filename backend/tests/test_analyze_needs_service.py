@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import MemoryCacheBackend
+from app.core.config import settings
+from app.main import app
+from app.services import analyze_needs, model_registry
+from app.services.analyze_needs import MockAnalyzeNeedsService, get_analyze_needs_service
+from app.services.video_cache import VideoExtractionCache
+
+
+def test_service_is_reused_across_requests():
+    first = get_analyze_needs_service()
+    second = get_analyze_needs_service()
+    assert first is second
+    assert isinstance(first, MockAnalyzeNeedsService)
+
+
+def test_lifespan_creates_and_closes_service():
+    analyze_needs._service_instance = None
+    async def warmed_up_service():
+        return await app.state.analyze_needs_warm_up
+
+    with TestClient(app) as client:
+        service = client.portal.call(warmed_up_service)
+        assert service is get_analyze_needs_service()
+    assert analyze_needs._service_instance is None
+
+
+class FakePromptModel:
+    calls = 0
+    response_text = ""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def generate_content_async(self, contents):
+        FakePromptModel.calls += 1
+        return type("Response", (), {"text": FakePromptModel.response_text})()
+
+
+@pytest.fixture
+def fake_prompt_model(monkeypatch):
+    monkeypatch.setattr(model_registry, "generative_models", SimpleNamespace(GenerativeModel=FakePromptModel))
+    analyze_needs.models.clear()
+    yield FakePromptModel
+    analyze_needs.models.clear()
+
+
+def test_image_prompts_are_generated_in_one_batched_call(fake_prompt_model):
+    FakePromptModel.calls = 0
+    FakePromptModel.response_text = (
+        '{"prompts": [{"index": 0, "positive_prompt": "a cute kettle"}, {"index": 2, "positive_prompt": "a tiny kettle"}]}'
+    )
+    service = analyze_needs.AnalyzeNeedsService.__new__(analyze_needs.AnalyzeNeedsService)
+    archetypes = [{"id": "a", "description": "x"}, {"id": "b", "description": "y"}, {"id": "c", "description": "z"}]
+
+    prompts = asyncio.run(service._generate_image_prompts_batch_async(archetypes))
+
+    assert FakePromptModel.calls == 1
+    # Archetypes missing from the batch are left to the per-archetype fallback.
+    assert prompts == ["a cute kettle", None, "a tiny kettle"]
+
+
+def test_unparseable_batch_falls_back_for_every_archetype(fake_prompt_model):
+    FakePromptModel.response_text = "not json"
+    service = analyze_needs.AnalyzeNeedsService.__new__(analyze_needs.AnalyzeNeedsService)
+
+    assert asyncio.run(service._generate_image_prompts_batch_async([{"id": "a"}, {"id": "b"}])) == [None, None]
+
+
+def test_summaries_do_not_leak_into_the_cached_video_result():
+    service = analyze_needs.AnalyzeNeedsService.__new__(analyze_needs.AnalyzeNeedsService)
+    service.video_cache = VideoExtractionCache(MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=60))
+    url = "https://www.youtube.com/watch?v=abc123"
+    key = service.video_cache.make_key(
+        "abc123", "イヤホン", ["音質"], settings.VIDEO_ANALYSIS_START_OFFSET, settings.VIDEO_ANALYSIS_END_OFFSET,
+        analyze_needs.models.name("video_summary"),
+    )
+    asyncio.run(service.video_cache.set(key, {"products": [{"name": "Earbuds X"}]}))
+
+    async def view_counts(video_ids):
+        return {video_id: 100 for video_id in video_ids}
+
+    async def recommend(products):
+        return {"recommended_products": products}
+
+    service._get_video_view_counts_async = view_counts
+    service._generate_final_recommendation_async = recommend
+
+    async def summarize():
+        async for event, data in service._stream_video_summaries([url], ["音質"], "イヤホン"):
+            if event == "result":
+                return data["recommended_products"]
+
+    first, second = asyncio.run(summarize()), asyncio.run(summarize())
+    assert first[0]["source_urls"] == [url] and second[0]["source_urls"] == [url]
+    assert first[0]["id"] != second[0]["id"]
+    assert asyncio.run(service.video_cache.get(key)) == {"products": [{"name": "Earbuds X"}]}
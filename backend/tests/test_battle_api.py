@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.cache import MemoryCacheBackend
+from app.main import app
+from app.services import battle_jobs
+from app.services.analyze_needs import get_analyze_needs_service
+from app.services.battle_jobs import BattleJobStore, get_battle_job_store
+
+
+class FakeBattleService:
+    async def start_product_battle(self, product_name_1, product_name_2, job_store):
+        job = {
+            "id": "battle-test",
+            "product1_id": "dummy-prod-1",
+            "product1_name": product_name_1,
+            "product1_description": ["速い"],
+            "product2_id": "dummy-prod-2",
+            "product2_name": product_name_2,
+            "product2_description": ["軽い"],
+            "video_url": None,
+            "status": battle_jobs.RENDERING,
+            "error": None,
+        }
+        await job_store.save(job)
+        return job
+
+
+@pytest.fixture
+def job_store():
+    store = BattleJobStore(MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=60))
+    app.dependency_overrides[get_analyze_needs_service] = lambda: FakeBattleService()
+    app.dependency_overrides[get_battle_job_store] = lambda: store
+    yield store
+    app.dependency_overrides = {}
+
+
+def test_post_battle_returns_immediately_with_rendering_status(client, job_store):
+    response = client.post(
+        "/api/v1/products/battle",
+        json={"product_name_1": "製品A", "product_name_2": "製品B"},
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "rendering"
+    assert response.json()["video_url"] is None
+    assert response.json()["product1_description"] == ["速い"]
+
+
+def test_get_battle_returns_video_url_when_completed(client, job_store):
+    client.post("/api/v1/products/battle", json={"product_name_1": "製品A", "product_name_2": "製品B"})
+    asyncio.run(job_store.update("battle-test", status=battle_jobs.COMPLETED, video_url="https://example.com/video.mp4"))
+
+    response = client.get("/api/v1/products/battle/battle-test")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["video_url"] == "https://example.com/video.mp4"
+
+
+def test_get_battle_not_found(client, job_store):
+    response = client.get("/api/v1/products/battle/battle-unknown")
+    assert response.status_code == 404
+
+
+def test_battle_events_stream_ends_on_terminal_status(client, job_store):
+    client.post("/api/v1/products/battle", json={"product_name_1": "製品A", "product_name_2": "製品B"})
+    asyncio.run(job_store.update("battle-test", status=battle_jobs.FAILED, error="Veo error"))
+
+    response = client.get("/api/v1/products/battle/battle-test/events")
+    assert response.status_code == 200
+    blocks = response.text.strip().split("\n\n")
+    assert len(blocks) == 1
+    data = json.loads(blocks[0].split("data: ", 1)[1])
+    assert data["status"] == "failed"
+    assert data["error"] == "Veo error"
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.core.config import settings
+from app.services import analyze_needs
+from benchmarks import bench_e2e
+
+
+def test_endpoints_run_offline_against_the_fakes():
+    # No simulated latency or injected failures: checks that the fakes still match what the service calls.
+    results = asyncio.run(bench_e2e.run(
+        ["summary", "chat", "battle"], clients=2, requests=2,
+        time_scale=0, error_rate=0, bursts=False, wait_videos=True, video_timeout=10,
+    ))
+    summary, chat, battle = results
+
+    assert summary.statuses == {"200": 2}
+    assert summary.calls["gemini_video"] > 0 and summary.calls["youtube"] > 0
+    assert chat.statuses == {"200": 2}
+    assert battle.statuses == {"202": 2}
+    assert battle.video_statuses == {"completed": 2}
+    assert battle.calls["veo"] == 2
+
+    # Everything patched for the run is restored.
+    assert settings.ENVIRONMENT == "development"
+    assert analyze_needs._service_instance is None
+    assert not bench_e2e.app.dependency_overrides
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert bench_e2e.percentile(values, 50) == 50
+    assert bench_e2e.percentile(values, 99) == 99
+    assert bench_e2e.percentile(values, 100) == 100
+    assert bench_e2e.percentile([3.0], 95) == 3.0
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend, TTLCache, create_cache_backend, json_size
+from app.services.video_cache import VideoExtractionCache
+
+
+def test_get_returns_stored_value():
+    cache = TTLCache(max_bytes=1024, ttl_seconds=60)
+    cache.set("トースター", {"user_archetypes": []})
+    assert cache.get("トースター") == {"user_archetypes": []}
+    assert cache.get("ノートPC") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_bytes=1024, ttl_seconds=0.01)
+    cache.set("key", "value")
+    time.sleep(0.02)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted_when_over_budget():
+    value = "x" * 100
+    cache = TTLCache(max_bytes=json_size(value) * 2, ttl_seconds=60)
+    cache.set("a", value)
+    cache.set("b", value)
+    cache.get("a")
+    cache.set("c", value)
+    assert cache.get("a") == value
+    assert cache.get("b") is None
+    assert cache.get("c") == value
+    assert cache.stats()["evictions"] == 1
+
+
+def test_value_larger_than_budget_is_not_stored():
+    cache = TTLCache(max_bytes=10, ttl_seconds=60)
+    assert cache.set("key", "x" * 100) is False
+    assert cache.get("key") is None
+
+
+def test_sqlite_backend_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SQLiteCacheBackend(path, namespace="video_extraction", ttl_seconds=60)
+    backend.set("key", {"products": [{"name": "MacBook Air M2"}]})
+    backend.close()
+
+    reopened = SQLiteCacheBackend(path, namespace="video_extraction", ttl_seconds=60)
+    assert reopened.get("key") == {"products": [{"name": "MacBook Air M2"}]}
+    reopened.set("stale", {"products": []}, ttl_seconds=-1)
+    assert reopened.get("stale") is None
+    reopened.close()
+
+
+def test_video_cache_key_normalizes_keyword_and_counts_hits():
+    cache = VideoExtractionCache(MemoryCacheBackend(max_bytes=1024, ttl_seconds=60))
+    key = cache.make_key("abc123", "ノートＰＣ ", ["軽量"], "30s", "600s", "gemini-2.0-flash")
+    same_key = cache.make_key("abc123", "ノートpc", ["軽量"], "30s", "600s", "gemini-2.0-flash")
+    other_window = cache.make_key("abc123", "ノートpc", ["軽量"], "90s", "600s", "gemini-2.0-flash")
+    assert key == same_key
+    assert key != other_window
+
+    assert asyncio.run(cache.get(key)) is None
+    asyncio.run(cache.set(key, {"products": []}))
+    assert asyncio.run(cache.get(same_key)) == {"products": []}
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+class NotFound(Exception):
+    code = 404
+
+
+class FakeBlob:
+    def __init__(self, objects, name):
+        self.objects, self.name = objects, name
+
+    def download_as_bytes(self):
+        self.objects.setdefault("threads", set()).add(threading.get_ident())
+        if self.name not in self.objects:
+            raise NotFound()
+        return self.objects[self.name]
+
+    def upload_from_string(self, data, content_type=None):
+        self.objects[self.name] = data.encode("utf-8")
+
+    def delete(self):
+        if self.objects.pop(self.name, None) is None:
+            raise NotFound()
+
+
+def test_gcs_backend_is_shared_between_instances(monkeypatch):
+    objects = {}
+    bucket = SimpleNamespace(blob=lambda name: FakeBlob(objects, name))
+    client = SimpleNamespace(bucket=lambda name: bucket, close=lambda: None)
+    monkeypatch.setattr(cache_module, "storage", SimpleNamespace(Client=lambda project=None: client))
+    monkeypatch.setattr(cache_module.settings, "GCS_BUCKET_NAME", "bucket")
+
+    writer = create_cache_backend("gcs", namespace="battle_jobs", ttl_seconds=60, max_bytes=0)
+    reader = create_cache_backend("gcs", namespace="battle_jobs", ttl_seconds=60, max_bytes=0)
+    writer.set("battle-1", {"status": "rendering"})
+    assert list(objects) == ["cache/battle_jobs/battle-1"]
+    assert reader.get("battle-1") == {"status": "rendering"}
+    assert reader.get("battle-2") is None
+
+    writer.set("stale", {"status": "completed"}, ttl_seconds=-1)
+    assert reader.get("stale") is None
+    reader.delete("battle-1")
+    reader.delete("battle-1")
+    assert writer.get("battle-1") is None
+    assert reader.stats() == {"hits": 1, "misses": 2}
+
+    # Async callers do not wait on the network on the event loop thread.
+    objects.pop("threads")
+    asyncio.run(reader.get_async("battle-2"))
+    assert threading.get_ident() not in objects["threads"]
+
+
+def test_backend_missing_a_method_fails_on_creation():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
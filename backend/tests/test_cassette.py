@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import lazy
+from app.services.cassette import RECORD, REPLAY, Cassette, CassetteMiss, ReplayedError
+from benchmarks import bench_e2e
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+def identity(value):
+    return value
+
+
+def test_replays_results_errors_and_bytes(tmp_path):
+    path = str(tmp_path / "unit.jsonl.gz")
+    recorder = Cassette(path, RECORD)
+    assert recorder.call("youtube", "search.list", {"q": "イヤホン"}, lambda: {"items": [1]}, identity, identity) == {"items": [1]}
+    with pytest.raises(Unavailable):
+        recorder.call("youtube", "search.list", {"q": "失敗"}, lambda: (_ for _ in ()).throw(Unavailable()), identity, identity)
+    image = recorder.call(
+        "imagen", "generate_images", {"prompt": "p"}, lambda: b"png", recorder.store_bytes, recorder.load_bytes
+    )
+    assert image == b"png"
+    recorder.close()
+
+    player = Cassette(path, REPLAY, latency_scale=0)
+    fail = lambda: pytest.fail("replay must not call the backend")
+    assert player.call("youtube", "search.list", {"q": "イヤホン"}, fail, identity, identity) == {"items": [1]}
+    with pytest.raises(ReplayedError) as exc_info:
+        player.call("youtube", "search.list", {"q": "失敗"}, fail, identity, identity)
+    assert exc_info.value.code == 503
+    assert player.call("imagen", "generate_images", {"prompt": "p"}, fail, player.store_bytes, player.load_bytes) == b"png"
+    with pytest.raises(CassetteMiss):
+        player.call("gcs", "blob.exists", {"blob": "other"}, fail, identity, identity)
+    assert player.counts == {"replayed": 3, "misses": 1}
+
+
+def test_replays_with_recorded_timing(tmp_path):
+    path = str(tmp_path / "timing.jsonl.gz")
+    recorder = Cassette(path, RECORD)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    asyncio.run(recorder.call_async("gemini", "generate_content", {"contents": ["x"]}, slow, identity, identity))
+    recorder.close()
+
+    player = Cassette(path, REPLAY, latency_scale=1.0)
+    start = time.perf_counter()
+    result = asyncio.run(player.call_async("gemini", "generate_content", {"contents": ["x"]}, None, identity, identity))
+    assert result == "ok"
+    assert time.perf_counter() - start >= 0.045
+
+
+def test_matches_despite_generated_ids_and_line_order(tmp_path):
+    path = str(tmp_path / "match.jsonl.gz")
+    recorder = Cassette(path, RECORD)
+    prompt = 'あなたは評価者です。\n{"id": "product-model-1-1a2b3c4d"}\n{"id": "product-model-2-5e6f7a8b"}\n以上です。'
+    recorder.call("gemini", "generate_content", {"contents": [prompt]}, lambda: "first", identity, identity)
+    recorder.close()
+
+    player = Cassette(path, REPLAY, latency_scale=0)
+    replayed = 'あなたは評価者です。\n{"id": "product-model-2-00000000"}\n{"id": "product-model-1-ffffffff"}\n以上です。'
+    assert player.call("gemini", "generate_content", {"contents": [replayed]}, None, identity, identity) == "first"
+    assert player.counts == {"reordered": 1}
+
+
+def test_summary_and_needs_replay_offline(tmp_path):
+    path = str(tmp_path / "e2e.jsonl.gz")
+    options = dict(time_scale=0, error_rate=0, bursts=False)
+    recorded = asyncio.run(bench_e2e.run(["summary", "analyze-needs"], 1, 1, record=path, **options))
+    assert [r.statuses for r in recorded] == [{"200": 1}, {"200": 1}]
+    assert all(r.cassette["recorded"] > 0 for r in recorded)
+
+    replayed = asyncio.run(bench_e2e.run(["summary", "analyze-needs"], 1, 1, replay=path, **options))
+    assert [r.statuses for r in replayed] == [{"200": 1}, {"200": 1}]
+    for result in replayed:
+        assert not result.calls
+        assert result.cassette["misses"] == 0
+        assert result.cassette["replayed"] > 0
+    assert not lazy._overrides
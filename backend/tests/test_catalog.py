@@ -0,0 +1,69 @@
+from app.schemas.product import Product
+from app.services.catalog import ProductCatalog
+from app.services.products import ProductService
+
+
+def make_product(product_id, name, category, description="desc"):
+    return Product(
+        id=product_id, name=name, price=10.0, imageUrl="url", description=description,
+        specifications={}, rating=4.0, reviewCount=1, category=category, tags=[]
+    )
+
+
+def test_catalog_indexes_products_by_id_and_category():
+    catalog = ProductCatalog([
+        make_product("p1", "Speed Laptop", "laptop"),
+        make_product("p2", "Air Tablet", "tablet", description=None),
+        make_product("p3", "Travel Laptop", "laptop", description="Light for trips"),
+    ])
+    assert catalog.get("p2").name == "Air Tablet"
+    assert catalog.get("missing") is None
+    assert [p.id for p in catalog.by_category("laptop")] == ["p1", "p3"]
+    assert [p.id for p in catalog.search("LAPTOP")] == ["p1", "p3"]
+    assert [p.id for p in catalog.search("trips")] == ["p3"]
+    assert [p.id for p in catalog.all()] == ["p1", "p2", "p3"]
+
+
+def test_upsert_and_remove_update_indexes_incrementally():
+    catalog = ProductCatalog([make_product("p1", "Speed Laptop", "laptop")])
+    version = catalog.version
+
+    catalog.upsert(make_product("p1", "Speed Tablet", "tablet"))
+    assert catalog.by_category("laptop") == []
+    assert [p.id for p in catalog.search("tablet")] == ["p1"]
+    assert catalog.search("laptop") == []
+
+    assert catalog.remove("p1") is True
+    assert catalog.remove("p1") is False
+    assert len(catalog) == 0 and catalog.all() == [] and catalog.categories() == []
+    assert catalog.version == version + 2
+
+
+def test_product_service_reads_from_the_catalog():
+    service = ProductService(ProductCatalog([make_product("p1", "Speed Laptop", "laptop")]))
+    assert service.get_product_by_id("p1").name == "Speed Laptop"
+    assert [p.id for p in service.get_products_by_category("laptop")] == ["p1"]
+    assert service.search_products("") == []
+
+
+def test_query_combines_filters_and_pages_in_catalog_order():
+    catalog = ProductCatalog([
+        Product(id=f"p{i}", name=f"Item {i}", price=float(i * 10), imageUrl="url", description=None,
+                specifications={}, rating=3.0 + (i % 3), reviewCount=1,
+                category="even" if i % 2 == 0 else "odd", tags=["sale"] if i < 6 else [])
+        for i in range(10)
+    ])
+    products, cursor = catalog.query(category="even", min_price=10, limit=2)
+    assert [p.id for p in products] == ["p2", "p4"]
+    products, cursor = catalog.query(category="even", min_price=10, cursor=cursor, limit=2)
+    assert [p.id for p in products] == ["p6", "p8"] and cursor is None
+
+    products, _ = catalog.query(tags=["sale"], min_rating=4, max_rating=4)
+    assert [p.id for p in products] == ["p1", "p4"]
+
+    # Updating a product keeps its position; cursors issued before the update stay valid.
+    _, cursor = catalog.query(limit=3)
+    catalog.upsert(catalog.get("p1").model_copy(update={"price": 999.0}))
+    products, _ = catalog.query(cursor=cursor, limit=2)
+    assert [p.id for p in products] == ["p3", "p4"]
+    assert catalog.query(min_price=900)[0][0].id == "p1"
@@ -5,7 +5,7 @@ import pytest
 @pytest.fixture(autouse=True)
 def override_get_analyze_needs_service(monkeypatch):
     # MockAnalyzeNeedsServiceのgenerate_chat_responseメソッドをモックする
-    async def mock_generate_chat_response(self, message, context=None):
+    async def mock_generate_chat_response(self, message, context=None, conversation_id=None):
         if "こんにちは" in message:
             return {"message": "こんにちは！商品選びのお手伝いをさせていただきます。", "navigateTo": None}
         return {"message": "モック応答", "navigateTo": None}
@@ -39,4 +39,8 @@ def test_post_chat_message_new_conversation(client):
     )
     assert response.status_code == 200
     assert "モック応答" in response.json()["message"]
-    assert response.json()["conversationId"] == "new_conversation"
+    # 新しい会話ごとに別のIDが発行される
+    conversation_id = response.json()["conversationId"]
+    assert conversation_id
+    other = client.post("/api/v1/chat/message", json={"message": "新しい会話"})
+    assert other.json()["conversationId"] != conversation_id
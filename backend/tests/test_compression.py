@@ -0,0 +1,67 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.http_cache import cached_json_response, serialize_json
+from app.core.responses import FastJSONResponse
+from app.core.sse import sse_response
+
+
+def make_client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return {"summary": "長い日本語の要約テキスト。" * 100}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/cached")
+    def cached(request: Request):
+        return cached_json_response(request, serialize_json({"text": "x" * 1000}), max_age=60)
+
+    @app.get("/events")
+    def events():
+        async def gen():
+            for i in range(3):
+                yield "tick", {"i": i, "pad": "x" * 1000}
+        return sse_response(gen())
+
+    return TestClient(app)
+
+
+def test_negotiation_prefers_brotli_and_honours_q_values():
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") == "br"
+
+
+def test_large_json_is_compressed_and_small_json_is_not():
+    client = make_client()
+    for encoding in ("br", "gzip"):
+        response = client.get("/large", headers={"Accept-Encoding": encoding})
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert response.json()["summary"].startswith("長い日本語")
+        assert int(response.headers["Content-Length"]) < 1000
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+
+def test_compressed_responses_get_a_weak_etag():
+    response = make_client().get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].startswith('W/"')
+
+
+def test_event_streams_are_not_compressed():
+    response = make_client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.text.count("event: tick") == 3
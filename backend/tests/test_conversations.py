@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import metrics
+from app.core.cache import MemoryCacheBackend
+from app.core.config import settings
+from app.services import analyze_needs
+from app.services.conversations import ConversationStore, estimate_tokens, trim_history
+
+
+def exchange(user_text, model_text):
+    return [{"role": "user", "text": user_text}, {"role": "model", "text": model_text}]
+
+
+def test_trim_history_drops_oldest_exchanges():
+    turns = exchange("あ" * 10, "い" * 10) + exchange("う" * 10, "え" * 10) + exchange("お" * 5, "か" * 5)
+    assert estimate_tokens("あいう") == 3 and estimate_tokens("abcdefgh") == 2
+
+    assert trim_history(turns, 100) == turns
+    assert trim_history(turns, 30) == turns[2:]
+    assert trim_history(turns, 10) == turns[4:]
+    assert trim_history(turns, 5) == []
+
+
+def test_store_appends_trims_and_expires():
+    store = ConversationStore(MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=60), max_history_tokens=25)
+    asyncio.run(store.append("c1", "イヤホン", "ノイズキャンセリング重視ですか？"))
+    history = asyncio.run(store.append("c1", "はい", "それならこちらです。"))
+    assert [turn["text"] for turn in history] == ["はい", "それならこちらです。"]
+    assert asyncio.run(store.history("c1")) == history
+    assert asyncio.run(store.history("c2")) == []
+
+    expiring = ConversationStore(MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=0), max_history_tokens=25)
+    asyncio.run(expiring.append("c1", "イヤホン", "はい"))
+    assert asyncio.run(expiring.history("c1")) == []
+
+
+class RecordingChatModel:
+    def __init__(self):
+        self.sessions = []
+
+    def start_chat(self, history=None):
+        session = SimpleNamespace(history=history, sent=[])
+
+        async def send_message_async(message):
+            session.sent.append(message)
+            part = SimpleNamespace(text=f"回答{len(self.sessions)}", function_call=None)
+            return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+        session.send_message_async = send_message_async
+        self.sessions.append(session)
+        return session
+
+
+@pytest.fixture
+def chat_service(monkeypatch):
+    monkeypatch.setattr(analyze_needs, "generative_models", SimpleNamespace(
+        Content=lambda role, parts: {"role": role, "parts": parts},
+        Part=SimpleNamespace(from_text=lambda text: text),
+    ))
+    service = analyze_needs.AnalyzeNeedsService.__new__(analyze_needs.AnalyzeNeedsService)
+    service.model = RecordingChatModel()
+    service.conversations = ConversationStore(
+        MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=60), max_history_tokens=4000
+    )
+    return service
+
+
+def test_chat_sends_only_the_message_with_the_stored_history(chat_service):
+    first = asyncio.run(chat_service.generate_chat_response("ヘッドホンを探しています", conversation_id="c1"))
+    second = asyncio.run(chat_service.generate_chat_response("音質重視です", conversation_id="c1"))
+    asyncio.run(chat_service.generate_chat_response("別の会話", conversation_id="c2"))
+
+    assert first["message"] == "回答1" and second["message"] == "回答2"
+    opening, follow_up, other = chat_service.model.sessions
+    # The instructions are the model's system instruction, not part of every message.
+    assert opening.history == [] and opening.sent == ["ヘッドホンを探しています"]
+    assert follow_up.sent == ["音質重視です"]
+    assert follow_up.history == [
+        {"role": "user", "parts": ["ヘッドホンを探しています"]},
+        {"role": "model", "parts": ["回答1"]},
+    ]
+    assert other.history == []
+    assert len(asyncio.run(chat_service.conversations.history("c1"))) == 4
+
+
+def test_chat_backend_calls_are_labelled_with_the_chat_model(chat_service):
+    labels = {"backend": "gemini", "model": settings.CHAT_MODEL_NAME}
+    before = metrics.backend_call_duration.count(**labels)
+
+    asyncio.run(chat_service.generate_chat_response("こんにちは", conversation_id="c1"))
+
+    assert metrics.backend_call_duration.count(**labels) == before + 1
@@ -0,0 +1,88 @@
+import asyncio
+
+from app.services.image_store import ContentAddressedImageStore, normalize_image_prompt
+
+
+class FakeBlob:
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+
+    def exists(self):
+        self.storage.exists_calls += 1
+        return self.name in self.storage.blobs
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        self.storage.blobs[self.name] = data
+
+
+class FakeStorage:
+    def __init__(self):
+        self.blobs = {}
+        self.exists_calls = 0
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+def test_prompts_differing_in_case_width_and_punctuation_share_a_key():
+    assert normalize_image_prompt("A red  Kettle, minimal.") == normalize_image_prompt("ａ RED kettle minimal")
+    store = ContentAddressedImageStore(FakeStorage(), "bucket")
+    assert store.blob_name_for("A red kettle.", "imagen") == store.blob_name_for("a red kettle", "imagen")
+    assert store.blob_name_for("a red kettle", "imagen") != store.blob_name_for("a red kettle", "other-model")
+
+
+def test_get_or_create_generates_each_prompt_once():
+    storage = FakeStorage()
+    store = ContentAddressedImageStore(storage, "bucket")
+    generated = []
+
+    async def generate():
+        generated.append(1)
+        await asyncio.sleep(0.01)
+        return b"png"
+
+    async def run():
+        # Concurrent requests for the same prompt share a single generation.
+        first = await asyncio.gather(*(store.get_or_create("a red kettle", "imagen", generate) for _ in range(3)))
+        again = await store.get_or_create("A red kettle!", "imagen", generate)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert len(generated) == 1
+    assert len(set(first)) == 1 and again == first[0]
+    assert storage.blobs == {first[0]: b"png"}
+    assert store.stats() == {"hits": 3, "misses": 1}
+
+
+def test_waiter_generates_the_image_when_the_owner_is_cancelled():
+    storage = FakeStorage()
+    store = ContentAddressedImageStore(storage, "bucket")
+    started = asyncio.Event()
+    generated = []
+
+    async def generate_forever():
+        generated.append("owner")
+        started.set()
+        await asyncio.Event().wait()
+
+    async def generate():
+        generated.append("waiter")
+        return b"png"
+
+    async def run():
+        owner = asyncio.create_task(store.get_or_create("a red kettle", "imagen", generate_forever))
+        await started.wait()
+        waiter = asyncio.create_task(store.get_or_create("a red kettle", "imagen", generate))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await asyncio.gather(owner, waiter, return_exceptions=True)
+
+    owner_result, waiter_result = asyncio.run(run())
+    assert isinstance(owner_result, asyncio.CancelledError)
+    assert generated == ["owner", "waiter"]
+    assert storage.blobs == {waiter_result: b"png"}
+    assert store._in_flight == {}
@@ -0,0 +1,84 @@
+import json
+import logging
+import queue
+
+from app.core import log
+from app.core.config import settings
+from app.core.log import JsonFormatter, NonBlockingQueueHandler, TextFormatter, log_payload
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_logger(name, level=logging.DEBUG):
+    logger = logging.getLogger(f"app.tests.{name}")
+    handler = ListHandler()
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, handler
+
+
+def test_payloads_are_off_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOADS", False)
+    logger, handler = make_logger("payload_off")
+    log_payload(logger, "result", {"products": [1, 2]})
+    assert handler.records == []
+
+
+def test_payloads_are_snapshotted_when_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOADS", True)
+    logger, handler = make_logger("payload_on")
+    payload = {"products": [{"name": "A"}]}
+    log_payload(logger, "result", payload)
+    payload["products"].append({"name": "B"})
+
+    [record] = handler.records
+    assert json.loads(record.payload_json) == {"products": [{"name": "A"}]}
+
+    line = json.loads(JsonFormatter().format(record))
+    assert line["severity"] == "DEBUG"
+    assert line["message"] == "result"
+    assert line["payload"] == {"products": [{"name": "A"}]}
+
+
+def test_payloads_need_debug_level(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOADS", True)
+    logger, handler = make_logger("payload_info", level=logging.INFO)
+    log_payload(logger, "result", {"a": 1})
+    assert handler.records == []
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("app.tests.full_queue")
+    logger.handlers = [handler]
+    logger.propagate = False
+    for i in range(5):
+        logger.warning("message %d", i)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_text_formatter_appends_fields():
+    record = logging.LogRecord("app.core.tracing", logging.INFO, __file__, 1, "[トレース]", None, None)
+    record.fields = {"name": "needs.image", "duration_ms": 1.5}
+    assert TextFormatter().format(record) == '[トレース] {"name":"needs.image","duration_ms":1.5}'
+
+
+def test_setup_routes_app_loggers_through_the_queue(capsys):
+    log.shutdown_logging()
+    log.setup_logging(level="INFO", fmt="json")
+    try:
+        logging.getLogger("app.services.example").info("[ワーカー] 開始")
+    finally:
+        log.shutdown_logging()
+    line = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert line["message"] == "[ワーカー] 開始"
+    assert line["logger"] == "app.services.example"
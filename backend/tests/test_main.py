@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -12,3 +16,14 @@ def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+def test_importing_the_app_does_not_load_google_sdks():
+    # Run in a fresh interpreter: this test session may already have imported them.
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('vertexai', 'google.genai', 'google.cloud.storage', 'googleapiclient.discovery') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == ""
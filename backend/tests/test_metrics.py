@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, MetricsRegistry
+from app.core.resilience import ResiliencePolicy, TransientError
+from app.core.tracing import span
+from app.main import app
+
+
+def test_render_histogram_and_collectors():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    registry.add_collector(lambda: [("quota_units", "gauge", "Quota.", [({"endpoint": 'se"arch'}, 101)])])
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{route="/a"} 2' in text
+    assert 'quota_units{endpoint="se\\"arch"} 101' in text
+
+
+def test_failing_collector_does_not_break_scrape():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls.").inc()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.add_collector(broken)
+    assert "calls_total 1" in registry.render()
+
+
+def test_metric_without_render_fails_on_creation():
+    class Unrendered(metrics._Metric):
+        type = "counter"
+
+    with pytest.raises(TypeError):
+        Unrendered("calls_total", "Calls.")
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    before = metrics.http_request_duration.count(method="GET", route="/items/{item_id}", status="2xx")
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nowhere")
+
+    assert metrics.http_request_duration.count(method="GET", route="/items/{item_id}", status="2xx") == before + 2
+    assert metrics.http_request_duration.count(method="GET", route="unmatched", status="4xx") >= 1
+    assert metrics.http_requests_in_flight.value() == 0
+
+
+def test_backend_calls_are_labelled_with_the_pipeline_model():
+    policy = ResiliencePolicy("imagen", max_attempts=2, base_delay=0, max_delay=0, budget_ratio=1,
+                              failure_threshold=10, reset_timeout=1)
+    labels = {"backend": "imagen", "model": "imagen-test"}
+    retries_before = metrics.backend_call_retries.value(**labels)
+    errors_before = metrics.backend_call_errors.value(**labels)
+
+    async def always_empty():
+        raise TransientError("no images")
+
+    async def run():
+        with span("needs.image", model="imagen-test"):
+            try:
+                await policy.call(always_empty)
+            except TransientError:
+                pass
+
+    asyncio.run(run())
+    assert metrics.backend_call_retries.value(**labels) == retries_before + 1
+    assert metrics.backend_call_errors.value(**labels) == errors_before + 1
+    assert metrics.backend_call_duration.count(**labels) >= 1
+
+
+def test_metrics_endpoint_requires_auth_and_renders_text(monkeypatch):
+    monkeypatch.setattr(settings, "BASIC_AUTH_USERNAME", "user")
+    monkeypatch.setattr(settings, "BASIC_AUTH_PASSWORD", "pass")
+    client = TestClient(app)
+
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", auth=("user", "pass"))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE rakubato_http_request_duration_seconds histogram" in response.text
+    assert "rakubato_youtube_quota_remaining_units" in response.text
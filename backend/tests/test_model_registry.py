@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services import model_registry
+from app.services.model_registry import GEMINI, ModelRegistry, ModelSpec
+
+
+class FakeModel:
+    created = []
+    prompts = []
+
+    def __init__(self, name, **options):
+        self.name = name
+        self.options = options
+        FakeModel.created.append(name)
+
+    async def generate_content_async(self, contents, generation_config=None):
+        FakeModel.prompts.append((self.name, generation_config))
+        return type("Response", (), {"text": "pong"})()
+
+
+def make_registry(monkeypatch):
+    monkeypatch.setattr(model_registry, "generative_models", SimpleNamespace(GenerativeModel=FakeModel))
+    FakeModel.created = []
+    FakeModel.prompts = []
+    return ModelRegistry({
+        "needs": ModelSpec(GEMINI, "NEEDS_MODEL_NAME"),
+        "battle": ModelSpec(GEMINI, "BATTLE_MODEL_NAME"),
+        "batch": ModelSpec(GEMINI, "IMAGE_PROMPT_MODEL_NAME", lambda: {"generation_config": {"temperature": 0}}),
+    })
+
+
+def test_handles_are_created_once_per_task(monkeypatch):
+    registry = make_registry(monkeypatch)
+
+    first = registry.get("needs")
+    assert registry.get("needs") is first
+    assert FakeModel.created == [settings.NEEDS_MODEL_NAME]
+    assert registry.get("batch").options == {"generation_config": {"temperature": 0}}
+
+
+def test_model_names_come_from_settings(monkeypatch):
+    registry = make_registry(monkeypatch)
+    monkeypatch.setattr(settings, "BATTLE_MODEL_NAME", "gemini-test-battle")
+
+    assert registry.name("battle") == "gemini-test-battle"
+    assert registry.get("battle").name == "gemini-test-battle"
+
+
+def test_warm_up_sends_one_request_per_distinct_model(monkeypatch):
+    registry = make_registry(monkeypatch)
+    monkeypatch.setattr(settings, "NEEDS_MODEL_NAME", "gemini-shared")
+    monkeypatch.setattr(settings, "BATTLE_MODEL_NAME", "gemini-shared")
+
+    asyncio.run(registry.warm_up(send_requests=True))
+
+    assert sorted(FakeModel.created) == sorted(["gemini-shared", "gemini-shared", settings.IMAGE_PROMPT_MODEL_NAME])
+    assert [name for name, _ in FakeModel.prompts] == ["gemini-shared", settings.IMAGE_PROMPT_MODEL_NAME]
+    assert all(config == {"max_output_tokens": 1} for _, config in FakeModel.prompts)
+
+
+def test_warm_up_without_requests_only_builds_handles(monkeypatch):
+    registry = make_registry(monkeypatch)
+    asyncio.run(registry.warm_up())
+    assert len(FakeModel.created) == 3
+    assert FakeModel.prompts == []
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.services.operation_poller import OperationPoller
+
+
+class FakeOperation:
+    def __init__(self, name, polls_until_done):
+        self.name = name
+        self.remaining = polls_until_done
+        self.done = False
+
+
+def fetch(operation):
+    operation.remaining -= 1
+    operation.done = operation.remaining <= 0
+    return operation
+
+
+def test_poller_resolves_all_operations_from_one_loop():
+    async def run():
+        poller = OperationPoller(fetch, initial_interval=0.01, max_interval=0.05, batch_window=0.01)
+        operations = [FakeOperation(f"op-{i}", polls_until_done=i + 1) for i in range(3)]
+        results = await asyncio.gather(*(poller.wait(op) for op in operations))
+        await poller.close()
+        return poller, operations, results
+
+    poller, operations, results = asyncio.run(run())
+    assert results == operations
+    assert all(op.done for op in results)
+    stats = poller.stats()
+    assert stats["completed_total"] == 3
+    assert stats["polls_total"] == 6
+    assert stats["in_flight"] == 0
+
+
+def test_poller_fails_after_consecutive_errors():
+    def broken_fetch(operation):
+        raise RuntimeError("backend unavailable")
+
+    async def run():
+        poller = OperationPoller(broken_fetch, initial_interval=0.01, max_consecutive_errors=2)
+        try:
+            await poller.wait(FakeOperation("op", polls_until_done=1))
+        finally:
+            await poller.close()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
@@ -1,4 +1,6 @@
-from app.services.products import ProductService
+from app.services import catalog
+from app.services.catalog import ProductCatalog
+from app.services.products import PRODUCT_FIELDS, ProductService
 from app.schemas.product import Product, ProductType
 import pytest
 
@@ -21,6 +23,7 @@ def mock_product_service(monkeypatch):
         ),
     ]
 
+    monkeypatch.setattr(catalog, "_catalog_instance", ProductCatalog(mock_products_data))
     monkeypatch.setattr(ProductService, "get_all_products", lambda self: mock_products_data)
     monkeypatch.setattr(ProductService, "get_product_by_id", lambda self, product_id: next((p for p in mock_products_data if p.id == product_id), None))
     monkeypatch.setattr(ProductService, "get_all_product_types", lambda self: mock_product_types_data)
@@ -45,3 +48,68 @@ def test_get_all_product_types(client):
     assert response.status_code == 200
     assert len(response.json()) == 1
     assert response.json()[0]["name"] == "Type One"
+
+def test_search_products(client):
+    response = client.get("/api/v1/products/search", params={"q": "product two"})
+    assert response.status_code == 200
+    assert response.json()[0]["id"] == "p2"
+
+def test_search_products_requires_query(client):
+    response = client.get("/api/v1/products/search")
+    assert response.status_code == 422
+
+def test_get_products_paginates_with_cursor(client):
+    first = client.get("/api/v1/products/", params={"limit": 1})
+    assert [p["id"] for p in first.json()] == ["p1"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/api/v1/products/", params={"limit": 1, "cursor": cursor})
+    assert [p["id"] for p in second.json()] == ["p2"]
+    assert "X-Next-Cursor" not in second.headers
+
+def test_get_products_filters_and_projects_fields(client):
+    response = client.get("/api/v1/products/", params={"min_price": 15, "fields": "id,name,imageUrl"})
+    assert response.json() == [{"id": "p2", "name": "Product Two", "imageUrl": "url2"}]
+
+    response = client.get("/api/v1/products/", params={"category": "cat1", "max_rating": 4.2})
+    assert [p["id"] for p in response.json()] == ["p1"]
+
+def test_get_products_rejects_bad_fields_and_cursor(client):
+    assert client.get("/api/v1/products/", params={"fields": "id,secret"}).status_code == 400
+    assert client.get("/api/v1/products/", params={"cursor": "garbage"}).status_code == 400
+
+def test_catalog_responses_carry_etag_and_answer_304(client):
+    first = client.get("/api/v1/products/p1")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"].startswith("private, max-age=")
+
+    not_modified = client.get("/api/v1/products/p1", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    types = client.get("/api/v1/products/types")
+    assert client.get("/api/v1/products/types", headers={"If-None-Match": types.headers["ETag"]}).status_code == 304
+
+def test_etag_changes_when_the_catalog_changes(client):
+    etag = client.get("/api/v1/products/").headers["ETag"]
+    service = ProductService()
+    service.catalog.upsert(service.catalog.get("p1").model_copy(update={"price": 12.0}))
+
+    response = client.get("/api/v1/products/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["price"] == 12.0
+
+def test_openapi_documents_projected_products_and_cursor_header(client):
+    schema = client.get("/openapi.json").json()
+    operation = schema["paths"]["/api/v1/products/"]["get"]
+    ok = operation["responses"]["200"]
+    assert ok["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/ProductFields")
+    assert "X-Next-Cursor" in ok["headers"]
+    assert {"304", "400"} <= set(operation["responses"])
+    assert "fields" in [parameter["name"] for parameter in operation["parameters"]]
+
+    # Every field accepted by `fields=` is in the documented schema, and nothing else.
+    properties = schema["components"]["schemas"]["ProductFields"]["properties"]
+    assert set(properties) == set(PRODUCT_FIELDS)
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.core.rate_limit import BackendLimiter, RateLimiterRegistry
+
+
+def test_concurrency_is_bounded():
+    limiter = BackendLimiter("imagen", rate=0, burst=1, concurrency=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert limiter.acquired_total == 6
+    assert limiter.waiting == 0
+    assert limiter.wait_seconds_max > 0
+
+
+def test_token_bucket_limits_rate_after_burst():
+    limiter = BackendLimiter("gemini", rate=50, burst=2, concurrency=10)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            async with limiter.acquire():
+                pass
+        return time.monotonic() - start
+
+    # Two calls use the burst, the other two wait ~1/50s each.
+    assert asyncio.run(run()) >= 0.03
+
+
+def test_registry_uses_default_config_for_unknown_backends():
+    registry = RateLimiterRegistry({"default": {"rate": 0, "burst": 1, "concurrency": 5}})
+    assert registry.get("iam").concurrency == 5
+    assert registry.get("iam") is registry.get("iam")
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy, TransientError, is_retryable
+
+
+def make_policy(**overrides):
+    options = dict(
+        max_attempts=3, base_delay=0.001, max_delay=0.01,
+        budget_ratio=0.2, failure_threshold=5, reset_timeout=60,
+    )
+    options.update(overrides)
+    return ResiliencePolicy("test-backend", **options)
+
+
+def test_transient_errors_are_retried_until_success():
+    policy = make_policy()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Exception("429 Resource exhausted")
+        return "ok"
+
+    assert asyncio.run(policy.call(call)) == "ok"
+    assert len(attempts) == 3
+    assert policy.stats()["retries_total"] == 2
+
+
+def test_non_retryable_errors_fail_immediately():
+    policy = make_policy()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise ValueError("invalid argument")
+
+    with pytest.raises(ValueError):
+        asyncio.run(policy.call(call))
+    assert len(attempts) == 1
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_non_idempotent_calls_are_not_retried_after_a_timeout():
+    policy = make_policy()
+    attempts = []
+
+    async def submit_render():
+        attempts.append(1)
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.call(submit_render, retry=False))
+    assert len(attempts) == 1
+    assert policy.stats()["retries_total"] == 0
+    assert policy.stats()["failures_total"] == 1
+
+
+def test_circuit_opens_and_recovers_through_half_open_probe():
+    policy = make_policy(max_attempts=1, failure_threshold=2, reset_timeout=0.05)
+
+    async def failing():
+        raise TransientError("unavailable")
+
+    async def succeeding():
+        return "ok"
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(TransientError):
+                await policy.call(failing)
+        assert policy.breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            await policy.call(succeeding)
+        await asyncio.sleep(0.06)
+        assert await policy.call(succeeding) == "ok"
+
+    asyncio.run(run())
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+    assert policy.stats()["circuit_rejected_total"] == 1
+
+
+def test_cancelled_half_open_probe_frees_its_slot():
+    policy = make_policy(max_attempts=1, failure_threshold=1, reset_timeout=0.01)
+
+    async def failing():
+        raise TransientError("unavailable")
+
+    async def hanging():
+        await asyncio.sleep(60)
+
+    async def succeeding():
+        return "ok"
+
+    async def run():
+        with pytest.raises(TransientError):
+            await policy.call(failing)
+        await asyncio.sleep(0.02)
+        # The probe is cancelled, e.g. because the SSE client disconnected.
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(policy.call(hanging), timeout=0.01)
+        assert policy.breaker.state == CircuitBreaker.HALF_OPEN
+        assert await policy.call(succeeding) == "ok"
+
+    asyncio.run(run())
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_is_retryable_recognizes_rate_limit_errors():
+    assert is_retryable(Exception("429 Too Many Requests"))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(KeyError("videoId"))
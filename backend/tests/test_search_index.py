@@ -0,0 +1,32 @@
+from app.services.search_index import NgramSearchIndex, ngrams, normalize_search_text
+
+
+def test_normalization_folds_width_case_and_katakana():
+    assert normalize_search_text("ＰＲＯ　イヤホン") == "pro いやほん"
+    assert ngrams("ノイズキャンセリング")[:2] == ["のい", "いず"]
+    assert ngrams("軽量 PC") == ["軽量", "pc"]
+
+
+def test_japanese_queries_match_without_word_boundaries():
+    index = NgramSearchIndex()
+    index.add("a", [("ワイヤレスイヤホン ノイズキャンセリング搭載", 3.0)])
+    index.add("b", [("有線イヤホン", 3.0)])
+    index.add("c", [("ノートパソコン", 3.0)])
+
+    assert [doc for doc, _ in index.search("いやほん")] == ["a", "b"]
+    assert [doc for doc, _ in index.search("ノイズキャンセル")] == ["a"]
+    assert index.search("ﾉｰﾄﾊﾟｿｺﾝ")[0][0] == "c"
+
+
+def test_ranking_prefers_heavier_fields_and_respects_limit():
+    index = NgramSearchIndex()
+    index.add("desc", [("Plain Gadget", 3.0), ("a very light laptop", 1.0)])
+    index.add("name", [("Light Laptop", 3.0)])
+    index.add("other", [("Desk Lamp", 3.0)])
+
+    assert [doc for doc, _ in index.search("light laptop")] == ["name", "desc"]
+    assert len(index.search("light laptop", limit=1)) == 1
+
+    index.remove("name")
+    assert [doc for doc, _ in index.search("light laptop")] == ["desc"]
+    assert len(index) == 2
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.services.signing import UrlSigner
+
+
+class FakeBlob:
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+
+    def generate_signed_url(self, **kwargs):
+        self.storage.signed.append(self.name)
+        return f"https://storage.example.com/{self.name}?sig={len(self.storage.signed)}"
+
+
+class FakeStorage:
+    def __init__(self):
+        self.signed = []
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+def test_signed_urls_are_cached_per_blob():
+    storage = FakeStorage()
+    signer = UrlSigner(storage, credentials=object(), expiration_seconds=3600, refresh_margin_seconds=300)
+
+    async def run():
+        first = await signer.sign_many_async("bucket", ["a.png", "b.png", "a.png"])
+        second = await signer.sign_many_async("bucket", ["a.png", "c.png"])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert set(first) == {"a.png", "b.png"}
+    assert second["a.png"] == first["a.png"]
+    assert storage.signed == ["a.png", "b.png", "c.png"]
+
+
+def test_urls_are_re_signed_inside_the_refresh_margin():
+    storage = FakeStorage()
+    # With the margin equal to the expiration, nothing is served from the cache.
+    signer = UrlSigner(storage, credentials=object(), expiration_seconds=60, refresh_margin_seconds=60)
+
+    async def run():
+        await signer.sign_async("bucket", "a.png")
+        return await signer.sign_many_with_expiry_async("bucket", ["a.png"])
+
+    urls, expires_at = asyncio.run(run())
+    assert storage.signed == ["a.png", "a.png"]
+    assert urls["a.png"].endswith("sig=2")
+    assert expires_at > 0
@@ -0,0 +1,146 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.sse import sse_response
+from app.main import app
+from app.services import analyze_needs
+from app.services.analyze_needs import get_analyze_needs_service
+
+
+class FakeSummaryService:
+    async def stream_youtube_reviews_and_summarize(self, keyword, tags):
+        yield "keyword", {"keyword": "トースター", "tags": tags[:2]}
+        yield "videos", {"videos": [{"url": "https://www.youtube.com/watch?v=v1"}]}
+        yield "video", {"url": "https://www.youtube.com/watch?v=v1", "view_count": 10, "products": [{"name": "バルミューダ"}]}
+        yield "result", {"recommended_products": []}
+
+
+@pytest.fixture(autouse=True)
+def override_service():
+    app.dependency_overrides[get_analyze_needs_service] = lambda: FakeSummaryService()
+    yield
+    app.dependency_overrides = {}
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_summary_emits_stage_events(client):
+    response = client.post(
+        "/api/v1/products/summary/stream",
+        json={"keyword": "おすすめのトースター", "tags": ["デザイン性", "価格", "機能性"]},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["keyword", "videos", "video", "result"]
+    assert events[0][1]["tags"] == ["デザイン性", "価格"]
+    assert events[2][1]["products"] == [{"name": "バルミューダ"}]
+
+
+def test_stream_summary_rejects_empty_keyword(client):
+    response = client.post("/api/v1/products/summary/stream", json={"keyword": "", "tags": []})
+    assert response.status_code == 400
+
+
+VIDEO_IDS = ["v1", "v2", "v3"]
+
+
+class StubYouTube:
+    async def search_videos(self, query, max_results, part):
+        return [{"id": {"videoId": video_id}, "snippet": {"title": video_id}} for video_id in VIDEO_IDS]
+
+
+class StubKeywordModel:
+    async def generate_content_async(self, contents):
+        return SimpleNamespace(text="デザイン性,価格" if "タグ" in contents[0] else "トースター")
+
+
+@pytest.fixture
+def summary_service(monkeypatch):
+    """The real streaming pipeline; each video worker finishes when its event is set."""
+    monkeypatch.setattr(analyze_needs.models, "get", lambda task: StubKeywordModel())
+    service = analyze_needs.AnalyzeNeedsService.__new__(analyze_needs.AnalyzeNeedsService)
+    service.youtube = StubYouTube()
+    service.finish = {}
+    service.cancelled = []
+
+    async def view_counts(video_ids):
+        return {video_id: 1 for video_id in video_ids}
+
+    async def extract(url, limited_tags, keyword):
+        video_id = url.rsplit("=", 1)[1]
+        try:
+            await service.finish[video_id].wait()
+        except asyncio.CancelledError:
+            service.cancelled.append(video_id)
+            raise
+        return url, {"products": [{"name": f"Toaster {video_id}"}]}
+
+    async def recommend(products):
+        return {"recommended_products": [product["name"] for product in products]}
+
+    service._get_video_view_counts_async = view_counts
+    service._extract_product_info_from_video_async = extract
+    service._generate_final_recommendation_async = recommend
+    return service
+
+
+def test_service_streams_videos_as_they_finish_and_the_result_last(summary_service):
+    async def run():
+        summary_service.finish = {video_id: asyncio.Event() for video_id in VIDEO_IDS}
+        events = []
+        stream = summary_service.stream_youtube_reviews_and_summarize("おすすめのトースター", ["デザイン性", "価格", "機能性"])
+        async for event, data in stream:
+            events.append((event, data))
+            if event == "videos":
+                summary_service.finish["v2"].set()
+            elif event == "video" and len(events) == 3:
+                summary_service.finish["v3"].set()
+            elif event == "video" and len(events) == 4:
+                summary_service.finish["v1"].set()
+        return events
+
+    events = asyncio.run(run())
+    assert [event for event, _ in events] == ["keyword", "videos", "video", "video", "video", "result"]
+    assert events[0][1] == {"keyword": "トースター", "tags": ["デザイン性", "価格"]}
+    assert [data["url"].rsplit("=", 1)[1] for event, data in events if event == "video"] == ["v2", "v3", "v1"]
+    assert events[-1][1] == {"recommended_products": ["Toaster v2", "Toaster v3", "Toaster v1"]}
+
+
+def test_service_cancels_pending_videos_when_the_client_disconnects(summary_service):
+    async def run():
+        summary_service.finish = {video_id: asyncio.Event() for video_id in VIDEO_IDS}
+        response = sse_response(summary_service.stream_youtube_reviews_and_summarize("トースター", ["価格"]))
+        received = []
+        first_video = asyncio.Event()
+
+        async def client():
+            async for chunk in response.body_iterator:
+                received.append(chunk.split("\n", 1)[0])
+                if chunk.startswith("event: videos"):
+                    summary_service.finish["v1"].set()
+                elif chunk.startswith("event: video\n"):
+                    first_video.set()
+
+        task = asyncio.create_task(client())
+        await first_video.wait()
+        # Starlette cancels the response task when the client disconnects.
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        # Checked before asyncio.run cancels whatever is still pending at shutdown.
+        return received, sorted(summary_service.cancelled)
+
+    received, cancelled = asyncio.run(run())
+    assert received == ["event: keyword", "event: videos", "event: video"]
+    assert cancelled == ["v2", "v3"]
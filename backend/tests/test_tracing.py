@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+from app.core.resilience import ResiliencePolicy, TransientError
+from app.core.tracing import OTLPSpanExporter, Trace, TracingMiddleware, set_span_attributes, span, traced
+
+
+class RecordingExporter(tracing.SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, finished):
+        self.spans.append(finished)
+
+
+def test_spans_nest_across_concurrent_tasks(monkeypatch):
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracing, "exporter", exporter)
+
+    @traced("child")
+    async def child(i):
+        set_span_attributes(index=i)
+        await asyncio.sleep(0)
+
+    async def run():
+        with span("parent") as parent:
+            await asyncio.gather(child(0), child(1))
+        return parent
+
+    parent = asyncio.run(run())
+    children = [s for s in exporter.spans if s.name == "child"]
+    assert {s.attributes["index"] for s in children} == {0, 1}
+    assert all(s.parent_id == parent.span_id and s.trace_id == parent.trace_id for s in children)
+    assert parent.parent_id is None
+
+
+def test_backend_calls_record_retries(monkeypatch):
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    policy = ResiliencePolicy("fake", max_attempts=3, base_delay=0, max_delay=0, budget_ratio=1,
+                              failure_threshold=10, reset_timeout=1)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise TransientError("empty response")
+        return "ok"
+
+    assert asyncio.run(policy.call(flaky)) == "ok"
+    [recorded] = [s for s in exporter.spans if s.name == "fake"]
+    assert recorded.attributes["retries"] == 1
+    assert recorded.error is None
+
+
+def test_middleware_adds_server_timing_header(monkeypatch):
+    monkeypatch.setattr(tracing, "exporter", RecordingExporter())
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        for _ in range(2):
+            with span("summary.video", video_id="abc"):
+                await asyncio.sleep(0.001)
+        return {"ok": True}
+
+    header = TestClient(app).get("/work").headers["Server-Timing"]
+    assert header.startswith("total;dur=")
+    assert 'summary.video;dur=' in header and 'desc="x2"' in header
+
+
+def test_server_timing_sanitizes_names_and_skips_root():
+    trace = Trace()
+    root = tracing.Span("http", trace.trace_id, None, {})
+    child = tracing.Span("gemini call", trace.trace_id, root.span_id, {})
+    for s in (root, child):
+        s.end()
+        trace.spans.append(s)
+    assert trace.server_timing().startswith("gemini_call;dur=")
+    assert "http" not in trace.server_timing()
+
+
+def test_otlp_payload_shape():
+    exporter = OTLPSpanExporter("http://localhost:0/v1/traces", flush_interval=0.01)
+    try:
+        s = tracing.Span("gemini", "a" * 32, "b" * 16, {"retries": 1, "model": "gemini-2.5-flash"})
+        s.end()
+        payload = exporter._payload([s])
+    finally:
+        exporter.shutdown()
+    otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert otlp_span["parentSpanId"] == "b" * 16
+    assert {"key": "retries", "value": {"intValue": "1"}} in otlp_span["attributes"]
+    assert otlp_span["status"] == {"code": 1}
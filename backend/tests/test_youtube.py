@@ -0,0 +1,81 @@
+import asyncio
+from contextlib import contextmanager
+
+from app.core.cache import MemoryCacheBackend
+from app.services.youtube import YouTubeDataClient, YouTubeQuotaTracker
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeYouTube:
+    def __init__(self):
+        self.search_calls = 0
+        self.videos_calls = []
+
+    def search(self):
+        return self
+
+    def videos(self):
+        return self
+
+    def list(self, **kwargs):
+        if "q" in kwargs:
+            self.search_calls += 1
+            return FakeRequest({"items": [{"id": {"videoId": "v1"}, "snippet": {"title": "レビュー", "channelTitle": "ch"}}]})
+        ids = kwargs["id"].split(",")
+        self.videos_calls.append(ids)
+        return FakeRequest({"items": [{"id": video_id, "statistics": {"viewCount": "42"}} for video_id in ids]})
+
+
+class FakePool:
+    def __init__(self):
+        self.youtube = FakeYouTube()
+
+    @contextmanager
+    def client(self):
+        yield self.youtube
+
+    def close(self):
+        pass
+
+
+def make_client():
+    tracker = YouTubeQuotaTracker(daily_limit=10000)
+    client = YouTubeDataClient(
+        pool=FakePool(),
+        search_cache=MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=60),
+        stats_cache=MemoryCacheBackend(max_bytes=1024 * 1024, ttl_seconds=60),
+        tracker=tracker,
+    )
+    return client, tracker
+
+
+def test_search_results_are_cached_by_normalized_query():
+    client, tracker = make_client()
+    first = asyncio.run(client.search_videos("トースター レビュー", max_results=3))
+    second = asyncio.run(client.search_videos(" トースター  レビュー ", max_results=3))
+    assert first == second
+    assert client.pool.youtube.search_calls == 1
+    usage = tracker.usage()
+    assert usage["used_units"] == 100
+    assert usage["endpoints"]["search.list"] == {"calls": 1, "units": 100}
+
+
+def test_view_counts_only_fetch_uncached_videos():
+    client, tracker = make_client()
+    assert asyncio.run(client.get_view_counts(["v1", "v2"])) == {"v1": 42, "v2": 42}
+    assert asyncio.run(client.get_view_counts(["v1", "v3"])) == {"v1": 42, "v3": 42}
+    assert client.pool.youtube.videos_calls == [["v1", "v2"], ["v3"]]
+    assert tracker.usage()["endpoints"]["videos.list"] == {"calls": 2, "units": 2}
+
+
+def test_quota_endpoint(client):
+    response = client.get("/youtube/quota")
+    assert response.status_code == 200
+    assert response.json()["daily_limit"] == 10000
@@ -15,6 +15,12 @@ const loadingMessages = [
   "会場のボルテージは最高潮！AIが今、この戦いを最も面白くするためのシナリオを構築中！刮目して待て！"
 ];
 
+// The battle video renders in the background after POST /battle returns
+const VIDEO_POLL_INTERVAL_MS = 3000;
+const VIDEO_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
+const wait = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const BattleScreen: React.FC = () => {
   const { param1, param2 } = useParams<{ param1: string; param2: string }>();
   const [battleProduct, setBattleProduct] = useState<BattleProduct | null>(null);
@@ -32,6 +38,8 @@ const BattleScreen: React.FC = () => {
     const randomIndex = Math.floor(Math.random() * loadingMessages.length);
     setRandomMessage(loadingMessages[randomIndex]);
 
+    let cancelled = false;
+
     const fetchBattleData = async () => {
       if (!param1 || !param2) { // This is the line that throws the error
         return;
@@ -42,13 +50,35 @@ const BattleScreen: React.FC = () => {
         const decodedName1 = decodeURIComponent(param1);
         const decodedName2 = decodeURIComponent(param2);
         const result = await ProductService.fetchProductBattle(decodedName1, decodedName2);
+        if (cancelled) return;
         setBattleProduct(result);
+
+        // Poll until the video is rendered; only the video fields change, so the descriptions keep typing
+        let battle = result;
+        const deadline = Date.now() + VIDEO_POLL_TIMEOUT_MS;
+        while (battle.status === 'rendering' && Date.now() < deadline) {
+          await wait(VIDEO_POLL_INTERVAL_MS);
+          if (cancelled) return;
+          battle = await ProductService.getBattleProductById(result.id);
+          if (cancelled) return;
+          const { status, video_url, error } = battle;
+          setBattleProduct((prev) => (prev ? { ...prev, status, video_url, error } : prev));
+        }
+        if (battle.status === 'rendering') {
+          setBattleProduct((prev) => (prev ? { ...prev, status: 'failed' } : prev));
+        }
       } catch (err) {
         console.error('Failed to fetch battle data:', err);
+        if (!cancelled) {
+          setBattleProduct((prev) => (prev ? { ...prev, status: 'failed' } : prev));
+        }
       }
     };
 
     fetchBattleData();
+    return () => {
+      cancelled = true;
+    };
   }, [param1, param2]); // Re-run when product names in URL change
 
   const handleBack = () => {
@@ -77,13 +107,18 @@ const BattleScreen: React.FC = () => {
     );
   }
 
+  // The loading video plays while the battle video renders; a failed render falls back to the placeholder
+  const battleVideoSource = battleProduct.status === 'rendering'
+    ? loadingVideo
+    : battleProduct.video_url || placeholderMovie;
+
   return (
     <div className="battle-screen">
       <NavigationHeader onBack={handleBack} />
       <div className="battle-container">
         <DescriptionBubble name={battleProduct.product1_name} description={description1} />
         <div className="video-container">
-          <video ref={videoRef} src={battleProduct.video_url || placeholderMovie} autoPlay loop muted playsInline />
+          <video ref={videoRef} src={battleVideoSource} autoPlay loop muted playsInline />
           <button className="play-pause-button" onClick={togglePlay}>
             {isPlaying ? '❚❚' : '▶'}
           </button>
@@ -14,8 +14,9 @@ export const ProductService = {
     return apiClient.get('/api/v1/products/types');
   },
 
-  getBattleProductById: (id: string): Promise<BattleProduct> => {
-    return apiClient.get(`/api/v1/products/battle/${id}`);
+  getBattleProductById: async (id: string): Promise<BattleProduct> => {
+    const response = await apiClient.get(`/api/v1/products/battle/${id}`);
+    return response.data;
   },
 
   fetchProductBattle: async (productName1: string, productName2: string): Promise<BattleProduct> => {
@@ -84,5 +84,9 @@ export interface BattleProduct {
   product2_id: string;
   product2_name: string;
   product2_description: string[];
-  video_url?: string;
+  video_url?: string | null;
+  video_prompt?: string;
+  // The video renders after the battle is returned; poll GET /battle/{id} until it is no longer "rendering"
+  status?: 'rendering' | 'completed' | 'failed';
+  error?: string | null;
 }